@@ -0,0 +1,110 @@
+"""Compara o envio de emails com uma conexão SMTP por mensagem e com conexões reaproveitadas (`enviar_mensagens`),
+usando um servidor SMTP local do aiosmtpd.
+
+Uso: python benchmark_envio.py [--mensagens N] [--trabalhadores N] [--atraso-conexao-ms MS] [--atraso-mensagem-ms MS]
+"""
+
+import argparse
+import asyncio
+import socket
+import sys
+import time
+
+from envio_emails import enviar_mensagens, informar_envio
+
+
+class _ServidorContador:
+    """Handler do aiosmtpd que conta conexões e mensagens e simula um servidor real: um atraso no EHLO
+    para o custo de abrir a conexão (TLS e autenticação) e outro no DATA para o de aceitar a mensagem."""
+
+    def __init__(self, atraso_conexao: float, atraso_mensagem: float):
+        self.atraso_conexao = atraso_conexao
+        self.atraso_mensagem = atraso_mensagem
+        self.conexoes = 0
+        self.mensagens = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.conexoes += 1
+        session.host_name = hostname
+        await asyncio.sleep(self.atraso_conexao)
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.mensagens += 1
+        await asyncio.sleep(self.atraso_mensagem)
+        return "250 OK"
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _mensagens(quantidade: int) -> list:
+    from django.core.mail import EmailMessage
+
+    mensagens = []
+    for i in range(quantidade):
+        mensagem = EmailMessage(
+            f"Painel {i + 1}", "<p>painel</p>" * 2000, to=[f"destino{i}@exemplo.com.br"]
+        )
+        mensagem.content_subtype = "html"
+        mensagens.append(mensagem)
+    return mensagens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mensagens", type=int, default=30)
+    parser.add_argument("--trabalhadores", type=int, default=4)
+    parser.add_argument("--atraso-conexao-ms", type=float, default=150)
+    parser.add_argument("--atraso-mensagem-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        sys.exit("O benchmark precisa do aiosmtpd (pip install aiosmtpd).")
+
+    import django
+    from django.conf import settings as django_settings
+
+    servidor = _ServidorContador(args.atraso_conexao_ms / 1000, args.atraso_mensagem_ms / 1000)
+    porta = _porta_livre()
+    controlador = Controller(servidor, hostname="127.0.0.1", port=porta)
+    controlador.start()
+    try:
+        django_settings.configure(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=porta,
+        )
+        django.setup()
+
+        cenarios = [
+            ("uma conexão por mensagem (EmailMessage.send)", None),
+            ("conexão reaproveitada, 1 trabalhador", 1),
+            (f"conexões reaproveitadas, {args.trabalhadores} trabalhadores", args.trabalhadores),
+        ]
+        for nome, trabalhadores in cenarios:
+            servidor.conexoes = servidor.mensagens = 0
+            mensagens = _mensagens(args.mensagens)
+            inicio = time.perf_counter()
+            if trabalhadores is None:
+                for mensagem in mensagens:
+                    mensagem.send()
+            else:
+                resultados = enviar_mensagens(mensagens, trabalhadores)
+            tempo = time.perf_counter() - inicio
+            print(
+                f"{nome}: {tempo:.2f} s | {tempo / args.mensagens * 1000:.1f} ms por mensagem | "
+                f"{servidor.conexoes} conexões | {servidor.mensagens} mensagens recebidas"
+            )
+        informar_envio(resultados[:3])
+    finally:
+        controlador.stop()
+
+
+if __name__ == "__main__":
+    main()
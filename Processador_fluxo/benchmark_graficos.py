@@ -0,0 +1,56 @@
+"""Compara o tempo de desenho do gráfico do painel em cada formato (agg e svg).
+
+Uso: python benchmark_graficos.py [--repeticoes N] [--dias N]
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from graficos_painel import FORMATOS, desenhar_grafico
+
+
+def _dados(dias: int) -> tuple:
+    gerador = np.random.default_rng(0)
+    datas = pd.Series(pd.date_range(end=pd.Timestamp.today().normalize(), periods=dias))
+    valores = pd.Series(gerador.normal(0, 50_000, dias).round(2))
+    return datas, valores
+
+
+def medir(formato: str, datas: pd.Series, valores: pd.Series, repeticoes: int) -> tuple:
+    """Retorna (primeiro desenho, melhor desenho seguinte, tamanho da imagem), em segundos e bytes."""
+    inicio = time.perf_counter()
+    imagem = desenhar_grafico(datas, valores, formato)
+    primeiro = time.perf_counter() - inicio
+
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        desenhar_grafico(datas, valores, formato)
+        tempos.append(time.perf_counter() - inicio)
+    return primeiro, min(tempos), len(imagem)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--dias", type=int, default=7)
+    args = parser.parse_args()
+
+    datas, valores = _dados(args.dias)
+    # O svg é medido antes para que o primeiro desenho do agg inclua a importação do matplotlib
+    for formato in sorted(FORMATOS, reverse=True):
+        matplotlib_carregado = "matplotlib" in sys.modules
+        primeiro, seguinte, tamanho = medir(formato, datas, valores, args.repeticoes)
+        print(
+            f"  {formato:<4} primeiro {primeiro * 1000:8.1f} ms"
+            f"{' (com importação do matplotlib)' if formato == 'agg' and not matplotlib_carregado else ''} | "
+            f"seguintes {seguinte * 1000:8.2f} ms | {tamanho / 1024:6.1f} KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Mede o tempo de importação dos pontos de entrada com `python -X importtime` e compara com o orçamento.
+
+Uso: python benchmark_inicializacao.py [--repeticoes N] [--top N] [--orcamento-ms MODULO=MS ...]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Orçamento, em milissegundos, para importar cada ponto de entrada
+ORCAMENTOS_MS = {
+    "processador_fluxo": 750,
+    "enviar_painel": 750,
+}
+
+# Módulos que não devem ser carregados só por importar o ponto de entrada (são importados no ponto de uso)
+PROIBIDOS = {
+    "processador_fluxo": ("enviar_painel", "django", "matplotlib", "sqlalchemy", "pyfiglet", "psutil", "pyarrow"),
+    "enviar_painel": ("django", "matplotlib", "sqlalchemy", "pyfiglet", "smtplib"),
+}
+
+# Dependências de todos os pontos de entrada. O que elas carregam na própria importação não conta como
+# módulo proibido: o pandas 2.2, por exemplo, já importa o pyarrow quando ele está instalado
+DEPENDENCIAS_BASE = ("pandas",)
+
+PASTA = os.path.dirname(os.path.abspath(__file__))
+
+
+def _importtime(modulo: str) -> tuple:
+    """Importa o módulo em um processo novo e retorna (tempo do processo em s, linhas do -X importtime).
+    Cada linha é (profundidade, nome, próprio em us, acumulado em us)."""
+    inicio = time.perf_counter()
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=PASTA,
+        capture_output=True,
+        text=True,
+    )
+    tempo_processo = time.perf_counter() - inicio
+    if processo.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {modulo}:\n{processo.stderr.strip()[-2000:]}")
+
+    linhas = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:") or "imported package" in linha:
+            continue
+        proprio, acumulado, nome = linha[len("import time:"):].split("|")
+        profundidade = (len(nome) - len(nome.lstrip()) - 1) // 2
+        linhas.append((profundidade, nome.strip(), int(proprio), int(acumulado)))
+    return tempo_processo, linhas
+
+
+def _subarvore(linhas: list, modulo: str) -> list:
+    """Linhas importadas pelo módulo. O -X importtime lista as dependências antes de quem as importou,
+    então são as linhas entre a importação anterior de primeiro nível e a do módulo."""
+    fim = next(
+        i for i, (profundidade, nome, _, _) in enumerate(linhas) if profundidade == 0 and nome == modulo
+    )
+    inicio = fim
+    while inicio > 0 and linhas[inicio - 1][0] > 0:
+        inicio -= 1
+    return linhas[inicio : fim + 1]
+
+
+def _carregados_fora_de(linhas: list, dependencias: tuple) -> set:
+    """Módulos importados fora das subárvores das `dependencias`. A subárvore de um módulo são as linhas
+    anteriores a ele com profundidade maior, então as linhas são percorridas do fim para o início."""
+    carregados = set()
+    profundidade_ignorada = None
+    for profundidade, nome, _, _ in reversed(linhas):
+        if profundidade_ignorada is not None and profundidade > profundidade_ignorada:
+            continue
+        profundidade_ignorada = None
+        if nome in dependencias:
+            profundidade_ignorada = profundidade
+            continue
+        carregados.add(nome)
+    return carregados
+
+
+def medir(modulo: str, repeticoes: int) -> tuple:
+    """Retorna (importação em ms, processo em ms, linhas importadas pelo módulo) da repetição mais rápida."""
+    melhor = None
+    for _ in range(repeticoes):
+        tempo_processo, linhas = _importtime(modulo)
+        linhas = _subarvore(linhas, modulo)
+        if melhor is None or linhas[-1][3] < melhor[2][-1][3]:
+            melhor = (linhas[-1][3], tempo_processo, linhas)
+    total, tempo_processo, linhas = melhor
+    return total / 1000, tempo_processo * 1000, linhas
+
+
+def _orcamentos(argumentos: list) -> dict:
+    orcamentos = dict(ORCAMENTOS_MS)
+    for argumento in argumentos:
+        modulo, _, milissegundos = argumento.partition("=")
+        orcamentos[modulo] = float(milissegundos)
+    return orcamentos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Importações mais caras exibidas por módulo.")
+    parser.add_argument(
+        "--orcamento-ms",
+        action="append",
+        default=[],
+        metavar="MODULO=MS",
+        help="Substitui o orçamento de um ponto de entrada (pode ser repetido).",
+    )
+    args = parser.parse_args()
+
+    aprovado = True
+    for modulo, orcamento in _orcamentos(args.orcamento_ms).items():
+        try:
+            importacao, processo, linhas = medir(modulo, args.repeticoes)
+        except RuntimeError as erro:
+            print(erro)
+            aprovado = False
+            continue
+
+        situacao = "OK" if importacao <= orcamento else "ACIMA DO ORÇAMENTO"
+        print(
+            f"{modulo}: importação {importacao:8.1f} ms | processo {processo:8.1f} ms | "
+            f"orçamento {orcamento:8.1f} ms | {situacao}"
+        )
+        # Importações diretas do ponto de entrada, da mais cara para a mais barata
+        diretas = sorted(
+            (linha for linha in linhas if linha[0] == 1), key=lambda linha: linha[3], reverse=True
+        )
+        for _, nome, proprio, acumulado in diretas[: args.top]:
+            print(f"  {acumulado / 1000:8.1f} ms acumulado | {proprio / 1000:8.1f} ms próprio | {nome}")
+
+        carregados = _carregados_fora_de(linhas, DEPENDENCIAS_BASE)
+        indevidos = [
+            proibido
+            for proibido in PROIBIDOS.get(modulo, ())
+            if any(nome == proibido or nome.startswith(proibido + ".") for nome in carregados)
+        ]
+        if indevidos:
+            print(f"  Carregados na importação, mas deveriam ser importados no ponto de uso: {indevidos}")
+        aprovado = aprovado and importacao <= orcamento and not indevidos
+
+    sys.exit(0 if aprovado else 1)
+
+
+if __name__ == "__main__":
+    main()
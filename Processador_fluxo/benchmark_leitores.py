@@ -0,0 +1,93 @@
+"""Compara o tempo de leitura por aba de cada motor do LeitorPlanilhasFluxo.
+
+Uso: python benchmark_leitores.py <arquivo.xlsx ou pasta> [...] [--repeticoes N]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import pandas as pd
+
+from leitor_fluxo import ABA_INVESTIMENTOS, MOTORES, datas_do_mes
+from leitor_xml import LeitorXlsxXml
+
+
+def _abrir(caminho_completo: str, motor: str):
+    if motor == "xml":
+        return LeitorXlsxXml(caminho_completo)
+    return pd.ExcelFile(caminho_completo, engine=motor)
+
+
+def medir_motor(caminho_completo: str, motor: str) -> tuple:
+    """Retorna (tempo de abertura, {aba: tempo de leitura}, {aba: DataFrame}) em segundos."""
+    inicio = time.perf_counter()
+    with _abrir(caminho_completo, motor) as xls:
+        abertura = time.perf_counter() - inicio
+        abas = [
+            aba
+            for aba in datas_do_mes(caminho_completo) + [ABA_INVESTIMENTOS]
+            if aba in xls.sheet_names
+        ]
+        tempos, frames = {}, {}
+        for aba in abas:
+            inicio = time.perf_counter()
+            frames[aba] = xls.parse(aba)
+            tempos[aba] = time.perf_counter() - inicio
+    return abertura, tempos, frames
+
+
+def _listar(caminhos: list) -> list:
+    arquivos = []
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            arquivos.extend(sorted(glob.glob(os.path.join(caminho, "Fluxo de Caixa Diário *.xlsx"))))
+        else:
+            arquivos.append(caminho)
+    return arquivos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("caminhos", nargs="+")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    for arquivo in _listar(args.caminhos):
+        print(f"\n{os.path.basename(arquivo)}")
+        referencia = None
+        resultados = {}
+        for motor in MOTORES:
+            try:
+                medicoes = [medir_motor(arquivo, motor) for _ in range(args.repeticoes)]
+            except Exception as e:
+                print(f"  {motor:<9} indisponível ({e})")
+                continue
+
+            # Usa a melhor repetição de cada aba para reduzir o ruído
+            abertura = min(m[0] for m in medicoes)
+            por_aba = {aba: min(m[1][aba] for m in medicoes) for aba in medicoes[0][1]}
+            frames = medicoes[0][2]
+            if referencia is None:
+                referencia = frames
+
+            divergentes = []
+            for aba, df in frames.items():
+                try:
+                    pd.testing.assert_frame_equal(df, referencia[aba])
+                except AssertionError:
+                    divergentes.append(aba)
+
+            media = sum(por_aba.values()) / max(len(por_aba), 1)
+            resultados[motor] = media
+            ganho = resultados["openpyxl"] / media if "openpyxl" in resultados else float("nan")
+            print(
+                f"  {motor:<9} abertura {abertura * 1000:8.1f} ms | "
+                f"{media * 1000:8.2f} ms/aba | {ganho:5.2f}x vs openpyxl | "
+                f"abas divergentes: {divergentes or 'nenhuma'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Configuração da suíte de benchmarks do processador e do painel.
+
+As planilhas são geradas por `gerador_planilhas.py` em uma pasta temporária, sempre com a mesma semente.
+Os resultados são gravados como linhas de base em `benchmarks/linhas_base`. Quando já existe uma linha de
+base, cada execução é comparada com a última gravada e falha se a mediana de algum benchmark piorar mais
+que `--limite-regressao` por cento.
+"""
+
+import glob
+import os
+import sys
+
+import pytest
+
+PASTA_PROCESSADOR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_LINHAS_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "linhas_base")
+ARMAZENAMENTO_PADRAO = "file://./.benchmarks"
+
+sys.path.insert(0, PASTA_PROCESSADOR)
+
+
+def pytest_addoption(parser):
+    grupo = parser.getgroup("fluxo", "benchmarks do fluxo de caixa")
+    grupo.addoption("--planilhas-inicio", default="01-2024", help="Primeiro mês gerado, MM-AAAA.")
+    grupo.addoption("--planilhas-meses", type=int, default=3, help="Meses (planilhas) gerados.")
+    grupo.addoption(
+        "--planilhas-compromissos",
+        type=int,
+        default=None,
+        help="Linhas de compromisso por aba (padrão: as entradas e saídas de listas).",
+    )
+    grupo.addoption(
+        "--banco-benchmark",
+        default=os.environ.get("FLUXO_BENCHMARK_DATABASE_URL"),
+        help="URL de um PostgreSQL descartável (as tabelas do fluxo são recriadas nele). "
+        "Sem ela, os benchmarks de carga e do painel são pulados.",
+    )
+    grupo.addoption(
+        "--limite-regressao",
+        type=int,
+        default=20,
+        help="Piora máxima da mediana, em %%, em relação à última linha de base (0 desliga a comparação).",
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    """Aponta o pytest-benchmark para as linhas de base e liga a comparação quando já existe uma."""
+    if not hasattr(config.option, "benchmark_storage"):
+        return
+    if config.option.benchmark_storage == ARMAZENAMENTO_PADRAO:
+        config.option.benchmark_storage = f"file://{PASTA_LINHAS_BASE}"
+    limite = config.getoption("limite_regressao")
+    existe_linha_base = glob.glob(os.path.join(PASTA_LINHAS_BASE, "*", "*.json"))
+    if limite > 0 and existe_linha_base and not config.option.benchmark_compare:
+        from pytest_benchmark.utils import parse_compare_fail
+
+        config.option.benchmark_compare = True
+        config.option.benchmark_compare_fail = [parse_compare_fail(f"median:{limite}%")]
+
+
+@pytest.fixture(scope="session")
+def pasta_planilhas(tmp_path_factory, request) -> str:
+    from gerador_planilhas import gerar_planilhas
+
+    pasta = str(tmp_path_factory.mktemp("planilhas_fluxo"))
+    gerar_planilhas(
+        pasta,
+        request.config.getoption("planilhas_inicio"),
+        request.config.getoption("planilhas_meses"),
+        compromissos=request.config.getoption("planilhas_compromissos"),
+    )
+    return pasta
+
+
+@pytest.fixture(scope="session")
+def arquivos_planilhas(pasta_planilhas) -> list:
+    return sorted(os.path.basename(caminho) for caminho in glob.glob(os.path.join(pasta_planilhas, "*.xlsx")))
+
+
+@pytest.fixture(scope="session")
+def dimensoes_planilhas(request, arquivos_planilhas) -> dict:
+    """Dias (abas diárias), bancos e linhas de compromisso das planilhas geradas, de que dependem as
+    quantidades de linhas esperadas em cada tabela."""
+    import listas
+    from leitor_fluxo import datas_do_mes
+
+    compromissos = request.config.getoption("planilhas_compromissos")
+    return {
+        "dias": sum(len(datas_do_mes(arquivo)) for arquivo in arquivos_planilhas),
+        "bancos": len(listas.colunas_bancos),
+        "compromissos": compromissos or len(listas.entradas) + len(listas.saidas),
+    }
+
+
+@pytest.fixture(scope="session")
+def abas_limpas(pasta_planilhas, arquivos_planilhas) -> tuple:
+    """DataFrames limpos de lançamentos, saldos e investimentos de todas as planilhas."""
+    from processador_fluxo import processar_arquivos_fluxo
+
+    caminhos = [os.path.join(pasta_planilhas, arquivo) for arquivo in arquivos_planilhas]
+    dfs_tabela_1, dfs_tabela_2, dfs_tabela_3 = [], [], []
+    for dfs_1, dfs_2, dfs_3 in processar_arquivos_fluxo(caminhos):
+        dfs_tabela_1.extend(dfs_1)
+        dfs_tabela_2.extend(dfs_2)
+        dfs_tabela_3.extend(dfs_3)
+    return dfs_tabela_1, dfs_tabela_2, dfs_tabela_3
+
+
+@pytest.fixture(scope="session")
+def tabelas(abas_limpas) -> tuple:
+    """Tabelas de lançamentos, saldos e investimentos já processadas e formatadas para o banco."""
+    from processador_fluxo import (
+        TabelaBancoCompromissoLancamentos,
+        TabelaInvestimentos,
+        TabelaSaldoInicialFinal,
+        formata_tabelas,
+    )
+
+    dfs_tabela_1, dfs_tabela_2, dfs_tabela_3 = abas_limpas
+    return (
+        formata_tabelas(TabelaBancoCompromissoLancamentos().processar_dados(dfs_tabela_1)),
+        formata_tabelas(TabelaSaldoInicialFinal().processar_dados(dfs_tabela_2)),
+        formata_tabelas(TabelaInvestimentos().processar_dados(dfs_tabela_3)),
+    )
+
+
+@pytest.fixture(scope="session")
+def engine_benchmark(request):
+    url = request.config.getoption("banco_benchmark")
+    if not url:
+        pytest.skip("Informe --banco-benchmark (ou FLUXO_BENCHMARK_DATABASE_URL) para medir a carga e o painel")
+    from sqlalchemy import create_engine
+
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
@@ -0,0 +1,43 @@
+import pytest
+
+for modulo in ("listas", "dim", "passwd", "settings", "django"):
+    pytest.importorskip(modulo)
+
+from enviar_painel import fetch_data, render_template
+from formatacao import formatar_brl
+from gerador_planilhas import MODALIDADES
+from graficos_painel import FORMATOS, TIPOS_MIME
+from metricas_painel import calcular_metricas
+from processador_fluxo import salvar_em_postgres
+
+
+@pytest.fixture(scope="session")
+def dados_painel(engine_benchmark, tabelas) -> tuple:
+    """Carrega as tabelas geradas no banco de benchmark e lê os dados do painel do último dia."""
+    from sqlalchemy.orm import Session
+
+    lancamentos, saldos, investimentos = tabelas
+    salvar_em_postgres(lancamentos, saldos, investimentos, None, None, None, engine_benchmark)
+    data = lancamentos["data"].max().date()
+    with Session(bind=engine_benchmark) as session:
+        dados = fetch_data(session, data)
+    return dados, data
+
+
+@pytest.mark.parametrize("grafico", FORMATOS)
+def test_render_template(benchmark, dados_painel, dimensoes_planilhas, grafico):
+    dados, data = dados_painel
+    saldos, lancamentos, investimentos, lancamentos_grafico, lancamentos_banco = dados
+    bancos = dimensoes_planilhas["bancos"]
+    # Saldo inicial e final e as modalidades de cada banco no último dia
+    assert len(saldos) == 2 * bancos
+    assert len(investimentos) == bancos * len(MODALIDADES)
+
+    html = benchmark(render_template, list(dados), None, data, grafico)
+    metricas = calcular_metricas(saldos, lancamentos, investimentos, lancamentos_banco)
+    assert f"data:{TIPOS_MIME[grafico]};base64," in html
+    assert data.strftime("%d/%m/%Y") in html
+    for valor in (metricas.saldo_inicial, metricas.saldo_final, metricas.entradas_liquidas, metricas.saldo_total):
+        assert formatar_brl(valor) in html
+    for banco in saldos["banco"].unique():
+        assert banco in html
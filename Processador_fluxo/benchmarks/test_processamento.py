@@ -0,0 +1,111 @@
+import os
+
+import pytest
+
+pytest.importorskip("listas")
+
+import esquema
+from gerador_planilhas import MODALIDADES
+from leitor_fluxo import MOTORES, datas_do_mes
+from processador_fluxo import (
+    TabelaBancoCompromissoLancamentos,
+    TabelaInvestimentos,
+    TabelaSaldoInicialFinal,
+    formata_tabelas,
+    processar_arquivos_fluxo,
+    salvar_em_postgres,
+)
+
+# A leitura das planilhas e a carga levam segundos: poucas rodadas, sem repetições dentro de cada uma
+RODADAS_LEITURA = 3
+RODADAS_CARGA = 3
+
+TABELAS = {
+    "lancamentos": TabelaBancoCompromissoLancamentos,
+    "saldos": TabelaSaldoInicialFinal,
+    "investimentos": TabelaInvestimentos,
+}
+TABELAS_BANCO = {
+    "lancamentos": "fluxo_lancamentos",
+    "saldos": "fluxo_saldos",
+    "investimentos": "fluxo_investimentos",
+}
+
+
+def _linhas_esperadas(nome: str, dimensoes: dict) -> int:
+    """Linhas de cada tabela: todas as células de lançamento e de saldo são mantidas, mesmo vazias."""
+    por_dia = {
+        "lancamentos": dimensoes["compromissos"] * dimensoes["bancos"],
+        "saldos": 2 * dimensoes["bancos"],  # SALDO INICIAL e SALDO FINAL
+        "investimentos": dimensoes["bancos"] * len(MODALIDADES),
+    }
+    return dimensoes["dias"] * por_dia[nome]
+
+
+def _colunas_banco(nome: str) -> set:
+    return {coluna.name for coluna in esquema.metadata.tables[TABELAS_BANCO[nome]].columns} - {"index"}
+
+
+def test_processar_arquivos(benchmark, pasta_planilhas, arquivos_planilhas, dimensoes_planilhas):
+    dfs = benchmark.pedantic(
+        TabelaBancoCompromissoLancamentos().processar_arquivos,
+        args=(pasta_planilhas, arquivos_planilhas),
+        rounds=RODADAS_LEITURA,
+        iterations=1,
+    )
+    # Uma aba limpa por dia, com uma linha por compromisso
+    assert len(dfs) == dimensoes_planilhas["dias"]
+    assert {len(df) for df in dfs} == {dimensoes_planilhas["compromissos"]}
+
+
+@pytest.mark.parametrize("motor", MOTORES)
+def test_processar_arquivos_fluxo(benchmark, pasta_planilhas, arquivos_planilhas, motor):
+    if motor == "calamine":
+        pytest.importorskip("python_calamine")
+    caminhos = [os.path.join(pasta_planilhas, arquivo) for arquivo in arquivos_planilhas]
+    resultados = benchmark.pedantic(
+        processar_arquivos_fluxo,
+        args=(caminhos,),
+        kwargs={"motor": motor},
+        rounds=RODADAS_LEITURA,
+        iterations=1,
+    )
+    assert len(resultados) == len(caminhos)
+    for caminho, (lancamentos, saldos, investimentos) in zip(caminhos, resultados):
+        # Lançamentos e saldos de cada aba diária e a aba "Investimentos"
+        assert len(lancamentos) == len(saldos) == len(datas_do_mes(caminho))
+        assert len(investimentos) == 1
+
+
+@pytest.mark.parametrize("indice, nome", list(enumerate(TABELAS)), ids=list(TABELAS))
+def test_processar_dados(benchmark, abas_limpas, dimensoes_planilhas, indice, nome):
+    tabela = benchmark(TABELAS[nome]().processar_dados, abas_limpas[indice])
+    assert tabela.shape == (_linhas_esperadas(nome, dimensoes_planilhas), len(_colunas_banco(nome)))
+
+
+@pytest.mark.parametrize("indice, nome", list(enumerate(TABELAS)), ids=list(TABELAS))
+def test_formata_tabelas(benchmark, abas_limpas, indice, nome):
+    tabela = TABELAS[nome]().processar_dados(abas_limpas[indice])
+    # formata_tabelas renomeia as colunas no próprio DataFrame: cada rodada recebe uma cópia rasa
+    formatada = benchmark.pedantic(
+        formata_tabelas, setup=lambda: ((tabela.copy(deep=False),), {}), rounds=200
+    )
+    assert set(formatada.columns) == _colunas_banco(nome)
+    assert len(formatada) == len(tabela)
+
+
+@pytest.mark.parametrize("metodo", ["copy", "insert"])
+def test_salvar_em_postgres(benchmark, engine_benchmark, tabelas, metodo):
+    from sqlalchemy import func, select
+
+    lancamentos, saldos, investimentos = tabelas
+    benchmark.pedantic(
+        salvar_em_postgres,
+        args=(lancamentos, saldos, investimentos, None, None, None, engine_benchmark, metodo),
+        rounds=RODADAS_CARGA,
+        iterations=1,
+    )
+    with engine_benchmark.connect() as conexao:
+        for nome, tabela in zip(TABELAS_BANCO.values(), tabelas):
+            contagem = select(func.count()).select_from(esquema.metadata.tables[nome])
+            assert conexao.execute(contagem).scalar() == len(tabela)
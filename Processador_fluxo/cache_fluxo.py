@@ -0,0 +1,97 @@
+import logging
+import os
+import shutil
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class CacheAbasFluxo:
+    """Esta classe guarda em disco (Parquet) os DataFrames limpos de cada aba, indexados pelo hash do
+    conteúdo do arquivo, pela `versao` da limpeza e pelo nome da aba. Cada arquivo do fluxo ocupa uma
+    subpasta com o seu hash e a versão, de modo que abas limpas por outra versão nunca são reaproveitadas."""
+
+    MARCADOR = ".ok"
+
+    def __init__(self, pasta: str, limite_mb: int = 512, versao: str = ""):
+        self.pasta = pasta
+        self.limite_bytes = limite_mb * 1024 * 1024
+        self.versao = versao
+        os.makedirs(self.pasta, exist_ok=True)
+
+    def _pasta_arquivo(self, hash_conteudo: str) -> str:
+        nome = f"{hash_conteudo}-{self.versao}" if self.versao else hash_conteudo
+        return os.path.join(self.pasta, nome)
+
+    def _base(self, hash_conteudo: str, aba: str) -> str:
+        return os.path.join(self._pasta_arquivo(hash_conteudo), aba)
+
+    def carregar(self, hash_conteudo: str, aba: str) -> tuple | None:
+        """Retorna as listas de DataFrames (lançamentos, saldos, investimentos) da aba, ou None se não estiver em cache."""
+        base = self._base(hash_conteudo, aba)
+        if not os.path.exists(base + self.MARCADOR):
+            return None
+
+        resultado = ([], [], [])
+        for indice, dfs in enumerate(resultado):
+            if os.path.exists(f"{base}.{indice}.parquet"):
+                dfs.append(pd.read_parquet(f"{base}.{indice}.parquet"))
+            elif os.path.exists(f"{base}.{indice}.pkl"):
+                dfs.append(pd.read_pickle(f"{base}.{indice}.pkl"))
+
+        # Atualiza a data de acesso usada na remoção dos itens mais antigos
+        os.utime(self._pasta_arquivo(hash_conteudo))
+        return resultado
+
+    def gravar(self, hash_conteudo: str, aba: str, resultado: tuple) -> None:
+        os.makedirs(self._pasta_arquivo(hash_conteudo), exist_ok=True)
+        base = self._base(hash_conteudo, aba)
+        for indice, dfs in enumerate(resultado):
+            for df in dfs:
+                self._gravar_frame(df, f"{base}.{indice}")
+        # O marcador é gravado por último: uma aba só conta como em cache quando está completa
+        open(base + self.MARCADOR, "w").close()
+
+    def _gravar_frame(self, df: pd.DataFrame, base: str) -> None:
+        # Importado aqui (e pelo pandas no read_parquet) para não pesar na inicialização do processador
+        try:
+            import pyarrow
+        except ImportError:  # pyarrow é opcional; sem ele o cache usa pickle
+            pyarrow = None
+        if pyarrow is not None:
+            try:
+                df.to_parquet(base + ".parquet")
+                return
+            except (pyarrow.lib.ArrowException, ValueError, TypeError):
+                # Colunas com tipos misturados (ex.: números e "-") não cabem em Parquet
+                if os.path.exists(base + ".parquet"):
+                    os.remove(base + ".parquet")
+        pd.to_pickle(df, base + ".pkl")
+
+    def _tamanho(self, pasta: str) -> int:
+        return sum(
+            os.path.getsize(os.path.join(raiz, nome))
+            for raiz, _, nomes in os.walk(pasta)
+            for nome in nomes
+        )
+
+    def aplicar_limite(self) -> None:
+        """Remove os arquivos usados há mais tempo até o cache ficar abaixo do limite."""
+        pastas = [
+            os.path.join(self.pasta, nome)
+            for nome in os.listdir(self.pasta)
+            if os.path.isdir(os.path.join(self.pasta, nome))
+        ]
+        tamanhos = {pasta: self._tamanho(pasta) for pasta in pastas}
+        total = sum(tamanhos.values())
+        for pasta in sorted(pastas, key=os.path.getmtime):
+            if total <= self.limite_bytes:
+                break
+            logger.info("Removendo do cache: %s", os.path.basename(pasta))
+            shutil.rmtree(pasta, ignore_errors=True)
+            total -= tamanhos[pasta]
+
+    def limpar(self) -> None:
+        shutil.rmtree(self.pasta, ignore_errors=True)
+        os.makedirs(self.pasta, exist_ok=True)
@@ -0,0 +1,151 @@
+import csv
+import io
+import logging
+import time
+
+import pandas as pd
+from sqlalchemy import func, inspect, select
+from sqlalchemy.schema import CreateTable
+
+import esquema
+
+logger = logging.getLogger(__name__)
+
+
+def copiar_para_postgres(table, conn, keys, data_iter) -> int:
+    """Método de inserção para `DataFrame.to_sql` que envia as linhas com COPY ... FROM STDIN
+    a partir de um buffer em memória, em vez de um INSERT por linha."""
+    buffer = io.StringIO()
+    linhas = csv.writer(buffer)
+    linhas.writerows(data_iter)
+    buffer.seek(0)
+
+    colunas = ", ".join(f'"{coluna}"' for coluna in keys)
+    nome = f'"{table.schema}"."{table.name}"' if table.schema else f'"{table.name}"'
+    sql = f"COPY {nome} ({colunas}) FROM STDIN WITH (FORMAT csv)"
+
+    with conn.connection.cursor() as cursor:
+        if hasattr(cursor, "copy_expert"):
+            # psycopg2
+            cursor.copy_expert(sql, buffer)
+        else:
+            # psycopg 3
+            with cursor.copy(sql) as copia:
+                copia.write(buffer.getvalue())
+        return cursor.rowcount
+
+
+def _informar_vazao(nome: str, linhas: int, duracao: float) -> None:
+    vazao = linhas / duracao if duracao else 0
+    logger.info("%s: %d linhas em %.2fs (%s linhas/s)", nome, linhas, duracao, f"{vazao:,.0f}")
+
+
+def _metodo_to_sql(metodo: str):
+    return copiar_para_postgres if metodo == "copy" else None
+
+
+def _preparar(tabela: pd.DataFrame, esquema_tabela) -> pd.DataFrame:
+    """Mantém apenas as colunas do esquema gerenciado e converte a coluna "data" para DATE."""
+    colunas = [coluna.name for coluna in esquema_tabela.columns if coluna.name != "index"]
+    extras = [coluna for coluna in tabela.columns if coluna not in colunas]
+    if extras:
+        logger.warning("Colunas fora do esquema de %s ignoradas: %s", esquema_tabela.name, extras)
+    preparada = tabela[[coluna for coluna in colunas if coluna in tabela.columns]].copy()
+    if "data" in preparada.columns:
+        preparada["data"] = pd.to_datetime(preparada["data"]).dt.date
+    return preparada
+
+
+def _segue_esquema(inspetor, esquema_tabela) -> bool:
+    """Verifica se a tabela existente tem as mesmas colunas, com tipos compatíveis, do esquema gerenciado."""
+    existentes = {
+        coluna["name"]: coluna["type"]._type_affinity
+        for coluna in inspetor.get_columns(esquema_tabela.name)
+    }
+    esperadas = {coluna.name: coluna.type._type_affinity for coluna in esquema_tabela.columns}
+    return existentes == esperadas
+
+
+def particoes_disponiveis(conexao) -> bool:
+    """Verifica se todas as tabelas do esquema gerenciado já existem com as colunas do esquema, isto é,
+    se uma carga pode regravar apenas alguns meses (`salvar_particoes`) sem recriar nenhuma tabela."""
+    inspetor = inspect(conexao)
+    return all(
+        inspetor.has_table(nome) and _segue_esquema(inspetor, esquema_tabela)
+        for nome, esquema_tabela in esquema.metadata.tables.items()
+    )
+
+
+def _inserir(tabela: pd.DataFrame, nome: str, conexao, metodo: str, chunksize: int) -> None:
+    if tabela.empty:
+        return
+    tabela.to_sql(
+        nome,
+        conexao,
+        if_exists="append",
+        index=True,
+        method=_metodo_to_sql(metodo),
+        chunksize=chunksize,
+    )
+
+
+def salvar_tabela(
+    tabela: pd.DataFrame,
+    nome: str,
+    conexao,
+    metodo: str = "copy",
+    chunksize: int = 100_000,
+) -> None:
+    """Recria a tabela com o esquema gerenciado e grava todas as linhas, usando a conexão (e a transação) recebida."""
+    inicio = time.perf_counter()
+    esquema_tabela = esquema.metadata.tables[nome]
+    esquema_tabela.drop(conexao, checkfirst=True)
+    # Os índices são criados depois da carga, que fica mais rápida sem eles
+    conexao.execute(CreateTable(esquema_tabela))
+    _inserir(_preparar(tabela, esquema_tabela), nome, conexao, metodo, chunksize)
+    for indice in esquema_tabela.indexes:
+        indice.create(conexao)
+    _informar_vazao(nome, len(tabela), time.perf_counter() - inicio)
+
+
+def salvar_particoes(
+    tabela: pd.DataFrame,
+    nome: str,
+    conexao,
+    meses: list,
+    metodo: str = "copy",
+    chunksize: int = 100_000,
+) -> None:
+    """Apaga e regrava apenas os meses informados da tabela, usando a conexão (e a transação) recebida.
+    Se a tabela ainda não existir, ou se as suas colunas não forem as do esquema, ela é recriada com todas as linhas."""
+    esquema_tabela = esquema.metadata.tables[nome]
+    inspetor = inspect(conexao)
+    if not inspetor.has_table(nome):
+        logger.info("%s: tabela inexistente, carregando todas as linhas", nome)
+        salvar_tabela(tabela, nome, conexao, metodo, chunksize)
+        return
+    if not _segue_esquema(inspetor, esquema_tabela):
+        logger.warning("%s: colunas diferentes do esquema, recriando a tabela com todas as linhas", nome)
+        salvar_tabela(tabela, nome, conexao, metodo, chunksize)
+        return
+
+    inicio = time.perf_counter()
+    for mes in meses:
+        conexao.execute(
+            esquema_tabela.delete().where(
+                esquema_tabela.c.data >= mes.date(),
+                esquema_tabela.c.data < (mes + pd.offsets.MonthBegin()).date(),
+            )
+        )
+    if tabela.empty:
+        novas = tabela
+    else:
+        periodos = [mes.to_period("M") for mes in meses]
+        novas = tabela[tabela["data"].dt.to_period("M").isin(periodos)].copy()
+    # Novas linhas recebem índices após o maior existente; os meses fechados mantêm os seus
+    proximo = conexao.execute(
+        select(func.coalesce(func.max(esquema_tabela.c["index"]), -1) + 1)
+    ).scalar()
+    novas.index = pd.RangeIndex(proximo, proximo + len(novas))
+    _inserir(_preparar(novas, esquema_tabela), nome, conexao, metodo, chunksize)
+    _informar_vazao(nome, len(novas), time.perf_counter() - inicio)
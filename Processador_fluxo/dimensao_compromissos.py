@@ -0,0 +1,48 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import dim as dm
+
+
+class IndiceCompromissos:
+    """Índice imutável da dimensão de compromissos: vetores indexados pelo código do compromisso
+    com a descrição e o tipo, para anotar os lançamentos por posição em vez de merges.
+    A última posição dos vetores atende aos códigos ausentes ou fora da dimensão."""
+
+    def __init__(self, compromissos: pd.DataFrame):
+        # Em ids repetidos vale a primeira ocorrência
+        dimensao = compromissos.assign(
+            id_compromisso=compromissos["id_compromisso"].astype(int)
+        ).drop_duplicates("id_compromisso")
+        ids = dimensao["id_compromisso"].to_numpy()
+        self.sem_compromisso = int(ids.max()) + 1 if len(ids) else 0
+
+        self._compromissos = self._vetor(ids, dimensao["compromisso"])
+        self._tipos = self._vetor(ids, dimensao["tipo"])
+
+    def _vetor(self, ids: np.ndarray, valores: pd.Series) -> np.ndarray:
+        vetor = np.full(self.sem_compromisso + 1, np.nan, dtype=object)
+        vetor[ids] = valores.to_numpy()
+        vetor.setflags(write=False)
+        return vetor
+
+    def _posicoes(self, codigos: pd.Series) -> np.ndarray:
+        codigos = pd.Series(codigos).to_numpy(dtype="float64", na_value=np.nan)
+        validos = (codigos >= 0) & (codigos < self.sem_compromisso)
+        return np.where(validos, codigos, self.sem_compromisso).astype(np.intp)
+
+    def compromissos(self, codigos: pd.Series) -> np.ndarray:
+        """Descrição do compromisso de cada código (NaN quando o código não está na dimensão)."""
+        return self._compromissos[self._posicoes(codigos)]
+
+    def tipos(self, codigos: pd.Series) -> np.ndarray:
+        """Tipo (Entrada/Saída) da dimensão para cada código (NaN quando o código não está na dimensão)."""
+        return self._tipos[self._posicoes(codigos)]
+
+
+@lru_cache(maxsize=1)
+def indice_compromissos() -> IndiceCompromissos:
+    """Índice da dimensão `dim.compromissos`, montado uma única vez por processo."""
+    return IndiceCompromissos(dm.compromissos)
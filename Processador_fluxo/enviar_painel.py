@@ -1,38 +1,38 @@
+import argparse
+import logging
 import os
-import io
 import base64
 from datetime import date, timedelta, datetime
-from typing import Union, List, Dict, Any
+from typing import List, Dict, Iterator
 
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
 
-import django
-from django.conf import settings as django_settings
-from django.core.mail import EmailMessage
-import django.template
-from django.template.loader import render_to_string
-
-from sqlalchemy import create_engine, Column, Integer, Float, String, Date, cast
-from sqlalchemy.orm import declarative_base, sessionmaker
-
-import dim as dm
-import settings
-import listas
+from dimensao_compromissos import indice_compromissos
+from graficos_painel import FORMATOS, TIPOS_MIME, desenhar_grafico
+from instrumentacao import NIVEIS_LOG, PASTA_METRICAS, configurar_logging, instrumentacao
+from metricas_painel import EXCLUIDOS_ENTRADAS, EXCLUIDOS_SAIDAS, calcular_metricas
+from renderizador_painel import TEMPLATE_PAINEL, configure_django, renderizador_painel
 import passwd as pg
 
-from pyfiglet import figlet_format
+# Django, SQLAlchemy, pyfiglet e o envio de emails (smtplib) são importados nas funções que os usam:
+# o `--help` e quem importa este módulo não pagam o custo de inicialização dessas bibliotecas.
+
+logger = logging.getLogger(__name__)
 
-Base = declarative_base()
+# Linhas lidas por lote do cursor no servidor
+TAMANHO_LOTE = 50_000
 
 def create_database_session(database_url: str):
     """Cria e retorna uma sessão do banco de dados."""
-    print(f"Creating database session with URL: {database_url}")
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
     engine = create_engine(database_url)
+    # A URL vai para o log sem a senha
+    logger.info("Creating database session with URL: %s", engine.url.render_as_string(hide_password=True))
     Session = sessionmaker(bind=engine)
     session = Session()
-    print("Database session created successfully.")
+    logger.debug("Database session created successfully.")
     return session
 
 
@@ -40,28 +40,9 @@ def connect_to_database(engine):
     """Tenta conectar ao banco de dados."""
     try:
         engine.connect()
-        print("Conexão com o banco de dados estabelecida com sucesso.")
+        logger.info("Conexão com o banco de dados estabelecida com sucesso.")
     except Exception as e:
-        print(f"Erro ao conectar ao banco de dados: {e}")
-
-
-def configure_django():
-    """Configura o Django, caso ainda não esteja configurado."""
-    if not django_settings.configured:
-        print("Configuring Django settings...")
-        django_settings.configure(
-            TEMPLATES=[
-                {
-                    "BACKEND": "django.template.backends.django.DjangoTemplates",
-                    "DIRS": [os.path.join(os.path.dirname(__file__), "templates")],
-                    "APP_DIRS": True,
-                    "OPTIONS": {"context_processors": []},
-                }
-            ],
-            INSTALLED_APPS=[],
-        )
-        django.setup()
-        print("Django configured successfully.")
+        logger.error("Erro ao conectar ao banco de dados: %s", e)
 
 
 def _get_data_rel(data_input: date | None) -> List[date]:
@@ -76,83 +57,125 @@ def _get_data_rel(data_input: date | None) -> List[date]:
         data_rel = date.today() - timedelta(days=1)
         dias = [data_rel - timedelta(days=i) for i in range(7)]
         dias.reverse()
-        print(f"Lista de datas para consulta: {dias}")
+        logger.debug("Lista de datas para consulta: %s", dias)
         return dias
 
 
-def get_saldos(session, data_rel: List[date]) -> List[Dict[str, date | str | float]]:
+def _filtro_datas(coluna, data_rel: List[date]):
+    """
+    Filtra a coluna DATE por intervalo, sem cast, para aproveitar os índices por data.
+    Se as datas não forem contíguas, restringe também à lista exata.
     """
-    Consulta e retorna todos os campos de 'FluxoSaldos' do banco de dados para as datas fornecidas.
+    from sqlalchemy import and_
+
+    inicio, fim = min(data_rel), max(data_rel)
+    filtro = and_(coluna >= inicio, coluna < fim + timedelta(days=1))
+    if len(set(data_rel)) < (fim - inicio).days + 1:
+        filtro = and_(filtro, coluna.in_(data_rel))
+    return filtro
+
+
+def _tipos_colunas(tabela) -> Dict[str, str | pd.CategoricalDtype]:
+    """Tipos do pandas para as colunas numéricas e para a coluna 'tipo' da tabela, conforme o esquema gerenciado.
+    A coluna 'tipo' tem categorias fixas: com categorias inferidas de cada lote, lotes com valores
+    diferentes fariam o `pd.concat` voltar a coluna para object."""
+    from sqlalchemy import BigInteger, Float, SmallInteger
+
+    import esquema
+
+    tipos = {}
+    for coluna in tabela.columns:
+        if isinstance(coluna.type, Float):
+            tipos[coluna.name] = "float64"
+        elif isinstance(coluna.type, BigInteger):
+            tipos[coluna.name] = "int64"
+        elif isinstance(coluna.type, SmallInteger):
+            tipos[coluna.name] = "Int16"
+        elif coluna.name == "tipo":
+            tipos[coluna.name] = pd.CategoricalDtype(esquema.TIPOS)
+    return tipos
+
+
+def _ler_tabela(
+    session, nome_tabela: str, data_rel: List[date], chunksize: int = TAMANHO_LOTE
+) -> pd.DataFrame:
     """
-    # Garantir que data_rel é uma lista
+    Lê as linhas da tabela do esquema gerenciado para as datas fornecidas direto em um
+    DataFrame tipado, com cursor no servidor e leitura em lotes de `chunksize` linhas.
+    """
+    from sqlalchemy import select
+
+    import esquema
+
     if not isinstance(data_rel, list):
         raise ValueError("data_rel deve ser uma lista de objetos datetime.date")
 
-    print("Fetching all columns from FluxoSaldos...")
-    saldos = (
-        session.query(FluxoSaldos)
-        .filter(cast(FluxoSaldos.data, Date).in_(data_rel))
-        .all()
+    tabela = esquema.metadata.tables[nome_tabela]
+
+    logger.debug("Fetching all columns from %s...", tabela.name)
+    consulta = (
+        select(tabela)
+        .where(_filtro_datas(tabela.c.data, data_rel))
+        .execution_options(stream_results=True)
     )
+    with instrumentacao().etapa("ler_tabela", tabela=tabela.name) as etapa:
+        lotes = pd.read_sql(
+            consulta,
+            session.connection(),
+            parse_dates=["data"],
+            dtype=_tipos_colunas(tabela),
+            chunksize=chunksize,
+        )
+        dados = pd.concat(lotes, ignore_index=True)
+        etapa.linhas_saida = len(dados)
+    return dados
 
-    return [
-        {col.name: getattr(saldo, col.name) for col in FluxoSaldos.__table__.columns}
-        for saldo in saldos
-    ]
 
-def get_lancamentos(
-    session, data_rel: List[date]
-) -> List[Dict[str, date | str | float]]:
+def get_saldos(session, data_rel: List[date]) -> pd.DataFrame:
     """
-    Consulta e retorna todos os campos de 'FluxoLancamentos' do banco de dados para as datas fornecidas.
+    Consulta e retorna todos os campos de 'fluxo_saldos' do banco de dados para as datas fornecidas.
     """
-    if not isinstance(data_rel, list):
-        raise ValueError("data_rel deve ser uma lista de objetos datetime.date")
+    return _ler_tabela(session, "fluxo_saldos", data_rel)
 
-    print("Fetching all columns from FluxoLancamentos...")
-    lancamentos = (
-        session.query(FluxoLancamentos)
-        .filter(cast(FluxoLancamentos.data, Date).in_(data_rel))
-        .all()
-    )
 
-    return [
-        {
-            col.name: getattr(lancamento, col.name)
-            for col in FluxoLancamentos.__table__.columns
-        }
-        for lancamento in lancamentos
-    ]
+def get_investimentos(session, data_rel: List[date]) -> pd.DataFrame:
+    """
+    Consulta e retorna todos os campos de 'fluxo_investimentos' do banco de dados para as datas fornecidas.
+    """
+    return _ler_tabela(session, "fluxo_investimentos", data_rel)
 
-def get_investimentos(
-    session, data_rel: List[date]
-) -> List[Dict[str, date | str | float]]:
+def get_resumo_banco_tipo(session, data_rel: List[date]) -> pd.DataFrame:
     """
-    Consulta e retorna todos os campos de 'FluxoInvestimentos' do banco de dados para as datas fornecidas.
+    Consulta os totais diários de lançamentos por banco e tipo (Entrada/Saída) para as datas fornecidas.
     """
-    if not isinstance(data_rel, list):
-        raise ValueError("data_rel deve ser uma lista de objetos datetime.date")
+    return _ler_tabela(session, "fluxo_resumo_banco_tipo", data_rel)
 
-    print("Fetching all columns from FluxoInvestimentos...")
-    investimentos = (
-        session.query(FluxoInvestimentos)
-        .filter(cast(FluxoInvestimentos.data, Date).in_(data_rel))
-        .all()
-    )
 
-    return [
-        {
-            col.name: getattr(investimento, col.name)
-            for col in FluxoInvestimentos.__table__.columns
-        }
-        for investimento in investimentos
-    ]
+def get_resumo_compromisso(session, data_rel: List[date]) -> pd.DataFrame:
+    """
+    Consulta os totais diários de lançamentos por compromisso para as datas fornecidas.
+    """
+    return _ler_tabela(session, "fluxo_resumo_compromisso", data_rel)
+
+def _separar_por_datas(tabela: pd.DataFrame, datas: List[date]) -> pd.DataFrame:
+    """Retorna as linhas da tabela cujas datas estão na lista, com um índice novo."""
+    if tabela.empty:
+        return tabela.copy()
+    return tabela[tabela["data"].isin(pd.to_datetime(datas))].reset_index(drop=True)
+
+def _datas_grafico(data: date) -> List[date]:
+    """Datas do gráfico do painel de um dia: o próprio dia e os seis anteriores."""
+    return [data - timedelta(days=i) for i in range(7)]
 
 def fetch_data(
     session, data_input: date | None
-) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-    """Obtém todos os dados de saldos, lançamentos e investimentos do banco de dados."""
-    print("Fetching all data from database...")
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Obtém saldos, investimentos e os totais diários de lançamentos do banco de dados.
+    Os lançamentos vêm das tabelas de resumo gravadas na carga: por compromisso (painel e
+    gráfico) e por banco e tipo (fluxo de caixa por banco).
+    """
+    logger.info("Fetching all data from database...")
 
     # Obtendo uma lista de datas, sempre garantindo que é uma lista
     data_rel = _get_data_rel(data_input)
@@ -161,136 +184,58 @@ def fetch_data(
     if not isinstance(data_rel, list):
         raise ValueError("data_rel deve ser uma lista de objetos datetime.date")
     
-    saldos = pd.DataFrame(get_saldos(session, data_rel))
-    lancamentos = pd.DataFrame(get_lancamentos(session, data_rel))
-    investimentos = pd.DataFrame(get_investimentos(session, data_rel))
-
-    print(len(data_rel))
-    
     if len(data_rel) == 1:
-        datas = [(data_input - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(7)]
-        print(f"Datas do grafico: {datas}")
-        lancamentos_grafico = pd.DataFrame(get_lancamentos(session, datas))
+        datas_grafico = _datas_grafico(data_input)
     else:
-        lancamentos_grafico = pd.DataFrame(get_lancamentos(session, data_rel))
-        
-    return saldos, lancamentos, investimentos, lancamentos_grafico
-
-def DAX_entradas_liquidas(lancamentos: pd.DataFrame) -> float:
+        datas_grafico = data_rel
+    logger.debug("Datas do grafico: %s", datas_grafico)
+
+    # Uma única consulta por tabela: os lançamentos cobrem a união das datas do
+    # painel e do gráfico e são separados em memória
+    janela = sorted(set(data_rel) | set(datas_grafico))
+    with instrumentacao().etapa("fetch_data") as etapa:
+        saldos = get_saldos(session, data_rel)
+        lancamentos_janela = get_resumo_compromisso(session, janela)
+        investimentos = get_investimentos(session, data_rel)
+        lancamentos_banco = get_resumo_banco_tipo(session, data_rel)
+
+        lancamentos = _separar_por_datas(lancamentos_janela, data_rel)
+        lancamentos_grafico = _separar_por_datas(lancamentos_janela, datas_grafico)
+        etapa.linhas_saida = len(saldos) + len(lancamentos_janela) + len(investimentos) + len(lancamentos_banco)
+
+    return saldos, lancamentos, investimentos, lancamentos_grafico, lancamentos_banco
+
+def fetch_data_periodo(
+    session, inicio: date, fim: date
+) -> Iterator[tuple[date, tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]]]:
     """
-    Calcula as entradas líquidas com base em tipos de compromisso
-    presentes na lista de entradas, sem usar 'isin'.
+    Obtém de uma vez os dados dos painéis diários de `inicio` a `fim` e os separa em memória,
+    devolvendo, para cada data, os mesmos DataFrames que `fetch_data(session, data)`.
     """
-    lancamentos["tipos_de_compromisso"] = lancamentos["tipos_de_compromisso"].astype(
-        str
-    )
-    entradas_a = lancamentos[
-        (
-            lancamentos["tipos_de_compromisso"]
-            .astype(int)
-            .isin(map(int, listas.entradas))
+    if fim < inicio:
+        raise ValueError("A data final deve ser igual ou posterior à data inicial")
+
+    datas = [inicio + timedelta(days=i) for i in range((fim - inicio).days + 1)]
+    logger.info("Fetching data from %s to %s (%d panels)...", inicio, fim, len(datas))
+
+    # Uma consulta por tabela para todo o período; os lançamentos cobrem também os
+    # seis dias anteriores ao início, usados no gráfico
+    janela = sorted({dia for data in datas for dia in _datas_grafico(data)})
+    with instrumentacao().etapa("fetch_data_periodo") as etapa:
+        saldos = get_saldos(session, datas)
+        lancamentos_janela = get_resumo_compromisso(session, janela)
+        investimentos = get_investimentos(session, datas)
+        lancamentos_banco = get_resumo_banco_tipo(session, datas)
+        etapa.linhas_saida = len(saldos) + len(lancamentos_janela) + len(investimentos) + len(lancamentos_banco)
+
+    for data in datas:
+        yield data, (
+            _separar_por_datas(saldos, [data]),
+            _separar_por_datas(lancamentos_janela, [data]),
+            _separar_por_datas(investimentos, [data]),
+            _separar_por_datas(lancamentos_janela, _datas_grafico(data)),
+            _separar_por_datas(lancamentos_banco, [data]),
         )
-        & (
-            ~lancamentos["tipos_de_compromisso"]
-            .astype(int)
-            .isin(map(int, ["11", "08", "09"]))
-        )
-    ]
-    entradas_liquidas = entradas_a["valores"].sum()
-    entradas_liquidas = round(entradas_liquidas, 2)
-
-    return entradas_liquidas
-
-def DAX_saidas_liquidas(lancamentos: pd.DataFrame) -> float:
-    """Calcula as entradas líquidas."""
-    saidas_a = lancamentos[
-        (lancamentos["tipos_de_compromisso"].astype(int).isin(map(int, listas.saidas)))
-        & (
-            ~lancamentos["tipos_de_compromisso"]
-            .astype(int)
-            .isin(map(int, ["94", "98", "97"]))
-        )
-    ]
-    saidas_liquidas = saidas_a["valores"].sum()
-    saidas_liquidas.astype(float)
-    saidas_liquidas = round(saidas_liquidas, 2)
-    return saidas_liquidas
-
-def DAX_saldo_inicial(saldos: pd.DataFrame) -> float:
-    """Calcula o saldo inicial."""
-    min_data = saldos["data"].min()
-    filtro = (saldos["data"] == min_data) & (
-        saldos["saldo_final_inicial"].str.upper() == "SALDO INICIAL"
-    )
-    saldo_inicial = saldos.loc[filtro, "valor_saldo_final_inicial"].sum()
-    saldo_inicial = round(saldo_inicial, 2)
-    return saldo_inicial
-
-def DAX_saldo_final(saldos: pd.DataFrame) -> float:
-    """Calcula o saldo final."""
-    max_data = saldos["data"].max()
-    filtro = (saldos["data"] == max_data) & (
-        saldos["saldo_final_inicial"].str.upper() == "SALDO FINAL"
-    )
-    saldo_final = saldos.loc[filtro, "valor_saldo_final_inicial"].sum()
-    saldo_final = round(saldo_final, 2)
-    return saldo_final
-
-def DAX_entradas_saidas(lancamentos: pd.DataFrame) -> float:
-    # entradas_liquidas = DAX_entradas_liquidas(lancamentos)
-    # saidas_liquidas = DAX_saidas_liquidas(lancamentos)
-    # entradas_saidas = round(entradas_saidas, 2)
-    entradas = lancamentos[
-        (
-            lancamentos["tipos_de_compromisso"]
-            .astype(int)
-            .isin(map(int, listas.entradas))
-        )
-    ]
-    entradas = entradas.groupby("banco")["valores"].sum().round(2)
-
-    # Cálculo das Saídas
-    saidas = lancamentos[
-        (lancamentos["tipos_de_compromisso"].astype(int).isin(map(int, listas.saidas)))
-    ]
-    saidas = saidas.groupby("banco")["valores"].sum().round(2)
-    entradas_liquidas = entradas.astype(float).sum()
-    saidas_liquidas = saidas.astype(float).sum()
-    entradas_saidas = entradas_liquidas - saidas_liquidas
-    return entradas_saidas
-
-def DAX_resgate_aplicacao(investimentos: pd.DataFrame) -> float:
-    """Calcula o resgate de aplicação."""
-    resgate = investimentos["resgate"].sum()
-    aplicacao = investimentos["aplicacao"].sum()
-    resgate_aplicacao = resgate - aplicacao
-    resgate_aplicacao = round(resgate_aplicacao, 2)
-    return resgate_aplicacao
-
-def DAX_saldo_aplicado(investimentos: pd.DataFrame) -> float:
-    """Calcula o saldo aplicado."""
-    max_data = investimentos["data"].max()
-    filtro = (investimentos["data"] == max_data) & (investimentos["saldo_atual"])
-    saldo_aplicado = investimentos.loc[filtro, "saldo_atual"].sum()
-    saldo_aplicado = round(saldo_aplicado, 2)
-    return saldo_aplicado
-
-def DAX_saldo_total(saldos: pd.DataFrame, investimentos: pd.DataFrame) -> float:
-    """Calcula o saldo total."""
-    saldo_final = DAX_saldo_final(saldos)
-    saldo_aplicado = DAX_saldo_aplicado(investimentos)
-    saldo_total = saldo_final + saldo_aplicado
-    saldo_total = round(saldo_total, 2)
-    return saldo_total
-
-def DAX_saldo_bloqueado(investimentos: pd.DataFrame) -> float:
-    """Calcula o saldo bloqueado."""
-    max_data = investimentos["data"].max()
-
-    filtro = (investimentos["data"] == max_data) & (investimentos["saldo_bloqueado"])
-    saldo_bloqueado = investimentos["saldo_bloqueado"].sum()
-    saldo_bloqueado = round(saldo_bloqueado, 2)
-    return saldo_bloqueado
 
 def data_box(data_rel: List[date] | None) -> str:
     """Retorna a data do relatório."""
@@ -299,269 +244,49 @@ def data_box(data_rel: List[date] | None) -> str:
         return data_rel.strftime("%d/%m/%Y")
 
     data = data_rel.strftime("%d/%m/%Y")
-    print(f"Data do relatório: {data}")
+    logger.debug("Data do relatório: %s", data)
     return data
 
-def tabela_saldo_investimentos_atual(investimentos: pd.DataFrame) -> dict:
-
-    max_data = investimentos["data"].max()
-    # Filtrar o DataFrame para a última data
-    filtro = investimentos["data"] == max_data
-    # Selecionar as colunas 'banco', 'data' e 'saldo_atual'
-    saldo_atual = investimentos.loc[filtro, ["banco", "data", "saldo_atual"]]
-    # Arredondar os valores de saldo_atual
-    saldo_atual = saldo_atual.drop(saldo_atual[saldo_atual["saldo_atual"] == 0].index)
-    saldo_atual = saldo_atual.groupby("banco", as_index=False).agg(
-        {"saldo_atual": "sum", "data": "first"}
-    )
-    saldo_atual = saldo_atual.sort_values(by="saldo_atual", ascending=False).round(2)
-    saldo_atual = saldo_atual.to_dict(orient="records")
-
-    return saldo_atual
-
-def tabela_saldo_investimentos_bloqueado(investimentos: pd.DataFrame) -> dict:
-    max_data = investimentos["data"].max()
-    # Filtrar o DataFrame para a última data
-    filtro = investimentos["data"] == max_data
-    # Selecionar as colunas 'banco', 'data' e 'saldo_bloqueado'
-    saldo_bloqueado = investimentos.loc[filtro, ["banco", "data", "saldo_bloqueado"]]
-    # Arredondar os valores de saldo_bloqueado
-    saldo_bloqueado["saldo_bloqueado"] = saldo_bloqueado["saldo_bloqueado"].round(2)
-    saldo_bloqueado = saldo_bloqueado.drop(
-        saldo_bloqueado[saldo_bloqueado["saldo_bloqueado"] == 0].index
-    )
-    saldo_bloqueado = saldo_bloqueado.groupby("banco", as_index=False).agg(
-        {"saldo_bloqueado": "sum", "data": "first"}
-    )
-    saldo_bloqueado = saldo_bloqueado.sort_values(by="saldo_bloqueado", ascending=False)
-    saldo_bloqueado = saldo_bloqueado.to_dict(orient="records")
-
-    return saldo_bloqueado
-
-def tabela_saldo_disponivel(saldos: pd.DataFrame, investimentos: pd.DataFrame) -> dict:
-
-    max_data = saldos["data"].max()
-
-    # Filtrar saldos pela data máxima e onde saldo_final_inicial for "SALDO FINAL"
-    filtro_saldo = (saldos["data"] == max_data) & (
-        saldos["saldo_final_inicial"].astype(str).str.upper() == "SALDO FINAL"
+def _anotar_compromissos(lancamentos_grafico: pd.DataFrame) -> pd.DataFrame:
+    """Acrescenta a descrição e o tipo da dimensão de compromissos, sem alterar o DataFrame recebido."""
+    indice = indice_compromissos()
+    codigos = lancamentos_grafico["tipos_de_compromisso"]
+    return lancamentos_grafico.assign(
+        tipos_de_compromisso=codigos.astype(int),
+        compromisso=indice.compromissos(codigos),
+        tipo=indice.tipos(codigos),
     )
 
-    # Filtrar investimentos pela data máxima
-    filtro_investimentos = investimentos["data"] == max_data
-
-    # Selecionar os saldos e investimentos filtrados
-    saldos_filtrados = saldos.loc[filtro_saldo, ["banco", "valor_saldo_final_inicial"]]
-    investimentos_filtrados = investimentos.loc[
-        filtro_investimentos, ["banco", "saldo_disponivel"]
+def _totais_grafico(lancamentos_grafico: pd.DataFrame, tipo: str, excluidos: list) -> pd.DataFrame:
+    """Totais por compromisso e data do tipo informado. Recebe os lançamentos já anotados
+    por `_anotar_compromissos`, feito uma única vez para as entradas e as saídas."""
+    # Filtrar os lançamentos do tipo, sem os compromissos excluídos
+    totais = lancamentos_grafico[
+        (lancamentos_grafico["tipo"] == tipo)
+        & (~lancamentos_grafico["tipos_de_compromisso"].isin(excluidos))
     ]
 
-    # Agrupar e somar os saldos e investimentos por banco
-    saldo_final_por_banco = (
-        saldos_filtrados.groupby("banco")["valor_saldo_final_inicial"]
-        .sum()
-        .reset_index()
-    )
-    saldo_disponivel_por_banco = (
-        investimentos_filtrados.groupby("banco")["saldo_disponivel"].sum().reset_index()
-    )
-
-    # Combinar os DataFrames de saldo final e saldo disponível por banco
-    saldo_total_por_banco = pd.merge(
-        saldo_final_por_banco, saldo_disponivel_por_banco, on="banco", how="outer"
-    ).fillna(0)
-
-    # Somar saldo final e saldo disponível para cada banco
-    saldo_total_por_banco["saldo_total"] = (
-        saldo_total_por_banco["valor_saldo_final_inicial"]
-        + saldo_total_por_banco["saldo_disponivel"]
-    )
-
-    # Converter para dicionário com banco como chave e saldo total como valor
-    saldo_disponivel = (
-        saldo_total_por_banco.set_index("banco")["saldo_total"]
-        .sort_values(ascending=False)
-        .round(2)
-        .to_dict()
-    )
-
-    return saldo_disponivel
-
-def tabela_entradas_tipo(lancamentos: pd.DataFrame) -> dict:
-    compromissos = dm.compromissos
-    
-    lancamentos["tipos_de_compromisso"] = lancamentos["tipos_de_compromisso"].astype(int)
-    compromissos["id_compromisso"] = compromissos["id_compromisso"].astype(int)
-    
-    lancamentos = lancamentos.merge(
-        compromissos[['id_compromisso', 'compromisso', 'tipo']],  # Colunas relevantes de compromissos
-        left_on="tipos_de_compromisso", 
-        right_on="id_compromisso", 
-        how="left"
-    )
-    entradas = lancamentos[lancamentos["tipo"] == "Entrada"]
-    entradas = (
-        entradas.groupby("compromisso")["valores"]
-        .sum()
-        .round(2)
-        .sort_values(ascending=False)
-    )
-    entradas = entradas.drop(entradas[entradas == 0].index)
-    entradas = entradas.to_dict()
-
-    return entradas
-
-def tabela_saidas_tipo(lancamentos: pd.DataFrame) -> dict:
-    compromissos = dm.compromissos
-    
-    lancamentos["tipos_de_compromisso"] = lancamentos["tipos_de_compromisso"].astype(int)
-    compromissos["id_compromisso"] = compromissos["id_compromisso"].astype(int)
-    
-    lancamentos = lancamentos.merge(
-        compromissos[['id_compromisso', 'compromisso', 'tipo']],  # Colunas relevantes de compromissos
-        left_on="tipos_de_compromisso", 
-        right_on="id_compromisso", 
-        how="left"
-    )
-    saidas_l = lancamentos[(lancamentos["tipo"] == "Saída")]
-    saidas_l = (
-        saidas_l.groupby("compromisso")["valores"]
-        .sum()
-        .round(2)
-        .sort_values(ascending=False)
-    )
-    saidas_l = saidas_l.drop(saidas_l[saidas_l == 0].index)
-    saidas_l = saidas_l.to_dict()
-
-    return saidas_l
-
-def tabela_fluxo_de_caixa(lancamentos: pd.DataFrame, saldos: pd.DataFrame) -> dict:
-    # Cálculo das Entradas
-
-    entradas = lancamentos[
-        (
-            lancamentos["tipos_de_compromisso"]
-            .astype(int)
-            .isin(map(int, listas.entradas))
-        )
-    ]
-    entradas = entradas.groupby("banco")["valores"].sum().round(2)
-
-    # Cálculo das Saídas
-    saidas = lancamentos[
-        (lancamentos["tipos_de_compromisso"].astype(int).isin(map(int, listas.saidas)))
-    ]
-    saidas = saidas.groupby("banco")["valores"].sum().round(2)
-
-    # Cálculo do Saldo Inicial
-    saldo_inicial = (
-        saldos[saldos["saldo_final_inicial"] == "SALDO INICIAL"]
-        .groupby("banco")["valor_saldo_final_inicial"]
-        .sum()
-        .round(2)
-    )
-
-    # Cálculo do Saldo Final
-    saldo_final = (
-        saldos[saldos["saldo_final_inicial"] == "SALDO FINAL"]
-        .groupby("banco")["valor_saldo_final_inicial"]
-        .sum()
-        .round(2)
-    )
-
-    # Monta o dicionário de fluxo de caixa para cada banco
-    fluxo_de_caixa_dict = {}
-
-    bancos = saldos["banco"].unique()
-
-    for banco in bancos:
-        fluxo_de_caixa_dict[banco] = {
-            "saldo_inicial": saldo_inicial.get(banco, 0),
-            "entradas": entradas.get(banco, 0),
-            "saidas": saidas.get(banco, 0),
-            "saldo_final": saldo_final.get(banco, 0),
-        }
-    
-    fluxo_de_caixa_ordenado = dict(
-    sorted(fluxo_de_caixa_dict.items(), key=lambda item: item[1]["entradas"], reverse=True)
-    )
-    
-     # Cálculo dos Totais
-    fluxo_de_caixa_ordenado["Totais"] = {
-        "saldo_inicial": saldo_inicial.sum(),
-        "entradas": entradas.sum(),
-        "saidas": saidas.sum(),
-        "saldo_final": saldo_final.sum(),
-    }
-
-    return fluxo_de_caixa_ordenado
-
-def _entradas_grafico(lancamentos_grafico: pd.DataFrame) -> pd.DataFrame:
-    compromissos = dm.compromissos
-    
-    # Certificar que 'tipos_de_compromisso' e 'id_compromisso' são inteiros
-    lancamentos_grafico["tipos_de_compromisso"] = lancamentos_grafico["tipos_de_compromisso"].astype(int)
-    compromissos["id_compromisso"] = compromissos["id_compromisso"].astype(int)
-    
-    # Mesclar o DataFrame 'lancamentos' com 'compromissos' para trazer a descrição do compromisso
-    lancamentos_grafico = lancamentos_grafico.merge(
-        compromissos[['id_compromisso', 'compromisso', 'tipo']],  # Colunas relevantes de compromissos
-        left_on="tipos_de_compromisso", 
-        right_on="id_compromisso", 
-        how="left"
-    )
-
-    # Filtrar as entradas_grafico (tipo "Entrada")
-    entradas_grafico = lancamentos_grafico[(lancamentos_grafico["tipo"] == "Entrada") & (~lancamentos_grafico["tipos_de_compromisso"].isin([11, 8, 9]))]
-
     # Agrupar por 'compromisso' e 'data', somar os valores, e ordenar
-    entradas_grafico = (
-        entradas_grafico.groupby(["compromisso", "data"])["valores"]
+    totais = (
+        totais.groupby(["compromisso", "data"])["valores"]
         .sum()
         .reset_index()  # Redefinir o índice para manter a estrutura de DataFrame
         .round(2)
         .sort_values(by="valores", ascending=False)
     )
 
-    # Remover as entradas_grafico com valor zero
-    entradas_grafico = entradas_grafico[entradas_grafico["valores"] != 0]
+    # Remover os totais com valor zero
+    return totais[totais["valores"] != 0]
 
-    return entradas_grafico
+def _entradas_grafico(lancamentos_grafico: pd.DataFrame) -> pd.DataFrame:
+    return _totais_grafico(lancamentos_grafico, "Entrada", EXCLUIDOS_ENTRADAS)
 
 def _saidas_grafico(lancamentos_grafico: pd.DataFrame) -> pd.DataFrame:
-    compromissos = dm.compromissos
-    
-    # Certificar que 'tipos_de_compromisso' e 'id_compromisso' são inteiros
-    lancamentos_grafico["tipos_de_compromisso"] = lancamentos_grafico["tipos_de_compromisso"].astype(int)
-    compromissos["id_compromisso"] = compromissos["id_compromisso"].astype(int)
-    
-    # Mesclar o DataFrame 'lancamentos' com 'compromissos' para trazer a descrição do compromisso
-    lancamentos_grafico = lancamentos_grafico.merge(
-        compromissos[['id_compromisso', 'compromisso', 'tipo']],  # Colunas relevantes de compromissos
-        left_on="tipos_de_compromisso", 
-        right_on="id_compromisso", 
-        how="left"
-    )
+    return _totais_grafico(lancamentos_grafico, "Saída", EXCLUIDOS_SAIDAS)
 
-    # Filtrar as saidas_grafico (tipo "Entrada")
-    saidas_grafico = lancamentos_grafico[(lancamentos_grafico["tipo"] == "Saída") & (~lancamentos_grafico["tipos_de_compromisso"].isin([94, 98, 97]))]
-
-    # Agrupar por 'compromisso' e 'data', somar os valores, e ordenar
-    saidas_grafico = (
-        saidas_grafico.groupby(["compromisso", "data"])["valores"]
-        .sum()
-        .reset_index()  # Redefinir o índice para manter a estrutura de DataFrame
-        .round(2)
-        .sort_values(by="valores", ascending=False)
-    )
-
-    # Remover as saidas_grafico com valor zero
-    saidas_grafico = saidas_grafico[saidas_grafico["valores"] != 0]
-
-    return saidas_grafico
-
-def grafico_entrdas_saidas_7dias(lancamentos_grafico: pd.DataFrame) -> str:
+def grafico_entrdas_saidas_7dias(lancamentos_grafico: pd.DataFrame, formato: str = "agg") -> str:
     # Gerar o gráfico conforme o código anterior
+    lancamentos_grafico = _anotar_compromissos(lancamentos_grafico)
     entradas = _entradas_grafico(lancamentos_grafico)
     saidas = _saidas_grafico(lancamentos_grafico)
     
@@ -576,218 +301,291 @@ def grafico_entrdas_saidas_7dias(lancamentos_grafico: pd.DataFrame) -> str:
     # Filtrar os últimos 7 dias
     entradas_saidas = entradas_saidas.sort_values(by="data", ascending=False).head(7).sort_values(by="data")
     
-    # Gerar o gráfico de barras
-    fig, ax = plt.subplots(figsize=(10, 6))
-    bars = ax.bar(entradas_saidas["data"], entradas_saidas["Entradas_Saidas"], 
-                  color=["blue" if x >= 0 else "orange" for x in entradas_saidas["Entradas_Saidas"]])
-    
-    for bar in bars:
-        yval = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2, yval, f'R$ {yval:,.2f}'.replace(",", "X").replace(".", ",").replace("X", "."),
-                ha='center', va='bottom' if yval >= 0 else 'top')
-
-    ax.set_title("Entradas e Saídas dos Últimos 7 Dias", fontsize=13)
-    ax.set_ylabel("Entradas - Saídas", fontsize=10)
-    ax.set_xlabel("Data", fontsize=10)
-    ax.grid(True, which='both', linestyle='--', linewidth=0.5, axis='y')
-    ax.set_axisbelow(True)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-
-    # Salvar o gráfico em memória como PNG
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png')
-    buffer.seek(0)
-    
-    # Converter o gráfico em string base64
-    image_png = buffer.getvalue()
-    buffer.close()
-    image_base64 = base64.b64encode(image_png).decode('utf-8')
-    
-    return image_base64
+    # Desenha o gráfico no formato escolhido e converte em string base64
+    imagem = desenhar_grafico(entradas_saidas["data"], entradas_saidas["Entradas_Saidas"], formato)
+    return base64.b64encode(imagem).decode("utf-8")
 
 def render_template(
-    dados: List[pd.DataFrame], template: django.template.Template, data_rel: date
+    dados: List[pd.DataFrame],
+    template: str | None,
+    data_rel: date,
+    grafico: str = "agg",
+    caminho_saida: str | None = None,
 ) -> str:
-    """Renderiza o template Django com os dados fornecidos."""
-    with open("templates/painel.html", "r", encoding="utf-8") as f:
-        template = django.template.Template(f.read())
-    print("Rendering template with data...")
-    configure_django()
-
-    saldos, lancamentos, investimentos, lancamentos_grafico = dados
-
-    print("Data rendered successfully.")
-
-    entradas_tipo = tabela_entradas_tipo(lancamentos)
-    entradas_total = sum(entradas_tipo.values())
-    
-    saidas_tipo = tabela_saidas_tipo(lancamentos)
-    saidas_total = sum(saidas_tipo.values())
-
-    saldo_disponivel = tabela_saldo_disponivel(saldos, investimentos)
-    saldo_disponivel_total = sum(saldo_disponivel.values())
-
-    saldo_bloqueado = tabela_saldo_investimentos_bloqueado(investimentos)
-    saldo_bloqueado_total = []
-    for saldo in saldo_bloqueado:
-        saldo_bloqueado_total.append(saldo["saldo_bloqueado"])
-    saldo_bloqueado_total = sum(saldo_bloqueado_total)
-    
-    saldo_atual = tabela_saldo_investimentos_atual(investimentos)
-    saldo_atual_total = []
-    for saldo in saldo_atual:
-        saldo_atual_total.append(saldo["saldo_atual"])
-    saldo_atual_total = sum(saldo_atual_total)
-    
-    contexto = django.template.Context(
-        {
-            "entradas_liquidas": formatar_float_brasileiro(DAX_entradas_liquidas(lancamentos)),
-            "saidas_liquidas": formatar_float_brasileiro(DAX_saidas_liquidas(lancamentos)),
-            "saldo_inicial": formatar_float_brasileiro(DAX_saldo_inicial(saldos)),
-            "saldo_final": formatar_float_brasileiro(DAX_saldo_final(saldos)),
-            "entradas_saidas": formatar_float_brasileiro(DAX_entradas_saidas(lancamentos)),
-            "resgate_aplicacao": formatar_float_brasileiro(DAX_resgate_aplicacao(investimentos)),
-            "saldo_aplicado": formatar_float_brasileiro(DAX_saldo_aplicado(investimentos)),
-            "saldo_total": formatar_float_brasileiro(DAX_saldo_total(saldos, investimentos)),
-            "saldo_bloqueado": formatar_float_brasileiro(DAX_saldo_bloqueado(investimentos)),
-            
-            "Data": data_box(data_rel),  # mudar comforme o dia do relatório
-            
-            "entradas_saidas_7dias": grafico_entrdas_saidas_7dias(lancamentos_grafico),  # grafico
-            
-            "saldo_investimentos_atual": formatar_float_brasileiro_dict(tabela_saldo_investimentos_atual(
-                investimentos
-            )),
-            "saldo_investimentos_bloqueado": formatar_float_brasileiro_dict(tabela_saldo_investimentos_bloqueado(
-                investimentos
-            )),
-            "saldo_disponivel": formatar_float_brasileiro_dict(saldo_disponivel),
-            "fluxo_de_caixa": formatar_float_brasileiro_dict_EXCLUSIVO(tabela_fluxo_de_caixa(lancamentos, saldos)),  # tabela
-            "entradas_tipo": formatar_float_brasileiro_dict(entradas_tipo),  # tabela
-            "saidas_tipo": formatar_float_brasileiro_dict(saidas_tipo),  # tabela
-            
-            "total_investimentos_atual":formatar_float_brasileiro(saldo_atual_total),
-            "total_investimentos_bloqueado":formatar_float_brasileiro(saldo_bloqueado_total),
-            "total_saldo_disponivel":formatar_float_brasileiro(saldo_disponivel_total),
-            # "total_fluxo_de_caixa":formatar_float_brasileiro_dict_EXCLUSIVO(tabela_fluxo_de_caixa(lancamentos, saldos)),
-            "total_entradas_tipo":formatar_float_brasileiro(entradas_total),
-            "total_saidas_tipo":formatar_float_brasileiro(saidas_total),
-        }
-    )
-    rendered_html = template.render(contexto)
-    print("Template rendered successfully.")
-    with open("templates/painel_rendered.html", "w", encoding="utf-8") as f:
-        f.write(rendered_html)
+    """
+    Renderiza o template Django (por padrão, `templates/painel.html`) com os dados fornecidos.
+    O template compilado fica em memória e só é recompilado quando o arquivo muda.
+    Com `caminho_saida`, uma cópia do HTML renderizado é gravada em disco.
+    """
+    logger.info("Rendering template with data...")
+
+    saldos, lancamentos, investimentos, lancamentos_grafico, lancamentos_banco = dados
+
+    registro = instrumentacao()
+    with registro.etapa("calcular_metricas") as etapa:
+        etapa.linhas_entrada = len(saldos) + len(lancamentos) + len(investimentos) + len(lancamentos_banco)
+        metricas = calcular_metricas(saldos, lancamentos, investimentos, lancamentos_banco)
+
+    with registro.etapa("grafico", formato=grafico) as etapa:
+        etapa.linhas_entrada = len(lancamentos_grafico)
+        imagem_grafico = grafico_entrdas_saidas_7dias(lancamentos_grafico, grafico)
+
+    # Os valores vão crus para o contexto: o template os formata com o filtro `|brl`
+    contexto = {
+        "entradas_liquidas": metricas.entradas_liquidas,
+        "saidas_liquidas": metricas.saidas_liquidas,
+        "saldo_inicial": metricas.saldo_inicial,
+        "saldo_final": metricas.saldo_final,
+        "entradas_saidas": metricas.entradas_saidas,
+        "resgate_aplicacao": metricas.resgate_aplicacao,
+        "saldo_aplicado": metricas.saldo_aplicado,
+        "saldo_total": metricas.saldo_total,
+        "saldo_bloqueado": metricas.saldo_bloqueado,
+        
+        "Data": data_box(data_rel),  # mudar comforme o dia do relatório
+        
+        "entradas_saidas_7dias": imagem_grafico,  # grafico
+        "entradas_saidas_7dias_mime": TIPOS_MIME[grafico],
+        
+        "saldo_investimentos_atual": metricas.saldo_investimentos_atual,
+        "saldo_investimentos_bloqueado": metricas.saldo_investimentos_bloqueado,
+        "saldo_disponivel": metricas.saldo_disponivel,
+        "fluxo_de_caixa": metricas.fluxo_de_caixa,  # tabela
+        "entradas_tipo": metricas.entradas_tipo,  # tabela
+        "saidas_tipo": metricas.saidas_tipo,  # tabela
+        
+        "total_investimentos_atual":metricas.total_investimentos_atual,
+        "total_investimentos_bloqueado":metricas.total_investimentos_bloqueado,
+        "total_saldo_disponivel":metricas.total_saldo_disponivel,
+        "total_entradas_tipo":metricas.total_entradas_tipo,
+        "total_saidas_tipo":metricas.total_saidas_tipo,
+    }
+    with registro.etapa("renderizar"):
+        rendered_html = renderizador_painel().renderizar(
+            contexto, template or TEMPLATE_PAINEL, caminho_saida
+        )
+    logger.debug("Template rendered successfully.")
     return rendered_html
 
 
-def send_email(destinatarios: List[str], html_content: str, cc: List[str] | None, data_input):
-    """Envia um email com o conteúdo HTML fornecido."""
-    print(f"Sending email to: {destinatarios}")
+def montar_email(destinatarios: List[str], html_content: str, cc: List[str] | None, data_input):
+    """Monta o email HTML do painel da data informada (ou de ontem)."""
+    from django.core.mail import EmailMessage
+
+    configure_django()
     if data_input == None:
         data_input = date.today() - timedelta(days=1)
     assunto = f"Painel de Fluxo de Caixa Diário: {data_input.strftime("%d/%m/%Y")}"
     email = EmailMessage(assunto, html_content, to=destinatarios,cc=cc)
     email.content_subtype = "html"
-    email.send()
-    print("Email enviado com sucesso.")
-
-
-# Definições de tabelas do banco de dados
-class FluxoSaldos(Base):
-    __tablename__ = "fluxo_saldos"
-    index = Column(Integer, primary_key=True)
-    saldo_final_inicial = Column(String)
-    data = Column(Date)
-    valor_saldo_final_inicial = Column(Float)
-    banco = Column(String)
-
-
-class FluxoLancamentos(Base):
-    __tablename__ = "fluxo_lancamentos"
-    index = Column(Integer, primary_key=True)
-    tipos_de_compromisso = Column(String)
-    data = Column(Date)
-    banco = Column(String)
-    valores = Column(Float)
-
-
-class FluxoInvestimentos(Base):
-    __tablename__ = "fluxo_investimentos"
-    index = Column(Integer, primary_key=True)
-    data = Column(Date)
-    banco = Column(String)
-    modalidade = Column(String)
-    aplicacao = Column(Float)
-    resgate = Column(Float)
-    rendimento_bruto = Column(Float)
-    rendimento_liquido = Column(Float)
-    saldo_atual = Column(Float)
-    rentabilidade = Column(Float)
-    # cdi = Column(Float)
-    rentabilidade_dia = Column(Float)
-    tipo_de_bloqueio = Column(String)
-    saldo_bloqueado = Column(Float)
-    saldo_disponivel = Column(Float)
+    return email
+
+
+def send_email(destinatarios: List[str], html_content: str, cc: List[str] | None, data_input):
+    """Envia um email com o conteúdo HTML fornecido, com novas tentativas em caso de falha."""
+    from envio_emails import enviar_mensagens
+
+    logger.info("Sending email to: %s", destinatarios)
+    with instrumentacao().etapa("enviar_email") as etapa:
+        etapa.linhas_entrada = 1
+        resultado = enviar_mensagens([montar_email(destinatarios, html_content, cc, data_input)])[0]
+    if resultado.erro is not None:
+        raise resultado.erro
+    logger.info("Email enviado com sucesso (%.0f ms).", resultado.latencia * 1000)
 
 
 # Execução do painel
-def execute_panel(database_url: str, destinatarios: List[str], data_input: date | None, cc: List[str] | None = None):
+def execute_panel(
+    database_url: str,
+    destinatarios: List[str],
+    data_input: date | None,
+    cc: List[str] | None = None,
+    grafico: str = "agg",
+    template: str | None = None,
+    caminho_saida: str | None = None,
+):
     """Executa o processo completo de obter dados, renderizar template e enviar email."""
-    print("Executing panel process...")
+    logger.info("Executing panel process...")
     session = create_database_session(database_url)
     dados = fetch_data(session, data_input)
-    template = "templates/painel_rendered.html"
 
-    html_content = render_template(dados, template, data_input)
+    with instrumentacao().etapa("painel", data=str(data_input)):
+        html_content = render_template(dados, template, data_input, grafico, caminho_saida)
 
     # Envia email
     send_email(destinatarios, html_content, cc, data_input)
-    print("Panel process executed successfully.")
-
-def formatar_float_brasileiro(valor: float) -> str:
-    # Formatar o número como string com duas casas decimais e substituindo '.' por ','
-    return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
+    logger.info("Panel process executed successfully.")
+
+def execute_panel_periodo(
+    database_url: str,
+    inicio: date,
+    fim: date,
+    pasta_saida: str | None = None,
+    destinatarios: List[str] | None = None,
+    cc: List[str] | None = None,
+    grafico: str = "agg",
+    template: str | None = None,
+    trabalhadores_email: int = 4,
+) -> Dict[date, str]:
+    """
+    Gera os painéis diários de `inicio` a `fim` em um único processo: uma sessão, uma consulta
+    por tabela e o template compilado uma vez. Cada painel é gravado em `pasta_saida`
+    (painel_AAAA-MM-DD.html) e/ou enfileirado e enviado a `destinatarios` após a renderização
+    de todos, por até `trabalhadores_email` conexões SMTP reaproveitadas. Retorna o HTML de cada data.
+    """
+    logger.info("Executing panel backfill...")
+    if pasta_saida is not None:
+        os.makedirs(pasta_saida, exist_ok=True)
 
-def formatar_float_brasileiro_dict_EXCLUSIVO(dados: Union[Dict[str, Dict[str, float]], List[Dict[str, Any]]]) -> Union[Dict[str, Dict[str, str]], List[Dict[str, Any]]]:
-    # Caso a entrada seja uma lista de dicionários
-    if isinstance(dados, list):
-        for registro in dados:
-            for chave, valor in registro.items():
-                if isinstance(valor, float):
-                    registro[chave] = f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    session = create_database_session(database_url)
+    paineis = {}
+    for data, dados in fetch_data_periodo(session, inicio, fim):
+        caminho_saida = (
+            os.path.join(pasta_saida, f"painel_{data:%Y-%m-%d}.html") if pasta_saida else None
+        )
+        with instrumentacao().etapa("painel", data=str(data)):
+            paineis[data] = render_template(dados, template, data, grafico, caminho_saida)
+    session.close()
+
+    if destinatarios:
+        from envio_emails import enviar_mensagens, informar_envio
+
+        mensagens = [
+            montar_email(destinatarios, html_content, cc, data) for data, html_content in paineis.items()
+        ]
+        logger.info("Sending %d emails to: %s", len(mensagens), destinatarios)
+        with instrumentacao().etapa("enviar_emails") as etapa:
+            etapa.linhas_entrada = len(mensagens)
+            resultados = enviar_mensagens(mensagens, trabalhadores_email)
+            etapa.linhas_saida = sum(1 for resultado in resultados if resultado.erro is None)
+        informar_envio(resultados)
+    logger.info("Panel backfill executed successfully: %d panels.", len(paineis))
+    return paineis
+
+def _argumentos() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Envia o painel do Fluxo de Caixa Diário por email.")
+    parser.add_argument(
+        "--grafico",
+        choices=FORMATOS,
+        default="agg",
+        help="Desenha o gráfico em PNG com o matplotlib (agg) ou em SVG sem o matplotlib (svg) (padrão: agg).",
+    )
+    parser.add_argument(
+        "--template",
+        default=None,
+        help="Template Django usado no painel (padrão: templates/painel.html).",
+    )
+    parser.add_argument(
+        "--salvar-html",
+        nargs="?",
+        const="templates/painel_rendered.html",
+        default=None,
+        metavar="CAMINHO",
+        help="Grava uma cópia do HTML renderizado (padrão do caminho: templates/painel_rendered.html).",
+    )
+    parser.add_argument(
+        "--log-nivel",
+        choices=NIVEIS_LOG,
+        default="INFO",
+        help="Nível das mensagens de log; DEBUG inclui o tempo de cada etapa (padrão: INFO).",
+    )
+    parser.add_argument(
+        "--pasta-metricas",
+        default=PASTA_METRICAS,
+        help="Pasta dos arquivos de métricas da execução, metricas_enviar_painel.json e .prom "
+        "(padrão: estado_fluxo).",
+    )
+    parser.add_argument(
+        "--rastrear-alocacoes",
+        action="store_true",
+        help="Registra também o pico de alocações de cada etapa com o tracemalloc (deixa a execução mais lenta).",
+    )
+    periodo = parser.add_argument_group(
+        "modo em lote", "Gera, sem perguntas, um painel por dia de --inicio a --fim."
+    )
+    periodo.add_argument(
+        "--inicio", type=_data_argumento, metavar="DD-MM-YYYY", help="Primeira data do período."
+    )
+    periodo.add_argument(
+        "--fim",
+        type=_data_argumento,
+        metavar="DD-MM-YYYY",
+        help="Última data do período (padrão: ontem).",
+    )
+    periodo.add_argument(
+        "--pasta-saida",
+        default=None,
+        help="Pasta onde os painéis são gravados (padrão: paineis, se não houver --enviar-para).",
+    )
+    periodo.add_argument(
+        "--enviar-para",
+        nargs="+",
+        default=None,
+        metavar="EMAIL",
+        help="Envia cada painel a estes destinatários após a renderização de todos.",
+    )
+    periodo.add_argument(
+        "--cc", nargs="+", default=None, metavar="EMAIL", help="Cópia dos emails do modo em lote."
+    )
+    periodo.add_argument(
+        "--trabalhadores-email",
+        type=int,
+        default=4,
+        help="Conexões SMTP simultâneas usadas no envio em lote (padrão: 4).",
+    )
+    args = parser.parse_args()
+    if args.fim is not None and args.inicio is None:
+        parser.error("--fim exige --inicio")
+    return args
 
-    # Caso a entrada seja um dicionário aninhado
-    elif isinstance(dados, dict):
-        for banco, valores in dados.items():
-            if isinstance(valores, dict):
-                for chave, valor in valores.items():
-                    if isinstance(valor, float):
-                        valores[chave] = f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
-    return dados
+def _data_argumento(texto: str) -> date:
+    try:
+        return datetime.strptime(texto, "%d-%m-%Y").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida: {texto} (use DD-MM-YYYY)")
+
+
+def _executar_periodo(args: argparse.Namespace) -> None:
+    fim = args.fim or date.today() - timedelta(days=1)
+    pasta_saida = args.pasta_saida
+    if pasta_saida is None and not args.enviar_para:
+        pasta_saida = "paineis"
+    inicio_execucao = datetime.now()
+    execute_panel_periodo(
+        database_url=pg.connurl,
+        inicio=args.inicio,
+        fim=fim,
+        pasta_saida=pasta_saida,
+        destinatarios=args.enviar_para,
+        cc=args.cc,
+        grafico=args.grafico,
+        template=args.template,
+        trabalhadores_email=args.trabalhadores_email,
+    )
+    logger.info("Tempo total: %.1f s", (datetime.now() - inicio_execucao).total_seconds())
 
-def formatar_float_brasileiro_dict(dados: Dict[Any, float]) -> Dict[Any, str]:
-    if isinstance(dados, list):
-        for registro in dados:
-            for chave, valor in registro.items():
-                if isinstance(valor, float):
-                    registro[chave] = f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    
-    # Caso a entrada seja um dicionário simples (ex: {banco: saldo_total})
-    elif isinstance(dados, dict):
-        for chave, valor in dados.items():
-            if isinstance(valor, float):
-                dados[chave] = f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    
-    return dados
 
 def main():
+    args = _argumentos()
+    configurar_logging(args.log_nivel)
+    instrumentacao().reiniciar(args.rastrear_alocacoes)
+
+    from pyfiglet import figlet_format
 
     print(f"{figlet_format("Cashflow\nPanel\nSender",font='slant')}\nby Pedro\n")
 
+    try:
+        _executar(args)
+    finally:
+        instrumentacao().exportar("enviar_painel", args.pasta_metricas)
+
+
+def _executar(args: argparse.Namespace) -> None:
+    if args.inicio is not None:
+        _executar_periodo(args)
+        return
+
     dest = input("Deseja enviar para o chefe ?(S/N)\n").strip().upper()
     
     if dest == "S":    
@@ -816,10 +614,18 @@ def main():
         data_input = None
 
 
-    print(f"Data de referência: {data_input}")
-    print("Starting main process...")
-    execute_panel(database_url=pg.connurl, destinatarios=destinatarios, data_input=data_input, cc=cc)
-    print("Main process finished.")
+    logger.info("Data de referência: %s", data_input)
+    logger.info("Starting main process...")
+    execute_panel(
+        database_url=pg.connurl,
+        destinatarios=destinatarios,
+        data_input=data_input,
+        cc=cc,
+        grafico=args.grafico,
+        template=args.template,
+        caminho_saida=args.salvar_html,
+    )
+    logger.info("Main process finished.")
 
 
 if __name__ == "__main__":
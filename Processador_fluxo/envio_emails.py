@@ -0,0 +1,148 @@
+import logging
+import smtplib
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# Falhas de SMTP ou de rede tratadas no envio; só as transitórias (ver _transitorio) são tentadas de novo
+ERROS_SMTP = (smtplib.SMTPException, OSError)
+
+
+@dataclass(frozen=True)
+class ResultadoEnvio:
+    """Resultado do envio de uma mensagem: tentativas usadas, latência (s) e o erro da última tentativa."""
+
+    assunto: str
+    destinatarios: list
+    tentativas: int
+    latencia: float
+    erro: Exception | None = None
+
+
+def _fechar(conexao) -> None:
+    if conexao is None:
+        return
+    try:
+        conexao.close()
+    except ERROS_SMTP:
+        pass
+
+
+def _transitorio(erro: Exception, enviando: bool) -> bool:
+    """Indica se vale reabrir a conexão e tentar de novo: falhas ao abrir a conexão e respostas 4xx.
+    Respostas 5xx são definitivas. Quedas da conexão e erros de rede durante o envio não são repetidos,
+    pois o servidor pode já ter aceitado a mensagem e uma nova tentativa enviaria o painel duas vezes."""
+    if isinstance(erro, smtplib.SMTPConnectError):
+        return True
+    if isinstance(erro, smtplib.SMTPServerDisconnected):
+        return not enviando
+    if isinstance(erro, smtplib.SMTPResponseException):
+        return 400 <= erro.smtp_code < 500
+    if isinstance(erro, smtplib.SMTPRecipientsRefused):
+        return all(400 <= codigo < 500 for codigo, _ in erro.recipients.values())
+    if isinstance(erro, smtplib.SMTPException):
+        return False
+    return not enviando
+
+
+def _enviar_lote(lote: list, tentativas: int, espera_inicial: float) -> list:
+    """Envia as mensagens do lote em sequência por uma única conexão SMTP, reaberta só após falhas.
+    Falhas transitórias são tentadas de novo; as definitivas encerram as tentativas da mensagem.
+    Retorna (posição, ResultadoEnvio) de cada mensagem."""
+    from django.core.mail import get_connection
+
+    resultados = []
+    conexao = None
+    try:
+        for posicao, mensagem in lote:
+            inicio = time.perf_counter()
+            erro = None
+            for tentativa in range(1, tentativas + 1):
+                enviando = False
+                try:
+                    if conexao is None:
+                        conexao = get_connection()
+                        conexao.open()
+                    enviando = True
+                    conexao.send_messages([mensagem])
+                    erro = None
+                    break
+                except ERROS_SMTP as e:
+                    erro = e
+                    # A conexão pode ter caído: é descartada e reaberta na próxima tentativa ou mensagem
+                    _fechar(conexao)
+                    conexao = None
+                    if not _transitorio(e, enviando):
+                        break
+                    if tentativa < tentativas:
+                        time.sleep(espera_inicial * 2 ** (tentativa - 1))
+            resultados.append(
+                (
+                    posicao,
+                    ResultadoEnvio(
+                        mensagem.subject,
+                        mensagem.recipients(),
+                        tentativa,
+                        time.perf_counter() - inicio,
+                        erro,
+                    ),
+                )
+            )
+    finally:
+        _fechar(conexao)
+    return resultados
+
+
+def enviar_mensagens(
+    mensagens: list,
+    trabalhadores: int = 4,
+    tentativas: int = 3,
+    espera_inicial: float = 1.0,
+) -> list:
+    """
+    Envia as mensagens (`EmailMessage` do Django) com até `trabalhadores` threads. Cada thread abre uma
+    conexão SMTP e a reutiliza para todas as mensagens do seu lote. Uma mensagem com falha transitória
+    (conexão, resposta 4xx) é tentada até `tentativas` vezes, com espera de `espera_inicial` segundos
+    dobrando a cada tentativa; respostas 5xx falham de imediato.
+    Retorna um `ResultadoEnvio` por mensagem, na ordem recebida; as falhas não interrompem as demais.
+    """
+    if not mensagens:
+        return []
+
+    trabalhadores = max(1, min(trabalhadores, len(mensagens)))
+    lotes = [list(enumerate(mensagens))[i::trabalhadores] for i in range(trabalhadores)]
+    resultados = [None] * len(mensagens)
+    with ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+        for parcial in executor.map(lambda lote: _enviar_lote(lote, tentativas, espera_inicial), lotes):
+            for posicao, resultado in parcial:
+                resultados[posicao] = resultado
+    return resultados
+
+
+def informar_envio(resultados: list) -> None:
+    """Mostra a latência e a situação de cada mensagem e um resumo do envio."""
+    for resultado in resultados:
+        situacao = "ok" if resultado.erro is None else f"ERRO: {resultado.erro}"
+        logger.log(
+            logging.INFO if resultado.erro is None else logging.WARNING,
+            "%8.1f ms | %d tentativa(s) | %s | %s | %s",
+            resultado.latencia * 1000,
+            resultado.tentativas,
+            ", ".join(resultado.destinatarios),
+            resultado.assunto,
+            situacao,
+        )
+    if not resultados:
+        return
+    latencias = [resultado.latencia * 1000 for resultado in resultados]
+    enviados = sum(resultado.erro is None for resultado in resultados)
+    logger.info(
+        "Emails enviados: %d/%d | latência mediana %.1f ms | máxima %.1f ms",
+        enviados,
+        len(resultados),
+        statistics.median(latencias),
+        max(latencias),
+    )
@@ -0,0 +1,78 @@
+from sqlalchemy import BigInteger, Column, Date, Float, Index, MetaData, SmallInteger, Table, Text
+
+# Esquema das tabelas do fluxo no PostgreSQL, compartilhado pela carga (processador_fluxo)
+# e pelas consultas do painel (enviar_painel). A coluna "data" é DATE e os índices
+# compostos atendem aos filtros por data usados pelo painel. As tabelas fluxo_resumo_*
+# guardam os totais diários dos lançamentos, calculados na carga, que o painel lê no
+# lugar da tabela de lançamentos.
+metadata = MetaData()
+
+# Valores da coluna "tipo" dos lançamentos e dos resumos: as mesmas categorias, na mesma ordem,
+# de TabelaBancoCompromissoLancamentos.TIPOS, com que a carga classifica os lançamentos
+TIPOS = ["Desconhecido", "Entrada", "Saída"]
+
+fluxo_lancamentos = Table(
+    "fluxo_lancamentos",
+    metadata,
+    Column("index", BigInteger),
+    Column("tipos_de_compromisso", SmallInteger),
+    Column("data", Date, nullable=False),
+    Column("banco", Text),
+    Column("valores", Float),
+    Column("tipo", Text),
+    Index("ix_fluxo_lancamentos_data_banco", "data", "banco"),
+    Index("ix_fluxo_lancamentos_data_compromisso", "data", "tipos_de_compromisso"),
+)
+
+fluxo_saldos = Table(
+    "fluxo_saldos",
+    metadata,
+    Column("index", BigInteger),
+    Column("saldo_final_inicial", Text),
+    Column("data", Date, nullable=False),
+    Column("valor_saldo_final_inicial", Float),
+    Column("banco", Text),
+    Index("ix_fluxo_saldos_data_banco", "data", "banco"),
+)
+
+fluxo_investimentos = Table(
+    "fluxo_investimentos",
+    metadata,
+    Column("index", BigInteger),
+    Column("data", Date, nullable=False),
+    Column("banco", Text),
+    Column("modalidade", Text),
+    Column("aplicacao", Float),
+    Column("resgate", Float),
+    Column("rendimento_bruto", Float),
+    Column("rendimento_liquido", Float),
+    Column("saldo_atual", Float),
+    Column("rentabilidade", Float),
+    Column("rentabilidade_dia", Float),
+    Column("tipo_de_bloqueio", Text),
+    Column("saldo_bloqueado", Float),
+    Column("saldo_disponivel", Float),
+    Index("ix_fluxo_investimentos_data_banco", "data", "banco"),
+)
+
+fluxo_resumo_banco_tipo = Table(
+    "fluxo_resumo_banco_tipo",
+    metadata,
+    Column("index", BigInteger),
+    Column("data", Date, nullable=False),
+    Column("banco", Text),
+    Column("tipo", Text),
+    Column("valores", Float),
+    Index("ix_fluxo_resumo_banco_tipo_data_banco", "data", "banco"),
+)
+
+fluxo_resumo_compromisso = Table(
+    "fluxo_resumo_compromisso",
+    metadata,
+    Column("index", BigInteger),
+    Column("data", Date, nullable=False),
+    Column("tipos_de_compromisso", SmallInteger),
+    Column("tipo", Text),
+    Column("valores", Float),
+    Index("ix_fluxo_resumo_compromisso_data_compromisso", "data", "tipos_de_compromisso"),
+)
@@ -0,0 +1,11 @@
+"""Filtros de template do painel, carregados como builtins pelo renderizador (sem `{% load %}`).
+
+Uso no template: R$ {{ saldo_total|brl }}
+"""
+
+from django import template
+
+from formatacao import formatar_brl
+
+register = template.Library()
+register.filter("brl", formatar_brl, is_safe=True)
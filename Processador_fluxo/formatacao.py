@@ -0,0 +1,36 @@
+from decimal import Decimal
+
+import numpy as np
+
+# Agrupa os milhares com "_" (que não aparece no número), para trocar os separadores com dois `replace`:
+# 1_234.56 -> 1_234,56 -> 1.234,56
+_FORMATO = "{:_.2f}"
+
+
+def formatar_brl(valor):
+    """
+    Formata um número como 1.234,56 (sem o "R$"). Valores que não são números (texto, None)
+    são retornados sem alteração, como fazem os filtros de template do Django.
+    """
+    try:
+        texto = _FORMATO.format(valor)
+    except TypeError:
+        return valor
+    except ValueError:
+        # O Decimal (colunas numeric) não aceita o agrupamento com "_"; textos também caem aqui
+        if not isinstance(valor, Decimal):
+            return valor
+        texto = f"{valor:,.2f}".replace(",", "_")
+    return texto.replace(".", ",").replace("_", ".")
+
+
+def formatar_brl_valores(valores) -> list:
+    """
+    Formata uma coluna inteira (Series, array ou lista de números) como 1.234,56, na mesma ordem.
+    Os separadores de toda a coluna são trocados de uma só vez, no texto já unido, em vez de valor a valor.
+    """
+    valores = np.asarray(valores, dtype=float)
+    if valores.size == 0:
+        return []
+    texto = "\n".join(map(_FORMATO.format, valores.tolist()))
+    return texto.replace(".", ",").replace("_", ".").split("\n")
@@ -0,0 +1,198 @@
+"""Gera planilhas sintéticas "Fluxo de Caixa Diário MM-AAAA.xlsx" no layout lido pelo processador.
+
+Uso: python gerador_planilhas.py PASTA [--inicio MM-AAAA] [--meses N] [--bancos safra itau ...]
+     [--compromissos N] [--semente N]
+"""
+
+import argparse
+import os
+import random
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+import listas
+from leitor_fluxo import ABA_INVESTIMENTOS, datas_do_mes, inicio_do_mes
+
+COLUNAS_INVESTIMENTOS = [
+    "Data",
+    "Dia da Semana",
+    "Data",
+    "Banco",
+    "Modalidade",
+    "Aplicação",
+    "Resgate",
+    "Rendimento Bruto",
+    "Rendimento Líquido",
+    "Saldo Atual",
+    "Rentabilidade",
+    "Rentabilidade Dia",
+    "Tipo de Bloqueio",
+    "Saldo Bloqueado",
+    "Saldo Disponível",
+]
+MODALIDADES = ["CDB", "Compromissada", "LCA"]
+DIAS_DA_SEMANA = ["segunda", "terça", "quarta", "quinta", "sexta", "sábado", "domingo"]
+# Dias anteriores ao mês também presentes na aba "Investimentos" (o processador os descarta)
+DIAS_ANTERIORES_INVESTIMENTOS = 3
+# Proporção de células de lançamento vazias e com texto ("-") no lugar do número
+PROPORCAO_VAZIAS = 0.2
+PROPORCAO_TEXTO = 0.02
+
+
+def nome_arquivo(mes: int, ano: int) -> str:
+    return f"Fluxo de Caixa Diário {mes:02d}-{ano}.xlsx"
+
+
+def _colunas_saldos(bancos: list) -> list:
+    """Nome de cada banco no cabeçalho da aba: o de `listas.colunas_bancos_saldos`, quando existe."""
+    saldos = {coluna.lower(): coluna for coluna in listas.colunas_bancos_saldos}
+    return [saldos.get(banco.lower(), banco.upper()) for banco in bancos]
+
+
+def _compromissos(quantidade: int | None) -> list:
+    """(linha "NN - descrição", seção) das entradas e saídas de `listas`, completadas com códigos sem tipo."""
+    codigos = [(codigo, "ENTRADAS") for codigo in listas.entradas] + [
+        (codigo, "SAÍDAS") for codigo in listas.saidas
+    ]
+    if quantidade is None:
+        quantidade = len(codigos)
+    usados = {int(codigo) for codigo, _ in codigos}
+    extras = (codigo for codigo in range(100, 1000) if codigo not in usados)
+    while len(codigos) < quantidade:
+        codigos.append((f"{next(extras)}", "OUTROS"))
+    return [(f"{codigo} - {secao.capitalize()} {codigo}", secao) for codigo, secao in codigos[:quantidade]]
+
+
+def _valor(gerador: random.Random, escala: float):
+    sorteio = gerador.random()
+    if sorteio < PROPORCAO_VAZIAS:
+        return None
+    if sorteio < PROPORCAO_VAZIAS + PROPORCAO_TEXTO:
+        return "-"
+    return round(gerador.uniform(0, escala), 2)
+
+
+def _aba_diaria(planilha, cabecalho: list, compromissos: list, gerador: random.Random) -> None:
+    bancos = len(cabecalho) - 3
+    planilha.append(cabecalho)
+    planilha.append(["SALDO INICIAL"] + [_valor(gerador, 1e6) for _ in range(bancos)] + [None, None])
+    secao_atual = None
+    for compromisso, secao in compromissos:
+        if secao != secao_atual:
+            planilha.append([secao])
+            secao_atual = secao
+        valores = [_valor(gerador, 1e5) for _ in range(bancos)]
+        total = round(sum(valor for valor in valores if isinstance(valor, float)), 2)
+        planilha.append([compromisso] + valores + [None, total])
+    planilha.append(["SALDO FINAL"] + [_valor(gerador, 1e6) for _ in range(bancos)] + [None, None])
+
+
+def _aba_investimentos(planilha, inicio: date, fim: date, bancos: list, gerador: random.Random) -> None:
+    planilha.append(COLUNAS_INVESTIMENTOS)
+    dia = inicio - timedelta(days=DIAS_ANTERIORES_INVESTIMENTOS)
+    while dia <= fim:
+        momento = datetime.combine(dia, datetime.min.time())
+        for banco in bancos:
+            for modalidade in MODALIDADES:
+                saldo = round(gerador.uniform(1e4, 1e7), 2)
+                bloqueado = round(saldo * gerador.choice([0, 0, 0.1, 0.5]), 2)
+                planilha.append(
+                    [
+                        momento,
+                        DIAS_DA_SEMANA[dia.weekday()],
+                        momento,
+                        banco,
+                        modalidade,
+                        round(gerador.uniform(0, 1e5), 2),
+                        round(gerador.uniform(0, 1e5), 2),
+                        round(saldo * 0.0005, 2),
+                        round(saldo * 0.0004, 2),
+                        saldo,
+                        None if gerador.random() < 0.1 else round(gerador.uniform(0.8, 1.2), 4),
+                        round(gerador.uniform(0, 0.001), 6),
+                        "Garantia" if bloqueado else None,
+                        bloqueado or None,
+                        saldo - bloqueado,
+                    ]
+                )
+        dia += timedelta(days=1)
+
+
+def gerar_planilha(
+    caminho: str,
+    mes: int,
+    ano: int,
+    bancos: list | None = None,
+    compromissos: int | None = None,
+    semente: int = 0,
+) -> str:
+    """
+    Grava em `caminho` a planilha do mês: uma aba diária (DD-MM-AAAA) por dia, mais o primeiro dia do
+    mês seguinte, como nos arquivos reais, e a aba "Investimentos". As abas diárias têm SALDO INICIAL,
+    as linhas "NN - compromisso" e SALDO FINAL por banco (padrão: `listas.colunas_bancos`), com células
+    vazias e com "-" entre os valores. A mesma semente gera sempre o mesmo arquivo.
+    """
+    from openpyxl import Workbook
+
+    bancos = listas.colunas_bancos if bancos is None else bancos
+    gerador = random.Random(f"{semente}-{ano}-{mes}")
+    cabecalho = ["FLUXO"] + _colunas_saldos(bancos) + [None, "TOTAL"]
+    linhas = _compromissos(compromissos)
+
+    abas = datas_do_mes(nome_arquivo(mes, ano))
+    inicio = inicio_do_mes(nome_arquivo(mes, ano)).date()
+    fim = inicio + timedelta(days=len(abas) - 1)
+
+    # Modo somente escrita: as linhas vão direto para o arquivo, sem manter as células em memória
+    livro = Workbook(write_only=True)
+    for aba in abas + [(fim + timedelta(days=1)).strftime("%d-%m-%Y")]:
+        _aba_diaria(livro.create_sheet(aba), cabecalho, linhas, gerador)
+    _aba_investimentos(livro.create_sheet(ABA_INVESTIMENTOS), inicio, fim, cabecalho[1:-2], gerador)
+    livro.save(caminho)
+    return caminho
+
+
+def gerar_planilhas(
+    pasta: str,
+    inicio: str = "01-2024",
+    meses: int = 1,
+    bancos: list | None = None,
+    compromissos: int | None = None,
+    semente: int = 0,
+) -> list:
+    """Gera na pasta as planilhas de `meses` meses consecutivos a partir de `inicio` (MM-AAAA). Retorna os caminhos."""
+    os.makedirs(pasta, exist_ok=True)
+    primeiro = pd.to_datetime(f"01-{inicio}", format="%d-%m-%Y")
+    caminhos = []
+    for mes in pd.date_range(primeiro, periods=meses, freq="MS"):
+        caminho = os.path.join(pasta, nome_arquivo(mes.month, mes.year))
+        caminhos.append(gerar_planilha(caminho, mes.month, mes.year, bancos, compromissos, semente))
+    return caminhos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pasta")
+    parser.add_argument("--inicio", default="01-2024", help="Primeiro mês, MM-AAAA (padrão: 01-2024).")
+    parser.add_argument("--meses", type=int, default=1)
+    parser.add_argument(
+        "--bancos", nargs="+", default=None, help="Colunas de bancos (padrão: listas.colunas_bancos)."
+    )
+    parser.add_argument(
+        "--compromissos",
+        type=int,
+        default=None,
+        help="Linhas de compromisso por aba (padrão: as entradas e saídas de listas).",
+    )
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    for caminho in gerar_planilhas(
+        args.pasta, args.inicio, args.meses, args.bancos, args.compromissos, args.semente
+    ):
+        print(f"Planilha gerada: {caminho}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import io
+import math
+from xml.sax.saxutils import escape
+
+import pandas as pd
+
+from formatacao import formatar_brl, formatar_brl_valores
+
+# Formatos do gráfico do painel: PNG desenhado pelo matplotlib (Agg) ou SVG montado diretamente
+FORMATOS = ("agg", "svg")
+TIPOS_MIME = {"agg": "image/png", "svg": "image/svg+xml"}
+
+TITULO = "Entradas e Saídas dos Últimos 7 Dias"
+ROTULO_Y = "Entradas - Saídas"
+ROTULO_X = "Data"
+COR_POSITIVO = "blue"
+COR_NEGATIVO = "orange"
+
+
+def formatar_valor(valor: float) -> str:
+    """Formata o valor da barra como R$ 1.234,56."""
+    return f"R$ {formatar_brl(valor)}"
+
+
+def _cores(valores: list) -> list:
+    return [COR_POSITIVO if valor >= 0 else COR_NEGATIVO for valor in valores]
+
+
+class GraficoAgg:
+    """Desenha o gráfico com a API orientada a objetos do matplotlib no backend Agg, sem o pyplot.
+    A mesma figura é reaproveitada entre os gráficos e limpa após cada desenho."""
+
+    def __init__(self, largura: float = 10, altura: float = 6):
+        # Importado aqui para que o painel em SVG não pague o custo do matplotlib
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.figura = Figure(figsize=(largura, altura))
+        FigureCanvasAgg(self.figura)
+
+    def desenhar(self, datas: pd.Series, valores: pd.Series) -> bytes:
+        try:
+            ax = self.figura.subplots()
+            barras = ax.bar(datas, valores, color=_cores(valores))
+
+            for barra in barras:
+                altura = barra.get_height()
+                ax.text(
+                    barra.get_x() + barra.get_width() / 2,
+                    altura,
+                    formatar_valor(altura),
+                    ha="center",
+                    va="bottom" if altura >= 0 else "top",
+                )
+
+            ax.set_title(TITULO, fontsize=13)
+            ax.set_ylabel(ROTULO_Y, fontsize=10)
+            ax.set_xlabel(ROTULO_X, fontsize=10)
+            ax.grid(True, which="both", linestyle="--", linewidth=0.5, axis="y")
+            ax.set_axisbelow(True)
+            ax.tick_params(axis="x", labelrotation=45)
+            self.figura.tight_layout()
+
+            buffer = io.BytesIO()
+            self.figura.savefig(buffer, format="png")
+            return buffer.getvalue()
+        finally:
+            self.figura.clear()
+
+
+def _marcas(minimo: float, maximo: float, quantidade: int = 5) -> list:
+    """Marcas "redondas" (1, 2 ou 5 x 10^n) que cobrem o intervalo do eixo y."""
+    if minimo == maximo:
+        minimo, maximo = minimo - 1, maximo + 1
+    bruto = (maximo - minimo) / quantidade
+    potencia = 10 ** math.floor(math.log10(bruto))
+    passo = next(p * potencia for p in (1, 2, 5, 10) if p * potencia >= bruto)
+    inicio = math.floor(minimo / passo) * passo
+    fim = math.ceil(maximo / passo) * passo
+    return [inicio + i * passo for i in range(round((fim - inicio) / passo) + 1)]
+
+
+def desenhar_svg(
+    datas: pd.Series, valores: pd.Series, largura: int = 1000, altura: int = 600
+) -> bytes:
+    """Monta o gráfico de barras como SVG, sem depender do matplotlib."""
+    esquerda, direita, topo, base = 110, 20, 50, 110
+    area_largura = largura - esquerda - direita
+    area_altura = altura - topo - base
+
+    valores = [float(valor) for valor in valores]
+    marcas = _marcas(min([0.0, *valores]), max([0.0, *valores]))
+    minimo, maximo = marcas[0], marcas[-1]
+
+    def y(valor: float) -> float:
+        return topo + (maximo - valor) / (maximo - minimo) * area_altura
+
+    partes = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{largura}" height="{altura}" '
+        f'viewBox="0 0 {largura} {altura}" font-family="DejaVu Sans, Arial, sans-serif">',
+        f'<rect width="{largura}" height="{altura}" fill="white"/>',
+        f'<text x="{esquerda + area_largura / 2}" y="{topo - 18}" font-size="17" '
+        f'text-anchor="middle">{escape(TITULO)}</text>',
+    ]
+
+    for marca in marcas:
+        partes.append(
+            f'<line x1="{esquerda}" x2="{esquerda + area_largura}" y1="{y(marca):.1f}" '
+            f'y2="{y(marca):.1f}" stroke="#b0b0b0" stroke-width="0.7" stroke-dasharray="4 3"/>'
+        )
+        rotulo = f"{marca:,.0f}".replace(",", ".")
+        partes.append(
+            f'<text x="{esquerda - 8}" y="{y(marca) + 4:.1f}" font-size="12" '
+            f'text-anchor="end">{rotulo}</text>'
+        )
+
+    passo = area_largura / max(len(valores), 1)
+    rotulos = formatar_brl_valores(valores)
+    for i, (data, valor, cor, rotulo_valor) in enumerate(zip(datas, valores, _cores(valores), rotulos)):
+        centro = esquerda + passo * (i + 0.5)
+        topo_barra, base_barra = sorted((y(valor), y(0)))
+        partes.append(
+            f'<rect x="{centro - passo * 0.4:.1f}" y="{topo_barra:.1f}" width="{passo * 0.8:.1f}" '
+            f'height="{base_barra - topo_barra:.1f}" fill="{cor}"/>'
+        )
+        y_rotulo = topo_barra - 5 if valor >= 0 else base_barra + 15
+        partes.append(
+            f'<text x="{centro:.1f}" y="{y_rotulo:.1f}" font-size="12" '
+            f'text-anchor="middle">R$ {escape(rotulo_valor)}</text>'
+        )
+        y_data = topo + area_altura + 18
+        partes.append(
+            f'<text x="{centro:.1f}" y="{y_data}" font-size="12" text-anchor="end" '
+            f'transform="rotate(-45 {centro:.1f} {y_data})">{pd.Timestamp(data):%d/%m/%Y}</text>'
+        )
+
+    partes += [
+        f'<line x1="{esquerda}" x2="{esquerda}" y1="{topo}" y2="{topo + area_altura}" stroke="black"/>',
+        f'<line x1="{esquerda}" x2="{esquerda + area_largura}" y1="{y(0):.1f}" y2="{y(0):.1f}" stroke="black"/>',
+        f'<text x="{esquerda + area_largura / 2}" y="{altura - 12}" font-size="13" '
+        f'text-anchor="middle">{escape(ROTULO_X)}</text>',
+        f'<text x="20" y="{topo + area_altura / 2}" font-size="13" text-anchor="middle" '
+        f'transform="rotate(-90 20 {topo + area_altura / 2})">{escape(ROTULO_Y)}</text>',
+        "</svg>",
+    ]
+    return "\n".join(partes).encode("utf-8")
+
+
+_grafico_agg = None
+
+
+def desenhar_grafico(datas: pd.Series, valores: pd.Series, formato: str = "agg") -> bytes:
+    """Desenha o gráfico de barras no formato escolhido ("agg" para PNG, "svg" para SVG)."""
+    global _grafico_agg
+    if formato == "svg":
+        return desenhar_svg(datas, valores)
+    if formato != "agg":
+        raise ValueError(f"Formato de gráfico desconhecido: {formato} (use um de {FORMATOS})")
+    if _grafico_agg is None:
+        _grafico_agg = GraficoAgg()
+    return _grafico_agg.desenhar(datas, valores)
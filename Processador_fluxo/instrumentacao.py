@@ -0,0 +1,289 @@
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Pasta padrão dos arquivos de métricas (a mesma do estado do processador)
+PASTA_METRICAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "estado_fluxo")
+NIVEIS_LOG = ("DEBUG", "INFO", "WARNING", "ERROR")
+# Bibliotecas que só aparecem no log a partir de WARNING, mesmo com DEBUG
+BIBLIOTECAS_SILENCIADAS = ("matplotlib", "PIL", "fontTools", "asyncio", "urllib3")
+MB = 1024**2
+
+
+def configurar_logging(nivel: str = "INFO") -> None:
+    """Configura o logging dos scripts: horário, nível, módulo e mensagem."""
+    logging.basicConfig(
+        level=nivel,
+        format="%(asctime)s %(levelname)-7s %(name)s: %(message)s",
+        datefmt="%H:%M:%S",
+    )
+    for biblioteca in BIBLIOTECAS_SILENCIADAS:
+        logging.getLogger(biblioteca).setLevel(max(logging.getLevelName(nivel), logging.WARNING))
+
+
+def _leitor_memoria_pico():
+    """Função que retorna o pico de memória (RSS) do processo em bytes, ou None se não houver como medir.
+    Usa o `resource` (Linux e macOS) ou, no Windows, o `peak_wset` do psutil, se instalado."""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        # ru_maxrss vem em KB no Linux e em bytes no macOS
+        escala = 1 if sys.platform == "darwin" else 1024
+        return lambda: resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * escala
+    try:
+        import psutil
+    except ImportError:  # psutil é opcional; sem ele as etapas não registram o pico de memória
+        return lambda: None
+    processo = psutil.Process()
+    return lambda: getattr(processo.memory_info(), "peak_wset", None)
+
+
+@dataclass
+class Etapa:
+    """Medidas de uma etapa: duração (s), linhas recebidas e produzidas, valores convertidos para NaN,
+    pico de memória do processo ao fim da etapa e, com tracemalloc, o pico de alocações durante ela."""
+
+    nome: str
+    atributos: dict = field(default_factory=dict)
+    inicio: float = 0.0
+    duracao: float = 0.0
+    linhas_entrada: int | None = None
+    linhas_saida: int | None = None
+    nan_coagidos: int = 0
+    memoria_pico_mb: float | None = None
+    alocacao_pico_mb: float | None = None
+    filhas: list = field(default_factory=list)
+
+    def como_dict(self) -> dict:
+        return {
+            "nome": self.nome,
+            **({"atributos": self.atributos} if self.atributos else {}),
+            "inicio": datetime.fromtimestamp(self.inicio).isoformat(timespec="milliseconds"),
+            "duracao_s": round(self.duracao, 6),
+            "linhas_entrada": self.linhas_entrada,
+            "linhas_saida": self.linhas_saida,
+            "nan_coagidos": self.nan_coagidos,
+            "memoria_pico_mb": self.memoria_pico_mb,
+            "alocacao_pico_mb": self.alocacao_pico_mb,
+            "filhas": [filha.como_dict() for filha in self.filhas],
+        }
+
+
+class Instrumentacao:
+    """Registra as etapas de uma execução em árvore (etapas abertas dentro de outra viram filhas dela)
+    e as exporta em JSON e no formato de texto do Prometheus (textfile collector do node_exporter)."""
+
+    def __init__(self, rastrear_alocacoes: bool = False):
+        self._memoria_pico = _leitor_memoria_pico()
+        self.reiniciar(rastrear_alocacoes)
+
+    def reiniciar(self, rastrear_alocacoes: bool | None = None) -> None:
+        """Descarta as etapas registradas e começa uma nova execução."""
+        if rastrear_alocacoes is not None:
+            self.rastrear_alocacoes = rastrear_alocacoes
+            if rastrear_alocacoes:
+                import tracemalloc
+
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+        self.etapas = []
+        self.inicio = time.time()
+        self._inicio_perf = time.perf_counter()
+        # [etapa, início (perf_counter), maior pico de alocações já visto nas filhas]
+        self._pilha = []
+
+    @contextmanager
+    def etapa(self, nome: str, **atributos):
+        """Mede o bloco como uma etapa. O objeto `Etapa` retornado recebe as contagens de linhas."""
+        atual = Etapa(nome, atributos, inicio=time.time())
+        if self._pilha:
+            self._pilha[-1][0].filhas.append(atual)
+        else:
+            self.etapas.append(atual)
+        if self.rastrear_alocacoes:
+            import tracemalloc
+
+            # O pico das alocações é zerado a cada etapa; o da etapa de fora é guardado antes
+            if self._pilha:
+                self._pilha[-1][2] = max(self._pilha[-1][2], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._pilha.append([atual, time.perf_counter(), 0])
+        try:
+            yield atual
+        finally:
+            _, inicio, pico_filhas = self._pilha.pop()
+            atual.duracao = time.perf_counter() - inicio
+            memoria = self._memoria_pico()
+            atual.memoria_pico_mb = None if memoria is None else round(memoria / MB, 1)
+            if self.rastrear_alocacoes:
+                import tracemalloc
+
+                pico = max(pico_filhas, tracemalloc.get_traced_memory()[1])
+                atual.alocacao_pico_mb = round(pico / MB, 1)
+                if self._pilha:
+                    self._pilha[-1][2] = max(self._pilha[-1][2], pico)
+            logger.debug(
+                "Etapa %s%s: %.3fs | linhas %s -> %s | NaN coagidos %d",
+                nome,
+                f" {atributos}" if atributos else "",
+                atual.duracao,
+                atual.linhas_entrada,
+                atual.linhas_saida,
+                atual.nan_coagidos,
+            )
+
+    def contar_coagidos(self, quantidade: int) -> None:
+        """Soma valores convertidos para NaN à etapa em andamento."""
+        if self._pilha and quantidade:
+            self._pilha[-1][0].nan_coagidos += quantidade
+
+    def anexar(self, etapas: list) -> None:
+        """Anexa etapas medidas em outro processo (ex.: processos de leitura) à etapa em andamento."""
+        destino = self._pilha[-1][0].filhas if self._pilha else self.etapas
+        destino.extend(etapas)
+
+    def resumo(self, script: str) -> dict:
+        memoria = self._memoria_pico()
+        return {
+            "script": script,
+            "inicio": datetime.fromtimestamp(self.inicio).isoformat(timespec="milliseconds"),
+            "duracao_s": round(time.perf_counter() - self._inicio_perf, 6),
+            "memoria_pico_mb": None if memoria is None else round(memoria / MB, 1),
+            "etapas": [etapa.como_dict() for etapa in self.etapas],
+        }
+
+    def _totais_por_caminho(self) -> dict:
+        """Soma as medidas das etapas de mesmo caminho (ex.: todas as abas), para manter poucas séries."""
+        totais = {}
+
+        def visitar(etapas: list, prefixo: str) -> None:
+            for etapa in etapas:
+                caminho = f"{prefixo}/{etapa.nome}" if prefixo else etapa.nome
+                total = totais.setdefault(
+                    caminho,
+                    {"execucoes": 0, "duracao": 0.0, "linhas_entrada": 0, "linhas_saida": 0,
+                     "nan_coagidos": 0, "memoria_pico": 0.0},
+                )
+                total["execucoes"] += 1
+                total["duracao"] += etapa.duracao
+                total["linhas_entrada"] += etapa.linhas_entrada or 0
+                total["linhas_saida"] += etapa.linhas_saida or 0
+                total["nan_coagidos"] += etapa.nan_coagidos
+                total["memoria_pico"] = max(total["memoria_pico"], etapa.memoria_pico_mb or 0.0)
+                visitar(etapa.filhas, caminho)
+
+        visitar(self.etapas, "")
+        return totais
+
+    def texto_prometheus(self, script: str) -> str:
+        resumo = self.resumo(script)
+        rotulo_script = f'script="{_escapar_rotulo(script)}"'
+        linhas = []
+
+        def metrica(nome: str, ajuda: str, valores: list) -> None:
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} gauge")
+            for rotulos, valor in valores:
+                linhas.append(f"{nome}{{{rotulos}}} {valor}")
+
+        metrica(
+            "fluxo_execucao_inicio_segundos",
+            "Início da última execução (epoch).",
+            [(rotulo_script, f"{self.inicio:.3f}")],
+        )
+        metrica(
+            "fluxo_execucao_duracao_segundos",
+            "Duração da última execução.",
+            [(rotulo_script, resumo["duracao_s"])],
+        )
+        if resumo["memoria_pico_mb"] is not None:
+            metrica(
+                "fluxo_execucao_memoria_pico_bytes",
+                "Pico de memória (RSS) do processo na última execução.",
+                [(rotulo_script, int(resumo["memoria_pico_mb"] * MB))],
+            )
+
+        totais = self._totais_por_caminho()
+        por_etapa = [
+            (f'{rotulo_script},etapa="{_escapar_rotulo(caminho)}"', total)
+            for caminho, total in totais.items()
+        ]
+        for nome, chave, ajuda in [
+            ("fluxo_etapa_execucoes", "execucoes", "Vezes que a etapa foi executada na última execução."),
+            ("fluxo_etapa_duracao_segundos", "duracao", "Tempo somado da etapa na última execução."),
+            ("fluxo_etapa_linhas_entrada", "linhas_entrada", "Linhas recebidas pela etapa."),
+            ("fluxo_etapa_linhas_saida", "linhas_saida", "Linhas produzidas pela etapa."),
+            ("fluxo_etapa_nan_coagidos", "nan_coagidos", "Valores não numéricos convertidos para NaN."),
+        ]:
+            metrica(nome, ajuda, [(rotulos, round(total[chave], 6)) for rotulos, total in por_etapa])
+        metrica(
+            "fluxo_etapa_memoria_pico_bytes",
+            "Pico de memória (RSS) do processo ao fim da etapa.",
+            [(rotulos, int(total["memoria_pico"] * MB)) for rotulos, total in por_etapa],
+        )
+        return "\n".join(linhas) + "\n"
+
+    def exportar(self, script: str, pasta: str = PASTA_METRICAS) -> tuple:
+        """Grava `metricas_<script>.json` e `metricas_<script>.prom` na pasta. Retorna os dois caminhos."""
+        os.makedirs(pasta, exist_ok=True)
+        caminho_json = os.path.join(pasta, f"metricas_{script}.json")
+        caminho_prom = os.path.join(pasta, f"metricas_{script}.prom")
+        _gravar_atomico(caminho_json, json.dumps(self.resumo(script), ensure_ascii=False, indent=2))
+        _gravar_atomico(caminho_prom, self.texto_prometheus(script))
+        logger.info("Métricas da execução gravadas em %s e %s", caminho_json, caminho_prom)
+        return caminho_json, caminho_prom
+
+
+def _escapar_rotulo(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _gravar_atomico(caminho: str, conteudo: str) -> None:
+    """Grava em um arquivo temporário e o renomeia, para que o coletor nunca leia um arquivo pela metade."""
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+_instrumentacao = Instrumentacao()
+
+
+def instrumentacao() -> Instrumentacao:
+    """Instrumentação em uso no processo."""
+    return _instrumentacao
+
+
+@contextmanager
+def usar_instrumentacao(registro: Instrumentacao):
+    """Usa `registro` como instrumentação do processo dentro do bloco (ex.: em um processo de leitura)."""
+    global _instrumentacao
+    anterior, _instrumentacao = _instrumentacao, registro
+    try:
+        yield registro
+    finally:
+        _instrumentacao = anterior
+
+
+def coagir_numerico(valores: pd.Series) -> pd.Series:
+    """`pd.to_numeric(errors="coerce")` que soma à etapa em andamento os valores não numéricos
+    (textos não vazios, como "-") convertidos para NaN."""
+    convertidos = pd.to_numeric(valores, errors="coerce")
+    if valores.dtype == object:
+        perdidos = valores[convertidos.isna() & valores.notna()]
+        coagidos = sum(
+            1 for valor in perdidos if not (isinstance(valor, str) and not valor.strip())
+        )
+        instrumentacao().contar_coagidos(coagidos)
+    return convertidos
@@ -0,0 +1,192 @@
+import logging
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from instrumentacao import instrumentacao
+from leitor_xml import LeitorXlsxXml
+
+logger = logging.getLogger(__name__)
+
+
+ABA_INVESTIMENTOS = "Investimentos"
+MOTORES = ("openpyxl", "calamine", "xml")
+
+
+def inicio_do_mes(arquivo: str) -> pd.Timestamp:
+    """Retorna o primeiro dia do mês indicado no nome do arquivo (MM-AAAA)."""
+    return pd.to_datetime(
+        re.sub(r"^.*(\d{2}-\d{4}).*$", r"01-\1", os.path.basename(arquivo)),
+        format="%d-%m-%Y",
+    )
+
+
+def datas_do_mes(arquivo: str) -> list:
+    """Retorna as datas (DD-MM-AAAA) de todos os dias do mês indicado no nome do arquivo."""
+    data_inicial = inicio_do_mes(arquivo)
+    return list(
+        pd.date_range(
+            start=data_inicial,
+            end=pd.offsets.MonthEnd().rollforward(data_inicial),
+            freq="D",
+        ).strftime("%d-%m-%Y")
+    )
+
+
+def _para_float(valor) -> float:
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        # Células vazias não contam; textos como "-" são valores convertidos para NaN
+        if isinstance(valor, str) and valor.strip():
+            instrumentacao().contar_coagidos(1)
+        return np.nan
+
+
+class LayoutAbaFluxo:
+    """Esta classe guarda o layout de uma aba diária (cabeçalho, linhas "NN - compromisso" e SALDO INICIAL/FINAL,
+    colunas dos bancos) aprendido na primeira aba lida do arquivo. As demais abas são lidas apenas nessa região,
+    com as colunas dos bancos já numéricas."""
+
+    PADRAO_COMPROMISSO = r"\b\d{1,3} - .+"
+    ROTULOS_SALDO = ["SALDO FINAL", "SALDO INICIAL"]
+    # Linhas extras lidas após a última linha relevante, para detectar abas que cresceram
+    MARGEM_LINHAS = 5
+
+    def __init__(self, colunas: list, posicoes: list, rotulos: dict, bancos: list):
+        self.colunas = colunas
+        self.posicoes = posicoes
+        self.rotulos = rotulos
+        self.nrows = max(rotulos) + 1 + self.MARGEM_LINHAS
+        self.conversores = {coluna: _para_float for coluna in bancos}
+
+    @classmethod
+    def _rotulos_relevantes(cls, df: pd.DataFrame) -> dict:
+        """Retorna {posição da linha: rótulo} das linhas usadas pelas tabelas de lançamentos e saldos."""
+        primeira_coluna = df.iloc[:, 0]
+        mascara = primeira_coluna.str.contains(
+            cls.PADRAO_COMPROMISSO, na=False
+        ) | primeira_coluna.isin(cls.ROTULOS_SALDO)
+        return dict(zip(np.flatnonzero(mascara.to_numpy()).tolist(), primeira_coluna[mascara]))
+
+    @classmethod
+    def aprender(cls, df: pd.DataFrame, colunas_bancos: list):
+        """Aprende o layout a partir de uma aba lida por completo. Retorna None se a aba não tiver o formato esperado."""
+        if df.shape[1] < 2:
+            return None
+        try:
+            rotulos = cls._rotulos_relevantes(df)
+        except AttributeError:
+            # Primeira coluna sem textos
+            return None
+        if not rotulos:
+            return None
+
+        colunas = [str(coluna) for coluna in df.columns]
+        # As duas primeiras colunas são sempre mantidas: rótulos e a coluna renomeada para "Data" nos saldos
+        posicoes = [
+            posicao
+            for posicao, coluna in enumerate(colunas)
+            if posicao < 2 or coluna in colunas_bancos or coluna.lower() in colunas_bancos
+        ]
+        bancos = [
+            colunas[posicao]
+            for posicao in posicoes
+            if colunas[posicao] in colunas_bancos or colunas[posicao].lower() in colunas_bancos
+        ]
+        return cls([colunas[posicao] for posicao in posicoes], posicoes, rotulos, bancos)
+
+    def ler(self, xls, aba: str) -> pd.DataFrame | None:
+        """Lê apenas a região do layout. Retorna None se a aba não seguir o layout aprendido."""
+        df = xls.parse(
+            aba, usecols=self.posicoes, nrows=self.nrows, converters=self.conversores
+        )
+        if [str(coluna) for coluna in df.columns] != self.colunas:
+            return None
+        try:
+            if self._rotulos_relevantes(df) != self.rotulos:
+                return None
+        except AttributeError:
+            return None
+        return df
+
+
+class LeitorPlanilhasFluxo:
+    """Esta classe lê cada arquivo do fluxo uma única vez, carregando todas as abas diárias e a aba "Investimentos".
+
+    O motor de leitura pode ser "openpyxl" (padrão; o pandas já o abre em modo somente leitura), "calamine"
+    (requer python-calamine) ou "xml" (leitor em streaming de `leitor_xml`). Abas que o motor escolhido não
+    conseguir ler são relidas automaticamente com o openpyxl.
+
+    Quando `colunas_bancos` é informado, o layout da primeira aba diária é aprendido (`LayoutAbaFluxo`) e as
+    demais abas são lidas somente na região de interesse; abas que fogem do layout são lidas por completo."""
+
+    def __init__(self, motor: str = "openpyxl", colunas_bancos: list | None = None):
+        if motor not in MOTORES:
+            raise ValueError(f"Motor de leitura desconhecido: {motor}. Opções: {MOTORES}")
+        self.motor = motor
+        self.colunas_bancos = colunas_bancos
+
+    def _abrir(self, caminho_completo: str):
+        if self.motor == "xml":
+            return LeitorXlsxXml(caminho_completo)
+        return pd.ExcelFile(caminho_completo, engine=self.motor)
+
+    def _ler_abas(self, xls, abas: list, tolerar_falhas: bool = False) -> tuple:
+        """Lê as abas de um arquivo já aberto. Retorna ({aba: DataFrame}, abas que falharam)."""
+        # A aba "Investimentos" é opcional; as abas diárias são obrigatórias
+        abas = [aba for aba in abas if aba != ABA_INVESTIMENTOS or aba in xls.sheet_names]
+
+        planilhas, falhas = {}, []
+        layout = None
+        for aba in abas:
+            try:
+                with instrumentacao().etapa("ler_aba", aba=aba, motor=self.motor) as etapa:
+                    df = None
+                    if layout is not None and aba != ABA_INVESTIMENTOS:
+                        df = layout.ler(xls, aba)
+                        if df is None:
+                            logger.warning("Aba %s fora do layout aprendido, lendo por completo", aba)
+                    if df is None:
+                        df = xls.parse(aba)
+                        if self.colunas_bancos and layout is None and aba != ABA_INVESTIMENTOS:
+                            layout = LayoutAbaFluxo.aprender(df, self.colunas_bancos)
+                    etapa.linhas_saida = len(df)
+                planilhas[aba] = df
+            except Exception as e:
+                if not tolerar_falhas:
+                    raise
+                logger.warning("Motor %s falhou na aba %s (%s), usando openpyxl", self.motor, aba, e)
+                falhas.append(aba)
+        return planilhas, falhas
+
+    def ler_arquivo(self, caminho_completo: str, abas: list | None = None) -> dict:
+        if abas is None:
+            abas = datas_do_mes(caminho_completo) + [ABA_INVESTIMENTOS]
+
+        planilhas = {}
+        pendentes = abas
+        if self.motor != "openpyxl":
+            try:
+                with self._abrir(caminho_completo) as xls:
+                    planilhas, pendentes = self._ler_abas(xls, abas, tolerar_falhas=True)
+            except Exception as e:
+                logger.warning(
+                    "Motor %s indisponível para %s (%s), usando openpyxl", self.motor, caminho_completo, e
+                )
+                pendentes = abas
+
+        if pendentes:
+            # O arquivo é aberto uma única vez e todas as abas pendentes são lidas dele
+            with pd.ExcelFile(caminho_completo, engine="openpyxl") as xls:
+                planilhas.update(self._ler_abas(xls, pendentes)[0])
+
+        return {aba: planilhas[aba] for aba in abas if aba in planilhas}
+
+    def ler_arquivos(self, caminho: str, arquivos: list) -> dict:
+        return {
+            arquivo: self.ler_arquivo(os.path.join(caminho, arquivo))
+            for arquivo in arquivos
+        }
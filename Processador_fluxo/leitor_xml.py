@@ -0,0 +1,240 @@
+import datetime
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+
+
+NS_PRINCIPAL = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_RELACAO = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_PACOTE = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# Formatos numéricos nativos do Excel que representam datas/horas
+FORMATOS_DATA_NATIVOS = {
+    14: "mm-dd-yy",
+    15: "d-mmm-yy",
+    16: "d-mmm",
+    17: "mmm-yy",
+    18: "h:mm AM/PM",
+    19: "h:mm:ss AM/PM",
+    20: "h:mm",
+    21: "h:mm:ss",
+    22: "m/d/yy h:mm",
+    45: "mm:ss",
+    46: "[h]:mm:ss",
+    47: "mmss.0",
+}
+
+# Mesmas regras do openpyxl para reconhecer formatos de data e de duração
+_IGNORAR_FORMATO = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+_FORMATO_DURACAO = re.compile(
+    r"\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?", re.I
+)
+_REFERENCIA = re.compile(r"([A-Z]+)(\d+)")
+
+EPOCA_WINDOWS = datetime.datetime(1899, 12, 30)
+EPOCA_MAC = datetime.datetime(1904, 1, 1)
+
+
+def _e_formato_data(formato: str) -> bool:
+    formato = _IGNORAR_FORMATO.sub("", formato.split(";")[0])
+    return re.search(r"(?<![_\\])[dmhysDMHYS]", formato) is not None
+
+
+def _e_formato_duracao(formato: str) -> bool:
+    return _FORMATO_DURACAO.search(formato.split(";")[0]) is not None
+
+
+def _indice_coluna(letras: str) -> int:
+    indice = 0
+    for letra in letras:
+        indice = indice * 26 + ord(letra) - 64
+    return indice - 1
+
+
+def _converter_serial(valor: float, epoca: datetime.datetime, duracao: bool):
+    """Converte o número serial do Excel em data/hora, como o openpyxl."""
+    if duracao:
+        return datetime.timedelta(days=valor)
+    dia, fracao = divmod(valor, 1)
+    diferenca = datetime.timedelta(milliseconds=round(fracao * 86400 * 1000))
+    if 0 <= valor < 1 and diferenca.days == 0:
+        return (datetime.datetime.min + diferenca).time()
+    if 0 < valor < 60 and epoca == EPOCA_WINDOWS:
+        dia += 1
+    return epoca + datetime.timedelta(days=dia) + diferenca
+
+
+class LeitorXlsxXml:
+    """Leitor de arquivos .xlsx que percorre o XML das abas em streaming (zipfile + iterparse), sem openpyxl.
+    Devolve os mesmos valores que o pandas obtém com o openpyxl e usa o mesmo TextParser para montar os DataFrames."""
+
+    def __init__(self, caminho: str):
+        self.zip = zipfile.ZipFile(caminho)
+        self._caminhos_abas, self.epoca = self._ler_pasta_de_trabalho()
+        self.textos = self._ler_textos_compartilhados()
+        self.estilos_data = self._ler_estilos()
+
+    @property
+    def sheet_names(self) -> list:
+        return list(self._caminhos_abas)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        self.zip.close()
+
+    def _ler_pasta_de_trabalho(self) -> tuple:
+        alvos = {
+            relacao.get("Id"): relacao.get("Target")
+            for relacao in ET.fromstring(self.zip.read("xl/_rels/workbook.xml.rels")).iter(
+                f"{NS_PACOTE}Relationship"
+            )
+        }
+        raiz = ET.fromstring(self.zip.read("xl/workbook.xml"))
+
+        propriedades = raiz.find(f"{NS_PRINCIPAL}workbookPr")
+        data1904 = propriedades is not None and propriedades.get("date1904") in ("1", "true")
+
+        caminhos = {}
+        for aba in raiz.iter(f"{NS_PRINCIPAL}sheet"):
+            alvo = alvos[aba.get(f"{NS_RELACAO}id")]
+            if alvo.startswith("/"):
+                caminhos[aba.get("name")] = alvo.lstrip("/")
+            else:
+                caminhos[aba.get("name")] = posixpath.normpath(posixpath.join("xl", alvo))
+        return caminhos, EPOCA_MAC if data1904 else EPOCA_WINDOWS
+
+    def _ler_textos_compartilhados(self) -> list:
+        if "xl/sharedStrings.xml" not in self.zip.namelist():
+            return []
+        textos = []
+        with self.zip.open("xl/sharedStrings.xml") as arquivo:
+            for _, elemento in ET.iterparse(arquivo):
+                if elemento.tag == f"{NS_PRINCIPAL}si":
+                    textos.append(self._texto(elemento))
+                    elemento.clear()
+        return textos
+
+    def _texto(self, elemento) -> str:
+        # Junta os trechos de texto (inclusive texto rico), ignorando a fonética (rPh)
+        partes = []
+        for filho in elemento:
+            if filho.tag == f"{NS_PRINCIPAL}t":
+                partes.append(filho.text or "")
+            elif filho.tag == f"{NS_PRINCIPAL}r":
+                partes.extend(t.text or "" for t in filho.iter(f"{NS_PRINCIPAL}t"))
+        return "".join(partes)
+
+    def _ler_estilos(self) -> dict:
+        """Retorna {índice do estilo: é duração} apenas para os estilos com formato de data/hora."""
+        if "xl/styles.xml" not in self.zip.namelist():
+            return {}
+        raiz = ET.fromstring(self.zip.read("xl/styles.xml"))
+        formatos = dict(FORMATOS_DATA_NATIVOS)
+        for formato in raiz.iter(f"{NS_PRINCIPAL}numFmt"):
+            formatos[int(formato.get("numFmtId"))] = formato.get("formatCode", "")
+
+        estilos = {}
+        celulas = raiz.find(f"{NS_PRINCIPAL}cellXfs")
+        if celulas is None:
+            return estilos
+        for indice, estilo in enumerate(celulas.iter(f"{NS_PRINCIPAL}xf")):
+            formato = formatos.get(int(estilo.get("numFmtId", 0)))
+            if formato and _e_formato_data(formato):
+                estilos[indice] = _e_formato_duracao(formato)
+        return estilos
+
+    def _valor(self, celula):
+        tipo = celula.get("t", "n")
+        valor = celula.findtext(f"{NS_PRINCIPAL}v")
+
+        if tipo == "inlineStr":
+            elemento = celula.find(f"{NS_PRINCIPAL}is")
+            return "" if elemento is None else self._texto(elemento)
+        if valor is None:
+            return ""
+        if tipo == "s":
+            return self.textos[int(valor)]
+        if tipo == "str":
+            return valor
+        if tipo == "b":
+            return valor == "1"
+        if tipo == "e":
+            return np.nan
+        if tipo == "d":
+            return datetime.datetime.fromisoformat(valor)
+
+        estilo = int(celula.get("s", 0))
+        if estilo in self.estilos_data:
+            return _converter_serial(float(valor), self.epoca, self.estilos_data[estilo])
+        if "." in valor or "E" in valor or "e" in valor:
+            numero = float(valor)
+            # Mesma conversão do pandas: números inteiros viram int
+            return int(numero) if numero.is_integer() else numero
+        return int(valor)
+
+    def dados_aba(self, aba: str, linhas_necessarias: int | None = None) -> list:
+        """Retorna as linhas da aba como listas de valores, a partir de A1, no formato usado pelo pandas."""
+        if aba not in self._caminhos_abas:
+            raise ValueError(f"Worksheet named '{aba}' not found")
+
+        dados = []
+        ultima_linha_com_dados = -1
+        with self.zip.open(self._caminhos_abas[aba]) as arquivo:
+            for _, elemento in ET.iterparse(arquivo):
+                if elemento.tag != f"{NS_PRINCIPAL}row":
+                    continue
+
+                numero_linha = int(elemento.get("r", len(dados) + 1)) - 1
+                while len(dados) < numero_linha:
+                    dados.append([])
+
+                linha = []
+                for celula in elemento.iter(f"{NS_PRINCIPAL}c"):
+                    referencia = celula.get("r")
+                    if referencia:
+                        coluna = _indice_coluna(_REFERENCIA.match(referencia).group(1))
+                        linha.extend([""] * (coluna - len(linha)))
+                    linha.append(self._valor(celula))
+                elemento.clear()
+
+                while linha and linha[-1] == "":
+                    linha.pop()
+                if linha:
+                    ultima_linha_com_dados = len(dados)
+                dados.append(linha)
+
+                if linhas_necessarias is not None and len(dados) >= linhas_necessarias:
+                    break
+
+        dados = dados[: ultima_linha_com_dados + 1]
+        if dados:
+            largura = max(len(linha) for linha in dados)
+            dados = [linha + [""] * (largura - len(linha)) for linha in dados]
+        return dados
+
+    def parse(self, aba: str, nrows: int | None = None, **kwargs) -> pd.DataFrame:
+        header = kwargs.pop("header", 0)
+        linhas_necessarias = None
+        if nrows is not None and header is not None and not kwargs.get("skiprows"):
+            linhas_necessarias = header + 1 + nrows
+
+        dados = self.dados_aba(aba, linhas_necessarias)
+        if not dados:
+            return pd.DataFrame()
+        try:
+            return TextParser(
+                dados, header=header, nrows=nrows, skip_blank_lines=False, **kwargs
+            ).read(nrows=nrows)
+        except EmptyDataError:
+            return pd.DataFrame()
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import logging
+import os
+
+import pandas as pd
+
+from leitor_fluxo import inicio_do_mes
+
+logger = logging.getLogger(__name__)
+
+
+def hash_arquivo(caminho_completo: str, tamanho_bloco: int = 1024 * 1024) -> str:
+    """Calcula o hash SHA-256 do conteúdo do arquivo."""
+    sha = hashlib.sha256()
+    with open(caminho_completo, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+class ManifestoFluxo:
+    """Esta classe guarda a impressão digital de cada arquivo do fluxo (caminho, tamanho, data de modificação e hash)
+    junto com as linhas já processadas, permitindo reaproveitá-las enquanto o arquivo não mudar.
+    Cada entrada guarda também a `versao` da limpeza que gerou as linhas: com outra versão, o arquivo é reprocessado."""
+
+    NOME_MANIFESTO = "manifesto.json"
+
+    def __init__(self, pasta: str, versao: str = ""):
+        self.pasta = pasta
+        self.versao = versao
+        os.makedirs(self.pasta, exist_ok=True)
+        self.caminho_manifesto = os.path.join(self.pasta, self.NOME_MANIFESTO)
+        self.entradas = self._carregar_manifesto()
+        # Arquivos novos ou modificados nesta execução
+        self.alterados = []
+        # Arquivos que saíram da pasta do fluxo desde a última execução
+        self.removidos = []
+
+    def _carregar_manifesto(self) -> dict:
+        if not os.path.exists(self.caminho_manifesto):
+            return {}
+        try:
+            with open(self.caminho_manifesto, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Manifesto ilegível, todos os arquivos serão reprocessados (%s)", e)
+            return {}
+
+    def _caminho_resultado(self, arquivo: str) -> str:
+        return os.path.join(self.pasta, f"{os.path.splitext(arquivo)[0]}.pkl")
+
+    def inalterado(self, caminho_completo: str) -> bool:
+        arquivo = os.path.basename(caminho_completo)
+        anterior = self.entradas.get(arquivo)
+        if anterior is None or not os.path.exists(self._caminho_resultado(arquivo)):
+            return False
+        if anterior.get("versao") != self.versao:
+            return False
+
+        status = os.stat(caminho_completo)
+        if status.st_size != anterior["tamanho"]:
+            return False
+        if status.st_mtime_ns == anterior["mtime"]:
+            return True
+
+        # Data de modificação diferente com o mesmo tamanho: confirma pelo conteúdo
+        if hash_arquivo(caminho_completo) != anterior["hash"]:
+            return False
+        anterior["mtime"] = status.st_mtime_ns
+        return True
+
+    def carregar_resultado(self, arquivo: str) -> tuple:
+        return pd.read_pickle(self._caminho_resultado(arquivo))
+
+    def registrar(self, caminho_completo: str, resultado: tuple, hash_conteudo: str | None = None) -> None:
+        """Guarda as linhas do arquivo. `hash_conteudo`, se já calculado, evita ler o arquivo de novo."""
+        arquivo = os.path.basename(caminho_completo)
+        status = os.stat(caminho_completo)
+        pd.to_pickle(resultado, self._caminho_resultado(arquivo))
+        self.entradas[arquivo] = {
+            "caminho": caminho_completo,
+            "tamanho": status.st_size,
+            "mtime": status.st_mtime_ns,
+            "hash": hash_conteudo or hash_arquivo(caminho_completo),
+            "versao": self.versao,
+        }
+        self.alterados.append(arquivo)
+
+    def podar(self, arquivos: list) -> None:
+        """Remove do manifesto os arquivos que não existem mais na pasta do fluxo."""
+        for arquivo in set(self.entradas) - set(arquivos):
+            del self.entradas[arquivo]
+            self.removidos.append(arquivo)
+            if os.path.exists(self._caminho_resultado(arquivo)):
+                os.remove(self._caminho_resultado(arquivo))
+
+    def meses_afetados(self) -> list:
+        """Retorna o primeiro dia de cada mês cujos arquivos foram processados ou removidos nesta execução."""
+        return sorted({inicio_do_mes(arquivo) for arquivo in self.alterados + self.removidos})
+
+    def salvar(self) -> None:
+        temporario = f"{self.caminho_manifesto}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.entradas, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, self.caminho_manifesto)
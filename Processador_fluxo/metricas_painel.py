@@ -0,0 +1,229 @@
+from dataclasses import dataclass
+
+import pandas as pd
+
+from dimensao_compromissos import indice_compromissos
+
+# Compromissos que não entram nas entradas e saídas líquidas
+EXCLUIDOS_ENTRADAS = [11, 8, 9]
+EXCLUIDOS_SAIDAS = [94, 98, 97]
+
+
+@dataclass(frozen=True)
+class MetricasPainel:
+    """Medidas e tabelas do painel, calculadas uma única vez por `calcular_metricas`."""
+
+    entradas_liquidas: float
+    saidas_liquidas: float
+    saldo_inicial: float
+    saldo_final: float
+    entradas_saidas: float
+    resgate_aplicacao: float
+    saldo_aplicado: float
+    saldo_total: float
+    saldo_bloqueado: float
+    saldo_investimentos_atual: list
+    saldo_investimentos_bloqueado: list
+    saldo_disponivel: dict
+    fluxo_de_caixa: dict
+    entradas_tipo: dict
+    saidas_tipo: dict
+    total_investimentos_atual: float
+    total_investimentos_bloqueado: float
+    total_saldo_disponivel: float
+    total_entradas_tipo: float
+    total_saidas_tipo: float
+
+
+def _totais_por_compromisso(lancamentos: pd.DataFrame) -> pd.DataFrame:
+    """Uma linha por código de compromisso, com o total, o tipo gravado na carga e
+    o compromisso e o tipo da dimensão de compromissos."""
+    totais = lancamentos.groupby(
+        ["tipos_de_compromisso", "tipo"], as_index=False, observed=True
+    )["valores"].sum()
+    totais["tipos_de_compromisso"] = totais["tipos_de_compromisso"].astype(int)
+
+    indice = indice_compromissos()
+    totais["compromisso"] = indice.compromissos(totais["tipos_de_compromisso"])
+    totais["tipo_dimensao"] = indice.tipos(totais["tipos_de_compromisso"])
+    return totais
+
+
+def _liquido(por_compromisso: pd.DataFrame, tipo: str, excluidos: list) -> float:
+    filtro = (por_compromisso["tipo"] == tipo) & (
+        ~por_compromisso["tipos_de_compromisso"].isin(excluidos)
+    )
+    return round(por_compromisso.loc[filtro, "valores"].sum(), 2)
+
+
+def _tabela_por_tipo(por_compromisso: pd.DataFrame, tipo: str) -> dict:
+    """Total por compromisso do tipo informado (conforme a dimensão), sem os zerados."""
+    tabela = (
+        por_compromisso[por_compromisso["tipo_dimensao"] == tipo]
+        .groupby("compromisso")["valores"]
+        .sum()
+        .round(2)
+        .sort_values(ascending=False)
+    )
+    return tabela[tabela != 0].to_dict()
+
+
+def _totais_por_banco(lancamentos_banco: pd.DataFrame, tipo: str) -> pd.Series:
+    totais = lancamentos_banco[lancamentos_banco["tipo"] == tipo]
+    return totais.groupby("banco", observed=True)["valores"].sum().round(2)
+
+
+def _fluxo_de_caixa(
+    entradas: pd.Series,
+    saidas: pd.Series,
+    saldo_inicial: pd.Series,
+    saldo_final: pd.Series,
+    bancos: list,
+) -> dict:
+    fluxo_de_caixa = {
+        banco: {
+            "saldo_inicial": saldo_inicial.get(banco, 0),
+            "entradas": entradas.get(banco, 0),
+            "saidas": saidas.get(banco, 0),
+            "saldo_final": saldo_final.get(banco, 0),
+        }
+        for banco in bancos
+    }
+    fluxo_de_caixa = dict(
+        sorted(fluxo_de_caixa.items(), key=lambda item: item[1]["entradas"], reverse=True)
+    )
+    fluxo_de_caixa["Totais"] = {
+        "saldo_inicial": saldo_inicial.sum(),
+        "entradas": entradas.sum(),
+        "saidas": saidas.sum(),
+        "saldo_final": saldo_final.sum(),
+    }
+    return fluxo_de_caixa
+
+
+def _saldo_disponivel(saldo_final_por_banco: pd.Series, investimentos: pd.DataFrame) -> dict:
+    """Saldo final mais o saldo disponível dos investimentos, por banco, na última data."""
+    saldo_disponivel_por_banco = (
+        investimentos.groupby("banco", observed=True)["saldo_disponivel"].sum().reset_index()
+    )
+    saldo_total_por_banco = pd.merge(
+        saldo_final_por_banco.reset_index(),
+        saldo_disponivel_por_banco,
+        on="banco",
+        how="outer",
+    ).fillna(0)
+    saldo_total_por_banco["saldo_total"] = (
+        saldo_total_por_banco["valor_saldo_final_inicial"]
+        + saldo_total_por_banco["saldo_disponivel"]
+    )
+    return (
+        saldo_total_por_banco.set_index("banco")["saldo_total"]
+        .sort_values(ascending=False)
+        .round(2)
+        .to_dict()
+    )
+
+
+def _tabela_investimentos(investimentos: pd.DataFrame, coluna: str) -> list:
+    tabela = investimentos.loc[investimentos[coluna] != 0, ["banco", "data", coluna]]
+    tabela = tabela.groupby("banco", as_index=False, observed=True).agg(
+        {coluna: "sum", "data": "first"}
+    )
+    return tabela.sort_values(by=coluna, ascending=False).to_dict(orient="records")
+
+
+def calcular_metricas(
+    saldos: pd.DataFrame,
+    lancamentos: pd.DataFrame,
+    investimentos: pd.DataFrame,
+    lancamentos_banco: pd.DataFrame,
+) -> MetricasPainel:
+    """
+    Calcula todas as medidas do painel com um agrupamento por tabela: lançamentos por
+    compromisso, lançamentos por banco e tipo, saldos por data, rótulo e banco e
+    investimentos da última data.
+    """
+    # Lançamentos por compromisso: entradas/saídas líquidas e tabelas por tipo
+    por_compromisso = _totais_por_compromisso(lancamentos)
+    entradas_tipo = _tabela_por_tipo(por_compromisso, "Entrada")
+    saidas_tipo = _tabela_por_tipo(por_compromisso, "Saída")
+
+    # Lançamentos por banco e tipo
+    entradas_banco = _totais_por_banco(lancamentos_banco, "Entrada")
+    saidas_banco = _totais_por_banco(lancamentos_banco, "Saída")
+
+    # Saldos: um agrupamento por data, rótulo e banco, na ordem em que os bancos aparecem
+    por_data = saldos.groupby(
+        ["data", "saldo_final_inicial", "banco"], sort=False, observed=True
+    )["valor_saldo_final_inicial"].sum().reset_index()
+    rotulos = por_data["saldo_final_inicial"].astype(str).str.upper()
+    iniciais = por_data[rotulos == "SALDO INICIAL"]
+    finais = por_data[rotulos == "SALDO FINAL"]
+    primeira_data, ultima_data = saldos["data"].min(), saldos["data"].max()
+
+    saldo_inicial = round(
+        iniciais.loc[iniciais["data"] == primeira_data, "valor_saldo_final_inicial"].sum(), 2
+    )
+    saldo_final = round(
+        finais.loc[finais["data"] == ultima_data, "valor_saldo_final_inicial"].sum(), 2
+    )
+    fluxo_de_caixa = _fluxo_de_caixa(
+        entradas_banco,
+        saidas_banco,
+        iniciais.groupby("banco", observed=True)["valor_saldo_final_inicial"].sum().round(2),
+        finais.groupby("banco", observed=True)["valor_saldo_final_inicial"].sum().round(2),
+        list(pd.unique(por_data["banco"])),
+    )
+    saldo_disponivel = _saldo_disponivel(
+        finais[finais["data"] == ultima_data]
+        .groupby("banco", observed=True)["valor_saldo_final_inicial"]
+        .sum(),
+        investimentos[investimentos["data"] == ultima_data],
+    )
+
+    # Investimentos: as tabelas usam apenas a última data dos próprios investimentos
+    investimentos_atuais = investimentos[investimentos["data"] == investimentos["data"].max()]
+    saldo_aplicado = round(investimentos_atuais["saldo_atual"].sum(), 2)
+    saldo_investimentos_atual = _tabela_investimentos(
+        investimentos_atuais, "saldo_atual"
+    )
+    saldo_investimentos_atual = [
+        {**linha, "saldo_atual": round(linha["saldo_atual"], 2)}
+        for linha in saldo_investimentos_atual
+    ]
+    saldo_investimentos_bloqueado = _tabela_investimentos(
+        investimentos_atuais.assign(
+            saldo_bloqueado=investimentos_atuais["saldo_bloqueado"].round(2)
+        ),
+        "saldo_bloqueado",
+    )
+
+    return MetricasPainel(
+        entradas_liquidas=_liquido(por_compromisso, "Entrada", EXCLUIDOS_ENTRADAS),
+        saidas_liquidas=_liquido(por_compromisso, "Saída", EXCLUIDOS_SAIDAS),
+        saldo_inicial=saldo_inicial,
+        saldo_final=saldo_final,
+        entradas_saidas=entradas_banco.astype(float).sum() - saidas_banco.astype(float).sum(),
+        resgate_aplicacao=round(
+            investimentos["resgate"].sum() - investimentos["aplicacao"].sum(), 2
+        ),
+        saldo_aplicado=saldo_aplicado,
+        saldo_total=round(saldo_final + saldo_aplicado, 2),
+        # Soma de todo o período consultado, não só da última data
+        saldo_bloqueado=round(investimentos["saldo_bloqueado"].sum(), 2),
+        saldo_investimentos_atual=saldo_investimentos_atual,
+        saldo_investimentos_bloqueado=saldo_investimentos_bloqueado,
+        saldo_disponivel=saldo_disponivel,
+        fluxo_de_caixa=fluxo_de_caixa,
+        entradas_tipo=entradas_tipo,
+        saidas_tipo=saidas_tipo,
+        total_investimentos_atual=sum(
+            linha["saldo_atual"] for linha in saldo_investimentos_atual
+        ),
+        total_investimentos_bloqueado=sum(
+            linha["saldo_bloqueado"] for linha in saldo_investimentos_bloqueado
+        ),
+        total_saldo_disponivel=sum(saldo_disponivel.values()),
+        total_entradas_tipo=sum(entradas_tipo.values()),
+        total_saidas_tipo=sum(saidas_tipo.values()),
+    )
@@ -0,0 +1,48 @@
+import os
+import re
+import time
+
+
+class ObservadorPastaFluxo:
+    """Esta classe observa a pasta do fluxo por polling (funciona igual em pastas locais, de rede e do OneDrive).
+    Um arquivo novo, modificado ou removido só é informado depois de ficar `espera` segundos sem mudar,
+    para que um salvamento em andamento (ou a sincronização do OneDrive) não seja lido pela metade."""
+
+    def __init__(self, caminho: str, filtro: str, espera: float = 5.0):
+        self.caminho = caminho
+        self.filtro = re.compile(filtro)
+        self.espera = espera
+        self._vistos = self._assinaturas()
+        # Arquivo -> instante da última mudança observada
+        self._pendentes = {}
+
+    def _assinaturas(self) -> dict:
+        assinaturas = {}
+        with os.scandir(self.caminho) as entradas:
+            for entrada in entradas:
+                if entrada.is_file() and self.filtro.match(entrada.name):
+                    status = entrada.stat()
+                    assinaturas[entrada.name] = (status.st_mtime_ns, status.st_size)
+        return assinaturas
+
+    def verificar(self) -> list:
+        """Varre a pasta e retorna os arquivos que mudaram e estão estáveis há `espera` segundos."""
+        agora = time.monotonic()
+        atuais = self._assinaturas()
+        for arquivo in set(atuais) | set(self._vistos):
+            if atuais.get(arquivo) != self._vistos.get(arquivo):
+                self._pendentes[arquivo] = agora
+        self._vistos = atuais
+
+        prontos = sorted(
+            arquivo for arquivo, instante in self._pendentes.items() if agora - instante >= self.espera
+        )
+        for arquivo in prontos:
+            del self._pendentes[arquivo]
+        return prontos
+
+    def reagendar(self, arquivos: list) -> None:
+        """Devolve os arquivos à fila, para nova tentativa após `espera` segundos (ex.: falha na carga)."""
+        agora = time.monotonic()
+        for arquivo in arquivos:
+            self._pendentes[arquivo] = agora
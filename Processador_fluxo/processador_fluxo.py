@@ -1,21 +1,66 @@
+import numpy as np
 import pandas as pd
+import argparse
+import logging
 import os
 import re
-from pyfiglet import figlet_format
+import time
 from pathlib import Path
 from unidecode import unidecode
 
 import listas
-import conn_db as db
-import passwd
-import dim
-
-import enviar_painel
+from leitor_fluxo import ABA_INVESTIMENTOS, MOTORES, LeitorPlanilhasFluxo, datas_do_mes, inicio_do_mes
+from manifesto_fluxo import ManifestoFluxo, hash_arquivo
+from cache_fluxo import CacheAbasFluxo
+from instrumentacao import (
+    NIVEIS_LOG,
+    PASTA_METRICAS,
+    Instrumentacao,
+    coagir_numerico,
+    configurar_logging,
+    instrumentacao,
+    usar_instrumentacao,
+)
+
+# Dependências usadas só em algumas etapas (SQLAlchemy na gravação, pyfiglet no banner, psutil no
+# relatório de memória, conexão e dimensões no main) são importadas no ponto de uso: a inicialização fica
+# mais curta e os processos de leitura, que reimportam este módulo, não carregam o que não usam.
+
+# Pasta onde ficam o manifesto dos arquivos processados e as linhas já extraídas
+PASTA_ESTADO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "estado_fluxo")
+# Versão dos DataFrames gerados pelas funções _limpa_*: incremente sempre que colunas, tipos ou valores
+# mudarem, para que as linhas guardadas no manifesto e no cache de abas por uma versão anterior não sejam reaproveitadas
+VERSAO_LIMPEZA = 1
+
+logger = logging.getLogger(__name__)
+
+
+def versao_limpeza(motor: str, usar_layout: bool) -> str:
+    """Versão das linhas guardadas no manifesto e no cache de abas. Inclui o motor de leitura e o uso do
+    layout, que podem gerar DataFrames diferentes (tipos das colunas, colunas fora da região do layout)."""
+    return f"v{VERSAO_LIMPEZA}-{motor}-{'layout' if usar_layout else 'completo'}"
+
+
+def informar_memoria(etapa: str, *tabelas) -> None:
+    """Mostra a memória ocupada pelos DataFrames (ou listas de DataFrames) de uma etapa
+    e, com o psutil instalado, o RSS do processo."""
+    dfs = [df for tabela in tabelas for df in (tabela if isinstance(tabela, list) else [tabela])]
+    megabytes = sum(int(df.memory_usage(deep=True).sum()) for df in dfs) / 1024**2
+    mensagem = f"Memória [{etapa}]: {megabytes:,.1f} MB em {len(dfs)} DataFrame(s)"
+    try:
+        import psutil
+    except ImportError:  # psutil é opcional; sem ele o relatório de memória omite o RSS do processo
+        psutil = None
+    if psutil is not None:
+        mensagem += f" | RSS do processo: {psutil.Process().memory_info().rss / 1024**2:,.1f} MB"
+    logger.info(mensagem)
 
 # Completo
 class ProcessadorFluxoArquivosCaminhoDatas:
     """Esta Classe processa os arquivos do Fluxo de caixa."""
 
+    FILTRO = r"^Fluxo de Caixa Diário \d{2}-\d{4}( atualizado)?\.xlsx$"
+
     def __init__(self, caminho: str):
         self.caminho = caminho
         self.arquivos = self._listar_arquivos_fluxo()
@@ -24,12 +69,11 @@ class ProcessadorFluxoArquivosCaminhoDatas:
     def _listar_arquivos_fluxo(self) -> list:
         arquivos = os.listdir(self.caminho)
         arquivos_fluxo = []
-        filtro = r"^Fluxo de Caixa Diário \d{2}-\d{4}( atualizado)?\.xlsx$"
         # filtro = "Fluxo de Caixa Diário 11-2024.xlsx"
         for arquivo in arquivos:
-            if re.match(filtro, arquivo):
+            if re.match(self.FILTRO, arquivo):
                 arquivos_fluxo.append(arquivo)
-        print(f"Arquivos encontrados: {arquivos_fluxo}")
+        logger.info("Arquivos encontrados: %s", arquivos_fluxo)
         return arquivos_fluxo
 
     def _extrair_datas_dos_arquivos(self) -> list:
@@ -44,9 +88,7 @@ class ProcessadorFluxoArquivosCaminhoDatas:
 class TabelaBancoCompromissoLancamentos:
     """Esta classe manipula os dados do fluxo, limpando e formatando para obter os lançamentos por Banco e Compromisso."""
 
-    def _limpa_fluxo(self, arquivo: str, data: str) -> pd.DataFrame:
-        df_fluxo = pd.read_excel(arquivo, sheet_name=f"{data}")
-
+    def _limpa_fluxo(self, df_fluxo: pd.DataFrame, data: str) -> pd.DataFrame:
         padrao = r"\b\d{1,3} - .+"
 
         # Aplicando o filtro diretamente na primeira coluna
@@ -84,11 +126,24 @@ class TabelaBancoCompromissoLancamentos:
         if dfs:
             return pd.concat(dfs, axis=0)
         else:
-            print("Nenhum DataFrame foi concatenado. Verifique o processo de extração.")
+            logger.warning("Nenhum DataFrame foi concatenado. Verifique o processo de extração.")
             return pd.DataFrame()
 
+    def _codigos_compromisso(self, compromissos: pd.Series) -> pd.Series:
+        """Converte "01 - ..." no código inteiro do compromisso (Int16, nulo quando não há código)."""
+        codigos = compromissos.astype(str).str.extract(r"^(\d{1,3})", expand=False)
+        return pd.to_numeric(codigos).astype("Int16")
+
     def _melt_dataframe(self, df_final: pd.DataFrame) -> pd.DataFrame:
         colunas_fixas = ["tipos de compromisso", "data"]
+        # Converte os valores ainda no formato largo, para que o melt já gere float64
+        # em vez de replicar objetos Python para cada banco
+        df_final = df_final.assign(
+            **{
+                banco: coagir_numerico(df_final[banco]).astype("float64")
+                for banco in listas.colunas_bancos
+            }
+        )
         df_melted = pd.melt(
             df_final,
             id_vars=colunas_fixas,
@@ -97,49 +152,46 @@ class TabelaBancoCompromissoLancamentos:
             value_name="Valores",
         )
 
-        df_melted["Valores"] = pd.to_numeric(df_melted["Valores"], errors="coerce")
-
-        df_melted["Banco"] = df_melted["Banco"].str.upper()
+        df_melted["Banco"] = df_melted["Banco"].str.upper().astype("category")
 
         return df_melted
 
-    def _classifica_tipo(self, compromisso: str) -> str:
-        # Extrai os primeiros três dígitos do código do compromisso
-        codigo = re.match(r"^\d{1,3}", compromisso)
-        if codigo:
-            codigo = codigo.group()
-            if codigo in listas.entradas:
-                return "Entrada"
-            elif codigo in listas.saidas:
-                return "Saída"
-        return "Desconhecido"
+    # Categorias da coluna "Tipo"; a posição de cada uma é o código usado na tabela de tipos.
+    # O painel lê a coluna com as mesmas categorias (esquema.TIPOS)
+    TIPOS = ["Desconhecido", "Entrada", "Saída"]
+    # Posição da tabela de tipos usada para lançamentos sem código numérico
+    SEM_CODIGO = 1000
+
+    def _tabela_tipos(self) -> np.ndarray:
+        """Vetor indexado pelo código do compromisso (até três dígitos) com a posição do tipo em TIPOS."""
+        tabela = np.zeros(self.SEM_CODIGO + 1, dtype=np.int8)
+        tabela[[int(codigo) for codigo in listas.saidas]] = self.TIPOS.index("Saída")
+        tabela[[int(codigo) for codigo in listas.entradas]] = self.TIPOS.index("Entrada")
+        return tabela
 
     def _adicionar_coluna_tipo(self, df_melted: pd.DataFrame) -> pd.DataFrame:
-        df_melted["Tipo"] = df_melted["tipos de compromisso"].apply(
-            self._classifica_tipo
+        # "tipos de compromisso" já contém o código inteiro (ver _codigos_compromisso)
+        posicoes = df_melted["tipos de compromisso"].fillna(self.SEM_CODIGO).to_numpy(dtype=np.int16)
+        df_melted["Tipo"] = pd.Categorical.from_codes(
+            self._tabela_tipos()[posicoes], categories=self.TIPOS
         )
 
-        # Removendo a coluna 'Tipo'
-        df_melted.drop(columns=["Tipo"], inplace=True)
-
         return df_melted
 
     def processar_arquivos(
-        self, caminho: str, arquivos: list, datas: list | None = None
+        self,
+        caminho: str,
+        arquivos: list,
+        datas: list | None = None,
+        planilhas: dict | None = None,
     ) -> list:
+        if planilhas is None:
+            planilhas = LeitorPlanilhasFluxo().ler_arquivos(caminho, arquivos)
         return [
-            self._limpa_fluxo(os.path.join(caminho, arquivo), data)
+            self._limpa_fluxo(planilhas[arquivo][data], data)
             for arquivo in arquivos
-            for data_inicial in [
-                pd.to_datetime(
-                    re.sub(r"^.*(\d{2}-\d{4}).*$", r"01-\1", arquivo), format="%d-%m-%Y"
-                )
-            ]
-            for data in pd.date_range(
-                start=data_inicial,
-                end=pd.offsets.MonthEnd().rollforward(data_inicial),
-                freq="D",
-            ).strftime("%d-%m-%Y")
+            for data in datas_do_mes(arquivo)
+            if data in planilhas[arquivo]
         ]
 
         # dfs = []
@@ -190,6 +242,9 @@ class TabelaBancoCompromissoLancamentos:
     def processar_dados(self, dfs: list) -> pd.DataFrame:
         df_final = self._concatenar_dfs(dfs)
         if not df_final.empty:
+            df_final["tipos de compromisso"] = self._codigos_compromisso(
+                df_final["tipos de compromisso"]
+            )
             df_melted = self._melt_dataframe(df_final)
             df_final_classificado = self._adicionar_coluna_tipo(df_melted)
             return df_final_classificado
@@ -200,10 +255,7 @@ class TabelaBancoCompromissoLancamentos:
 class TabelaSaldoInicialFinal:
     """Esta classe processa e limpa os dados relacionados ao saldo inicial e final."""
 
-    def _limpa_fluxo_corrigido_v2(self, arquivo: str, data: str) -> pd.DataFrame:
-        # Ler o arquivo Excel com a aba correspondente
-        df_fluxo = pd.read_excel(arquivo, sheet_name=f"{data}")
-
+    def _limpa_fluxo_corrigido_v2(self, df_fluxo: pd.DataFrame, data: str) -> pd.DataFrame:
         # Filtrar as linhas para incluir apenas as que contêm "SALDO FINAL" ou "SALDO INICIAL"
         df_filtrado = df_fluxo[
             df_fluxo.iloc[:, 0].isin(["SALDO FINAL", "SALDO INICIAL"])
@@ -255,6 +307,14 @@ class TabelaSaldoInicialFinal:
                 "Nenhuma das colunas de bancos esperadas está presente no DataFrame."
             )
 
+        # Converte os valores antes do melt, para que ele já gere float64
+        df_filtrado = df_filtrado.assign(
+            **{
+                banco: coagir_numerico(df_filtrado[banco]).astype("float64")
+                for banco in colunas_bancos_existentes
+            }
+        )
+
         # Transformar as colunas selecionadas em linhas (melt/unpivot) apenas para as colunas presentes
         df_melted = pd.melt(
             df_filtrado,
@@ -277,25 +337,29 @@ class TabelaSaldoInicialFinal:
         # Deixa o numero como um float e arrenda para 2 numeros depois da vírgula
         df_melted["Valor"] = df_melted["Valor"].astype("float64").round(decimals=2)
 
+        # Rótulos e bancos se repetem em todas as linhas
+        df_melted["Saldo FINAL/INICIAL"] = df_melted["Saldo FINAL/INICIAL"].astype("category")
+        df_melted["Banco"] = df_melted["Banco"].astype("category")
+
         # Renomear a coluna de valor final
         df_melted.rename(columns={"Valor": "Valor Saldo Final/inicial"}, inplace=True)
 
         return df_melted
 
-    def processar_arquivos(self, caminho: str, arquivos: list, datas: list|None = None) -> list:
+    def processar_arquivos(
+        self,
+        caminho: str,
+        arquivos: list,
+        datas: list | None = None,
+        planilhas: dict | None = None,
+    ) -> list:
+        if planilhas is None:
+            planilhas = LeitorPlanilhasFluxo().ler_arquivos(caminho, arquivos)
         return [
-            self._limpa_fluxo_corrigido_v2(os.path.join(caminho, arquivo), data)
+            self._limpa_fluxo_corrigido_v2(planilhas[arquivo][data], data)
             for arquivo in arquivos
-            for data_inicial in [
-                pd.to_datetime(
-                    re.sub(r"^.*(\d{2}-\d{4}).*$", r"01-\1", arquivo), format="%d-%m-%Y"
-                )
-            ]
-            for data in pd.date_range(
-                start=data_inicial,
-                end=pd.offsets.MonthEnd().rollforward(data_inicial),
-                freq="D",
-            ).strftime("%d-%m-%Y")
+            for data in datas_do_mes(arquivo)
+            if data in planilhas[arquivo]
         ]
         
         # dfs = []
@@ -346,7 +410,7 @@ class TabelaSaldoInicialFinal:
     def processar_dados(self, dfs: list) -> pd.DataFrame:
         df_concatenado = pd.concat(dfs, axis=0)
         if df_concatenado.empty:
-            print("Nenhum dado para processar.")
+            logger.warning("Nenhum dado para processar.")
             return pd.DataFrame()
         df_final = self._concatenando_colunas(df_concatenado)
         return df_final
@@ -356,10 +420,9 @@ class TabelaSaldoInicialFinal:
 class TabelaInvestimentos:
     """Esta classe processa os dados relacionados aos investimentos."""
 
-    def _limpa_fluxo_investimentos(self, arquivo: str) -> pd.DataFrame:
-        # Carregar apenas a sheet "Investimentos"
-        df_fluxo = pd.read_excel(arquivo, sheet_name="Investimentos")
+    COLUNAS_CATEGORICAS = ["banco", "modalidade", "tipo de bloqueio"]
 
+    def _limpa_fluxo_investimentos(self, df_fluxo: pd.DataFrame, arquivo: str) -> pd.DataFrame:
         # Remover colunas que começam com "unnamed" ou contêm "total"
         df_fluxo = df_fluxo.loc[
             :, ~df_fluxo.columns.str.contains("^unnamed|total", case=False)
@@ -400,15 +463,19 @@ class TabelaInvestimentos:
         
         datas_validas = pd.date_range(start=data_inicial, end=data_final, freq="D")
 
-        print(f"{datas_validas}")
-
         df_fluxo["data.1"] = pd.to_datetime(df_fluxo["data.1"])
 
-        print(f"{df_fluxo['data.1']}")
-
+        linhas_aba = len(df_fluxo)
         df_fluxo = df_fluxo[df_fluxo["data.1"].isin(datas_validas)]
 
-        print(f"{df_fluxo}")
+        logger.debug(
+            "%s: %d de %d linhas de investimentos entre %s e %s",
+            arquivo,
+            len(df_fluxo),
+            linhas_aba,
+            data_inicial.date(),
+            data_final.date(),
+        )
 
         df_fluxo.drop(columns=colunas_existentes, inplace=True)
 
@@ -427,7 +494,7 @@ class TabelaInvestimentos:
 
         for coluna in listas.colunas_para_formatar_money:
             if coluna in df.columns:
-                df[coluna] = pd.to_numeric(df[coluna], errors="coerce").fillna(0)
+                df[coluna] = coagir_numerico(df[coluna]).fillna(0)
 
         # Formatar as colunas no formato com 2 decimais
         for coluna in listas.colunas_para_formatar_money:
@@ -439,45 +506,191 @@ class TabelaInvestimentos:
             if coluna in df.columns:
                 df[coluna] = df[coluna].astype("float64")
 
+        # Colunas de texto com poucos valores distintos
+        for coluna in self.COLUNAS_CATEGORICAS:
+            if coluna in df.columns:
+                df[coluna] = df[coluna].astype("category")
+
         return df
 
     def processar_arquivos(
-        self, caminho: str, arquivos: list, investimentos: list
+        self,
+        caminho: str,
+        arquivos: list,
+        investimentos: list,
+        planilhas: dict | None = None,
     ) -> list:
         dfs = []
-        
+
+        if planilhas is None:
+            planilhas = LeitorPlanilhasFluxo().ler_arquivos(caminho, arquivos)
+
         for arquivo in arquivos:
-            caminho_completo = os.path.join(caminho, arquivo)
-            xls = pd.ExcelFile(caminho_completo)
-            sheets = xls.sheet_names
-            sheets = [sheet for sheet in sheets if sheet == "Investimentos"]
-            
+            sheets = [sheet for sheet in planilhas[arquivo] if sheet == ABA_INVESTIMENTOS]
+
             if not sheets:
-                print(f"Aviso: Nenhuma folha correspondente encontrada em {arquivo}")
+                logger.warning("Nenhuma folha correspondente encontrada em %s", arquivo)
                 continue
 
             for sheet in sheets:
-                print(f"Processando {arquivo} - Folha: {sheet}", end="\r")
-                df = self._limpa_fluxo_investimentos(caminho_completo)
+                logger.debug("Processando %s - Folha: %s", arquivo, sheet)
+                df = self._limpa_fluxo_investimentos(planilhas[arquivo][sheet], arquivo)
                 if not df.empty:
                     dfs.append(df)
                 else:
-                    print(
-                        f"Aviso: DataFrame vazio retornado para {arquivo} - Folha: {sheet}"
-                    )
+                    logger.warning("DataFrame vazio retornado para %s - Folha: %s", arquivo, sheet)
 
         return dfs
 
     def processar_dados(self, dfs: list) -> pd.DataFrame:
         df_concatenado = pd.concat(dfs, axis=0)
         if df_concatenado.empty:
-            print("Nenhum dado para processar.")
+            logger.warning("Nenhum dado para processar.")
             return pd.DataFrame()
         df_final = self._formata_numeros(df_concatenado)
         return df_final
 
 
-def processar_tabelas():
+def _limpar_aba(arquivo: str, aba: str, df_aba: pd.DataFrame) -> tuple:
+    """Extrai de uma aba os DataFrames limpos de lançamentos, saldos e investimentos."""
+    if aba == ABA_INVESTIMENTOS:
+        return (
+            [],
+            [],
+            TabelaInvestimentos().processar_arquivos(
+                "", [arquivo], [], planilhas={arquivo: {aba: df_aba}}
+            ),
+        )
+    return (
+        [TabelaBancoCompromissoLancamentos()._limpa_fluxo(df_aba, aba)],
+        [TabelaSaldoInicialFinal()._limpa_fluxo_corrigido_v2(df_aba, aba)],
+        [],
+    )
+
+
+def processar_arquivo_fluxo(
+    caminho_completo: str,
+    abas: list | None = None,
+    cache: CacheAbasFluxo | None = None,
+    hash_conteudo: str | None = None,
+    motor: str = "openpyxl",
+    usar_layout: bool = True,
+) -> tuple:
+    """Lê um arquivo do fluxo uma única vez e extrai os DataFrames limpos das três tabelas.
+    Abas já presentes no cache não são lidas do Excel."""
+    arquivo = os.path.basename(caminho_completo)
+    if abas is None:
+        abas = datas_do_mes(arquivo) + [ABA_INVESTIMENTOS]
+
+    with instrumentacao().etapa("arquivo", arquivo=arquivo) as etapa_arquivo:
+        por_aba = {}
+        if cache is not None:
+            hash_conteudo = hash_conteudo or hash_arquivo(caminho_completo)
+            for aba in abas:
+                em_cache = cache.carregar(hash_conteudo, aba)
+                if em_cache is not None:
+                    por_aba[aba] = em_cache
+
+        faltantes = [aba for aba in abas if aba not in por_aba]
+        if faltantes:
+            colunas_bancos = (
+                listas.colunas_bancos + listas.colunas_bancos_saldos if usar_layout else None
+            )
+            planilhas = LeitorPlanilhasFluxo(motor, colunas_bancos).ler_arquivo(
+                caminho_completo, faltantes
+            )
+            for aba in faltantes:
+                if aba in planilhas:
+                    with instrumentacao().etapa("limpar_aba", aba=aba) as etapa:
+                        etapa.linhas_entrada = len(planilhas[aba])
+                        por_aba[aba] = _limpar_aba(arquivo, aba, planilhas[aba])
+                        etapa.linhas_saida = sum(len(df) for dfs in por_aba[aba] for df in dfs)
+                else:
+                    por_aba[aba] = ([], [], [])
+                if cache is not None:
+                    cache.gravar(hash_conteudo, aba, por_aba[aba])
+
+        resultado = ([], [], [])
+        for aba in abas:
+            for dfs, dfs_aba in zip(resultado, por_aba[aba]):
+                dfs.extend(dfs_aba)
+        etapa_arquivo.atributos["abas_em_cache"] = len(abas) - len(faltantes)
+        etapa_arquivo.linhas_saida = sum(len(df) for dfs in resultado for df in dfs)
+    return resultado
+
+
+def _processar_tarefa(tarefa: tuple) -> tuple:
+    """Processa a tarefa em um processo de leitura e devolve também as etapas medidas nele."""
+    with usar_instrumentacao(Instrumentacao()) as registro:
+        resultado = processar_arquivo_fluxo(*tarefa)
+    return resultado, registro.etapas
+
+
+def processar_arquivos_fluxo(
+    caminhos_completos: list,
+    trabalhadores: int = 1,
+    abas_por_tarefa: int = 8,
+    cache: CacheAbasFluxo | None = None,
+    motor: str = "openpyxl",
+    usar_layout: bool = True,
+    hashes: list | None = None,
+    executor=None,
+) -> list:
+    """Processa os arquivos do fluxo, opcionalmente distribuindo os grupos de abas entre vários processos.
+    O resultado de cada arquivo é remontado na mesma ordem do processamento serial.
+    `hashes`, se já calculados, evitam ler os arquivos de novo para o cache de abas.
+    Com `executor` (um `ProcessPoolExecutor` mantido por quem chama, como no modo observação), as tarefas
+    usam os processos dele, que não é encerrado aqui, em vez de abrir `trabalhadores` processos novos."""
+    if hashes is None:
+        hashes = [
+            hash_arquivo(caminho) if cache is not None else None
+            for caminho in caminhos_completos
+        ]
+    if executor is None and trabalhadores <= 1:
+        return [
+            processar_arquivo_fluxo(caminho, None, cache, hash_conteudo, motor, usar_layout)
+            for caminho, hash_conteudo in zip(caminhos_completos, hashes)
+        ]
+
+    tarefas = []
+    for indice, caminho in enumerate(caminhos_completos):
+        abas = datas_do_mes(caminho) + [ABA_INVESTIMENTOS]
+        for inicio in range(0, len(abas), abas_por_tarefa):
+            tarefas.append(
+                (
+                    indice,
+                    (
+                        caminho,
+                        abas[inicio : inicio + abas_por_tarefa],
+                        cache,
+                        hashes[indice],
+                        motor,
+                        usar_layout,
+                    ),
+                )
+            )
+    from concurrent.futures import ProcessPoolExecutor
+    from contextlib import nullcontext
+
+    resultados = [([], [], []) for _ in caminhos_completos]
+    if executor is None:
+        contexto = ProcessPoolExecutor(max_workers=trabalhadores)
+    else:
+        # Executor mantido por quem chama: é reaproveitado e continua aberto ao fim
+        contexto = nullcontext(executor)
+    with contexto as executor:
+        # executor.map devolve os resultados na ordem das tarefas
+        parciais = executor.map(_processar_tarefa, [tarefa for _, tarefa in tarefas])
+        for (indice, _), (parcial, etapas) in zip(tarefas, parciais):
+            for dfs, dfs_parcial in zip(resultados[indice], parcial):
+                dfs.extend(dfs_parcial)
+            instrumentacao().anexar(etapas)
+
+    return resultados
+
+
+def caminho_pasta_fluxo() -> str:
+    """Pasta dos arquivos do fluxo, sincronizada pelo OneDrive."""
     # caminho = R"C:\Users\pedro.bertoldo\OneDrive - Balaroti Comércio de Materiais de Construção SA\Documentos Compartilhados - Planejamento Financeiro\_Projetos Caixa\arquivos fluxo de caixa"
     # caminho = R"\\portaarquivos\Financeiro\Pedro\Processador_fluxo\Arquivos_fluxo"
     # caminho = R"\\portaarquivos\Financeiro\Fluxo de Caixa Diário\2024"
@@ -486,63 +699,151 @@ def processar_tabelas():
     )
     pasta_fluxo = R"Shared Documents - Tesouraria\Fluxo de Caixa Diário\2024"
     caminho = f"{caminho_onedrive}"
-    processador = ProcessadorFluxoArquivosCaminhoDatas(f"{caminho}/{pasta_fluxo}")
+    return f"{caminho}/{pasta_fluxo}"
+
+
+def processar_tabelas(
+    pasta_estado: str = PASTA_ESTADO,
+    trabalhadores: int = 1,
+    usar_cache: bool = True,
+    reconstruir_cache: bool = False,
+    limite_cache_mb: int = 512,
+    motor: str = "openpyxl",
+    usar_layout: bool = True,
+    somente_meses_afetados: bool = False,
+    executor=None,
+):
+    """Processa os arquivos novos ou modificados e monta as tabelas de lançamentos, saldos e investimentos.
+    Com `somente_meses_afetados`, as tabelas têm apenas os meses de `manifesto.meses_afetados()`: as linhas
+    dos demais arquivos inalterados nem são carregadas do manifesto (carga por partição do modo observação).
+    O `executor`, se informado, é repassado ao `processar_arquivos_fluxo`."""
+    processador = ProcessadorFluxoArquivosCaminhoDatas(caminho_pasta_fluxo())
+
+    logger.info("Processando Arquivos...")
+    versao = versao_limpeza(motor, usar_layout)
+    manifesto = ManifestoFluxo(pasta_estado, versao)
+    cache = None
+    if usar_cache:
+        cache = CacheAbasFluxo(os.path.join(pasta_estado, "cache_abas"), limite_cache_mb, versao)
+        if reconstruir_cache:
+            logger.info("Reconstruindo o cache de abas...")
+            cache.limpar()
+
+    resultados = {}
+    inalterados = []
+    pendentes = []
+    for arquivo in processador.arquivos:
+        caminho_completo = os.path.join(processador.caminho, arquivo)
+        if not reconstruir_cache and manifesto.inalterado(caminho_completo):
+            inalterados.append(arquivo)
+        else:
+            logger.info("Processando Arquivo: %s", arquivo)
+            pendentes.append(caminho_completo)
+
+    with instrumentacao().etapa("ler_arquivos", arquivos=len(pendentes)) as etapa:
+        # Cada arquivo é lido uma vez para o hash, usado pelo cache de abas e pelo manifesto
+        hashes = [hash_arquivo(caminho_completo) for caminho_completo in pendentes]
+        for caminho_completo, hash_conteudo, resultado in zip(
+            pendentes,
+            hashes,
+            processar_arquivos_fluxo(
+                pendentes,
+                trabalhadores,
+                cache=cache,
+                motor=motor,
+                usar_layout=usar_layout,
+                hashes=hashes,
+                executor=executor,
+            ),
+        ):
+            manifesto.registrar(caminho_completo, resultado, hash_conteudo)
+            resultados[os.path.basename(caminho_completo)] = resultado
+        etapa.linhas_saida = sum(
+            len(df) for resultado in resultados.values() for dfs in resultado for df in dfs
+        )
+
+    manifesto.podar(processador.arquivos)
+    arquivos = processador.arquivos
+    if somente_meses_afetados:
+        # Cada arquivo só tem linhas do seu mês (datas_do_mes e o filtro dos investimentos)
+        meses = set(manifesto.meses_afetados())
+        arquivos = [arquivo for arquivo in arquivos if inicio_do_mes(arquivo) in meses]
+    for arquivo in inalterados:
+        if arquivo in arquivos:
+            logger.info("Arquivo inalterado, reaproveitando linhas: %s", arquivo)
+            resultados[arquivo] = manifesto.carregar_resultado(arquivo)
+
+    dfs_tabela_1, dfs_tabela_2, dfs_tabela_3 = [], [], []
+    for arquivo in arquivos:
+        dfs_1, dfs_2, dfs_3 = resultados[arquivo]
+        dfs_tabela_1.extend(dfs_1)
+        dfs_tabela_2.extend(dfs_2)
+        dfs_tabela_3.extend(dfs_3)
+    del resultados
+    informar_memoria("abas limpas", dfs_tabela_1, dfs_tabela_2, dfs_tabela_3)
+
+    # O manifesto só é salvo depois da carga no banco (ver main)
+    if cache is not None:
+        cache.aplicar_limite()
+    logger.info("Arquivos novos ou modificados: %s", manifesto.alterados)
+    if not arquivos:
+        # Nenhum mês afetado ou apenas arquivos removidos: os meses são só apagados do banco
+        logger.info("Nenhum arquivo nos meses afetados")
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), manifesto
 
     # Tabela 1
 
-    print("\nProcessando Tabela com TabelaBancoCompromissoLancamentos...\n")
+    logger.info("Processando Tabela com TabelaBancoCompromissoLancamentos...")
     tabela_1 = TabelaBancoCompromissoLancamentos()
-    print("\nProcessando Arquivos...\n")
-    dfs_tabela_1 = tabela_1.processar_arquivos(
-        processador.caminho, processador.arquivos, processador.datas
-    )
-    print("\nProcessando Dados...\n")
-    tabela_BancoCompromissoLancamentos = tabela_1.processar_dados(dfs_tabela_1)
-    tabela_BancoCompromissoLancamentos_formatada = formata_tabelas(
-        tabela_BancoCompromissoLancamentos
-    )
-
-    print(formata_tabelas(tabela_BancoCompromissoLancamentos))
+    with instrumentacao().etapa("lancamentos") as etapa:
+        etapa.linhas_entrada = sum(len(df) for df in dfs_tabela_1)
+        tabela_BancoCompromissoLancamentos = tabela_1.processar_dados(dfs_tabela_1)
+        # As abas limpas já estão na tabela final e podem ser liberadas
+        dfs_tabela_1.clear()
+        tabela_BancoCompromissoLancamentos_formatada = formata_tabelas(
+            tabela_BancoCompromissoLancamentos
+        )
+        etapa.linhas_saida = len(tabela_BancoCompromissoLancamentos_formatada)
+    informar_memoria("lançamentos", tabela_BancoCompromissoLancamentos)
+    logger.debug("Lançamentos:\n%s", tabela_BancoCompromissoLancamentos_formatada)
 
     # Tabela 2
 
-    print("\nProcessando Tabela com TabelaSaldoInicialFinal...\n")
+    logger.info("Processando Tabela com TabelaSaldoInicialFinal...")
     tabela_2 = TabelaSaldoInicialFinal()
-    print("\nProcessando Arquivos...\n")
-    dfs_tabela_2 = tabela_2.processar_arquivos(
-        processador.caminho, processador.arquivos, processador.datas
-    )
-    print("\nProcessando Dados...\n")
-    tabela_SaldoInicialFinal = tabela_2.processar_dados(dfs_tabela_2)
-    tabela_SaldoInicialFinal_formatada = formata_tabelas(tabela_SaldoInicialFinal)
-
-    print(formata_tabelas(tabela_SaldoInicialFinal))
+    with instrumentacao().etapa("saldos") as etapa:
+        etapa.linhas_entrada = sum(len(df) for df in dfs_tabela_2)
+        tabela_SaldoInicialFinal = tabela_2.processar_dados(dfs_tabela_2)
+        dfs_tabela_2.clear()
+        tabela_SaldoInicialFinal_formatada = formata_tabelas(tabela_SaldoInicialFinal)
+        etapa.linhas_saida = len(tabela_SaldoInicialFinal_formatada)
+    informar_memoria("saldos", tabela_SaldoInicialFinal)
+    logger.debug("Saldos:\n%s", tabela_SaldoInicialFinal_formatada)
 
     # Tabela 3
 
-    print("Processando Arquivos com TabelaInvestimentos...")
+    logger.info("Processando Tabela com TabelaInvestimentos...")
     tabela_3 = TabelaInvestimentos()
-    print("Processando Arquivos")
-    dfs_tabela_3 = tabela_3.processar_arquivos(
-        processador.caminho, processador.arquivos, processador.datas
-    )
-    print("Processando Dados")
-    tabela_insvestimentos = tabela_3.processar_dados(dfs_tabela_3)
-    tabela_insvestimentos_formatada = formata_tabelas(tabela_insvestimentos)
-
-    print(formata_tabelas(tabela_insvestimentos))
+    with instrumentacao().etapa("investimentos") as etapa:
+        etapa.linhas_entrada = sum(len(df) for df in dfs_tabela_3)
+        tabela_insvestimentos = tabela_3.processar_dados(dfs_tabela_3)
+        dfs_tabela_3.clear()
+        tabela_insvestimentos_formatada = formata_tabelas(tabela_insvestimentos)
+        etapa.linhas_saida = len(tabela_insvestimentos_formatada)
+    informar_memoria("investimentos", tabela_insvestimentos)
+    logger.debug("Investimentos:\n%s", tabela_insvestimentos_formatada)
 
     return (
         tabela_BancoCompromissoLancamentos_formatada,
         tabela_SaldoInicialFinal_formatada,
         tabela_insvestimentos_formatada,
+        manifesto,
     )
 
 
 def formata_tabelas(tabela: pd.DataFrame) -> pd.DataFrame:
     """Função que formata as colunas do Dataframe no padrão do banco de dados"""
-    print(f"{tabela.columns = }")
-    print(f"{tabela.empty = }")
+    logger.debug("Formatando colunas: %s", list(tabela.columns))
     if tabela.empty:
         return tabela
     tabela.columns = (
@@ -555,6 +856,21 @@ def formata_tabelas(tabela: pd.DataFrame) -> pd.DataFrame:
     return tabela
 
 
+def resumir_lancamentos(lancamentos: pd.DataFrame) -> tuple:
+    """Retorna os totais diários dos lançamentos por (data, banco, tipo) e por (data, compromisso),
+    gravados junto com as tabelas do fluxo para que o painel não precise agregar os lançamentos."""
+    if lancamentos.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    por_banco_tipo = lancamentos.groupby(
+        ["data", "banco", "tipo"], as_index=False, observed=True
+    )["valores"].sum()
+    por_compromisso = lancamentos.groupby(
+        ["data", "tipos_de_compromisso", "tipo"], as_index=False, observed=True
+    )["valores"].sum()
+    return por_banco_tipo, por_compromisso
+
+
 def salvar_em_postgres(
     lancamentos: pd.DataFrame,
     saldos: pd.DataFrame,
@@ -563,10 +879,31 @@ def salvar_em_postgres(
     dim_compromissos: pd.DataFrame,
     dim_data: pd.DataFrame,
     engine,
+    metodo: str = "copy",
+    meses: list | None = None,
 ) -> None:
-    lancamentos.to_sql("fluxo_lancamentos", engine, if_exists="replace", index=True)
-    saldos.to_sql("fluxo_saldos", engine, if_exists="replace", index=True)
-    investimentos.to_sql("fluxo_investimentos", engine, if_exists="replace", index=True)
+    """Grava as tabelas no PostgreSQL, com o esquema de `esquema.py`, em uma única transação.
+    Sem `meses`, as tabelas são recriadas por completo; com `meses`, apenas esses meses são apagados e regravados."""
+    from carga_postgres import salvar_particoes, salvar_tabela
+
+    resumo_banco_tipo, resumo_compromisso = resumir_lancamentos(lancamentos)
+    tabelas = {
+        "fluxo_lancamentos": lancamentos,
+        "fluxo_saldos": saldos,
+        "fluxo_investimentos": investimentos,
+        "fluxo_resumo_banco_tipo": resumo_banco_tipo,
+        "fluxo_resumo_compromisso": resumo_compromisso,
+    }
+    with instrumentacao().etapa("salvar_em_postgres", metodo=metodo), engine.begin() as conexao:
+        if meses is not None:
+            logger.info("Meses regravados: %s", [mes.strftime("%m-%Y") for mes in meses])
+        for nome, tabela in tabelas.items():
+            with instrumentacao().etapa("tabela", tabela=nome) as etapa:
+                etapa.linhas_entrada = len(tabela)
+                if meses is None:
+                    salvar_tabela(tabela, nome, conexao, metodo)
+                else:
+                    salvar_particoes(tabela, nome, conexao, meses, metodo)
     # dim_contas.to_sql("fluxo_dim_contas", engine, if_exists="replace", index=True)
     # dim_compromissos.to_sql(
     #     "fluxo_dim_compromissos", engine, if_exists="replace", index=True
@@ -574,7 +911,202 @@ def salvar_em_postgres(
     # dim_data.to_sql("fluxo_dim_datas", engine, if_exists="replace", index=True)
 
 
+def _carregar_alteracoes(engine, metodo: str, **opcoes) -> None:
+    """Reprocessa os arquivos novos ou modificados e regrava no PostgreSQL apenas os meses afetados.
+    As tabelas são montadas só com as linhas desses meses, e o tempo da carga não cresce com o histórico.
+    Se alguma tabela ainda não existir (ou não seguir o esquema), todas são montadas e recriadas por completo."""
+    import dim
+    from carga_postgres import particoes_disponiveis
+
+    with engine.connect() as conexao:
+        por_particao = particoes_disponiveis(conexao)
+    if not por_particao:
+        logger.info("Tabelas ausentes ou fora do esquema: carga completa")
+    with instrumentacao().etapa("processar_tabelas"):
+        lancamentos, saldos, investimentos, manifesto = processar_tabelas(
+            somente_meses_afetados=por_particao, **opcoes
+        )
+    salvar_em_postgres(
+        lancamentos,
+        saldos,
+        investimentos,
+        dim.contas,
+        dim.compromissos,
+        dim.datas,
+        engine,
+        metodo,
+        manifesto.meses_afetados() if por_particao else None,
+    )
+    manifesto.salvar()
+
+
+def observar_pasta_fluxo(
+    engine,
+    metodo: str = "copy",
+    intervalo: float = 2.0,
+    espera: float = 5.0,
+    pasta_metricas: str = PASTA_METRICAS,
+    **opcoes,
+) -> None:
+    """
+    Mantém o processo aberto observando a pasta do fluxo. A cada salvamento de uma planilha (após `espera`
+    segundos sem novas mudanças), reprocessa só os arquivos alterados (manifesto e cache de abas) e regrava
+    os seus meses (`salvar_particoes`) usando o mesmo `engine`, cujas conexões ficam no pool entre as cargas.
+    As métricas de cada carga são exportadas em `pasta_metricas`. As `opcoes` são repassadas ao `processar_tabelas`.
+    Com `trabalhadores > 1`, um único `ProcessPoolExecutor` atende todas as cargas: os processos são abertos
+    uma vez, e não a cada salvamento.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    from observador_fluxo import ObservadorPastaFluxo
+
+    observador = ObservadorPastaFluxo(
+        caminho_pasta_fluxo(), ProcessadorFluxoArquivosCaminhoDatas.FILTRO, espera
+    )
+    trabalhadores = opcoes.get("trabalhadores", 1)
+    if trabalhadores > 1:
+        opcoes["executor"] = ProcessPoolExecutor(max_workers=trabalhadores)
+    try:
+        # Arquivos alterados enquanto o processo estava parado entram na primeira carga
+        logger.info("Carga inicial...")
+        try:
+            _carregar_alteracoes(engine, metodo, **opcoes)
+        finally:
+            instrumentacao().exportar("processador_fluxo", pasta_metricas)
+        opcoes["reconstruir_cache"] = False
+
+        logger.info(
+            "Observando %s a cada %ss (carga %ss após o último salvamento). Ctrl+C para encerrar.",
+            observador.caminho,
+            intervalo,
+            espera,
+        )
+        while True:
+            time.sleep(intervalo)
+            arquivos = observador.verificar()
+            if not arquivos:
+                continue
+
+            logger.info("Arquivos alterados: %s", arquivos)
+            # Cada carga é uma execução: as métricas exportadas descrevem só a última
+            instrumentacao().reiniciar()
+            inicio = time.perf_counter()
+            try:
+                _carregar_alteracoes(engine, metodo, **opcoes)
+            except Exception as erro:
+                # O manifesto não foi salvo: os arquivos são reprocessados na próxima tentativa
+                logger.exception("Erro na carga, nova tentativa em %ss", espera)
+                observador.reagendar(arquivos)
+                if isinstance(erro, BrokenProcessPool):
+                    # Um processo do executor morreu (ex.: falta de memória) e o executor não aceita mais tarefas
+                    opcoes["executor"] = ProcessPoolExecutor(max_workers=trabalhadores)
+                continue
+            finally:
+                instrumentacao().exportar("processador_fluxo", pasta_metricas)
+            logger.info("Carga concluída em %.1fs", time.perf_counter() - inicio)
+    except KeyboardInterrupt:
+        logger.info("Observação encerrada.")
+    finally:
+        if "executor" in opcoes:
+            opcoes["executor"].shutdown(cancel_futures=True)
+
+
+def _argumentos() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Processa os arquivos do Fluxo de Caixa Diário.")
+    parser.add_argument(
+        "--trabalhadores",
+        type=int,
+        default=1,
+        help="Número de processos usados para ler as abas dos arquivos (padrão: 1, serial).",
+    )
+    parser.add_argument(
+        "--sem-cache",
+        action="store_true",
+        help="Ignora o cache de abas em Parquet (não lê nem grava).",
+    )
+    parser.add_argument(
+        "--reconstruir-cache",
+        action="store_true",
+        help="Apaga o cache de abas e reprocessa todos os arquivos.",
+    )
+    parser.add_argument(
+        "--limite-cache-mb",
+        type=int,
+        default=512,
+        help="Tamanho máximo do cache de abas em MB (padrão: 512).",
+    )
+    parser.add_argument(
+        "--motor",
+        choices=MOTORES,
+        default="openpyxl",
+        help="Motor de leitura do Excel; abas que falharem são relidas com o openpyxl (padrão: openpyxl).",
+    )
+    parser.add_argument(
+        "--sem-layout",
+        action="store_true",
+        help="Lê todas as abas por completo, sem usar o layout aprendido na primeira aba.",
+    )
+    parser.add_argument(
+        "--metodo-insercao",
+        choices=["copy", "insert"],
+        default="copy",
+        help="Envia as linhas ao PostgreSQL com COPY FROM STDIN ou com INSERTs do pandas (padrão: copy).",
+    )
+    parser.add_argument(
+        "--modo-carga",
+        choices=["substituir", "particao"],
+        default="substituir",
+        help="Substitui as tabelas inteiras ou regrava apenas os meses dos arquivos novos, "
+        "modificados ou removidos nesta execução (padrão: substituir).",
+    )
+    parser.add_argument(
+        "--observar",
+        action="store_true",
+        help="Fica em execução observando a pasta do fluxo e recarrega, no modo partição, "
+        "os arquivos salvos (Ctrl+C para encerrar).",
+    )
+    parser.add_argument(
+        "--intervalo",
+        type=float,
+        default=2.0,
+        help="Com --observar, segundos entre as verificações da pasta (padrão: 2).",
+    )
+    parser.add_argument(
+        "--espera",
+        type=float,
+        default=5.0,
+        help="Com --observar, segundos sem mudanças no arquivo antes de recarregá-lo (padrão: 5).",
+    )
+    parser.add_argument(
+        "--log-nivel",
+        choices=NIVEIS_LOG,
+        default="INFO",
+        help="Nível das mensagens de log; DEBUG inclui o tempo de cada etapa e aba (padrão: INFO).",
+    )
+    parser.add_argument(
+        "--pasta-metricas",
+        default=PASTA_METRICAS,
+        help="Pasta dos arquivos de métricas da execução, metricas_processador_fluxo.json e .prom "
+        "(padrão: estado_fluxo).",
+    )
+    parser.add_argument(
+        "--rastrear-alocacoes",
+        action="store_true",
+        help="Registra também o pico de alocações de cada etapa com o tracemalloc (deixa a execução mais lenta).",
+    )
+    return parser.parse_args()
+
+
 def main():
+    args = _argumentos()
+    configurar_logging(args.log_nivel)
+    instrumentacao().reiniciar(args.rastrear_alocacoes)
+
+    import conn_db as db
+    import dim
+    import passwd
+    from pyfiglet import figlet_format
 
     print(f"{figlet_format("Cashflow\nProcessor",font='slant')}\nby Pedro")
 
@@ -584,32 +1116,63 @@ def main():
     password = passwd.password
     port = passwd.port
 
-    print("\nIniciando Processa Fluxo...\n")
-    lancamentos, saldos, investimentos = processar_tabelas()
+    if args.observar:
+        logger.info("Conetando ao PostgreSQL...")
+        engine = db.conectar_postgresql(host, dbname, user, password, port)
+        try:
+            observar_pasta_fluxo(
+                engine,
+                args.metodo_insercao,
+                args.intervalo,
+                args.espera,
+                args.pasta_metricas,
+                trabalhadores=args.trabalhadores,
+                usar_cache=not args.sem_cache,
+                reconstruir_cache=args.reconstruir_cache,
+                limite_cache_mb=args.limite_cache_mb,
+                motor=args.motor,
+                usar_layout=not args.sem_layout,
+            )
+        finally:
+            logger.info("Fechando conexão com o PostgreSQL...")
+            db.fechar_conexao(engine)
+        return
+
+    try:
+        logger.info("Iniciando Processa Fluxo...")
+        with instrumentacao().etapa("processar_tabelas"):
+            lancamentos, saldos, investimentos, manifesto = processar_tabelas(
+                trabalhadores=args.trabalhadores,
+                usar_cache=not args.sem_cache,
+                reconstruir_cache=args.reconstruir_cache,
+                limite_cache_mb=args.limite_cache_mb,
+                motor=args.motor,
+                usar_layout=not args.sem_layout,
+            )
 
-    print("\nConetando ao PostgreSQL...\n")
-    engine = db.conectar_postgresql(host, dbname, user, password, port)
+        logger.info("Conetando ao PostgreSQL...")
+        engine = db.conectar_postgresql(host, dbname, user, password, port)
+
+        logger.info("Salvando no PostgresSQL...")
+        salvar_em_postgres(
+            lancamentos,
+            saldos,
+            investimentos,
+            dim.contas,
+            dim.compromissos,
+            dim.datas,
+            engine,
+            args.metodo_insercao,
+            manifesto.meses_afetados() if args.modo_carga == "particao" else None,
+        )
+        manifesto.salvar()
+
+        logger.info("Fechando conexão com o PostgreSQL...")
+        db.fechar_conexao(engine)
+    finally:
+        # As métricas são gravadas também quando a execução falha, com as etapas concluídas até ali
+        instrumentacao().exportar("processador_fluxo", args.pasta_metricas)
 
-    print("\nSalvando no PostgresSQL...\n")
-    salvar_em_postgres(
-        lancamentos, saldos, investimentos, dim.contas, dim.compromissos,dim.datas, engine
-    )
 
-    print("\nFechando conexão com o PostgreSQL...\n")
-    db.fechar_conexao(engine)
-    
-    # email = ""
-    # while email != "S" or email != "N":
-    #     email = input("\nDeseja enviar o email ?(S/N)\n").upper()
-    #     if email == "S":
-    #         print("\nEnviando email...\n")
-    #         enviar_painel.main()
-    #         break
-    #     elif email == "N":
-    #         print("\nEmail não enviado.\n")
-    #         break
-    #     else:
-    #         print("\nOpção inválida.\nDigite 'S' para enviar o email ou 'N' para não enviar.\n")
-    # print("\nProcesso finalizado.\n")
 if __name__ == "__main__":
     main()
@@ -0,0 +1,87 @@
+import logging
+import os
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+PASTA_TEMPLATES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+TEMPLATE_PAINEL = os.path.join(PASTA_TEMPLATES, "painel.html")
+# Bibliotecas de filtros disponíveis em todos os templates do painel (ex.: `|brl`)
+FILTROS_PAINEL = ["filtros_painel"]
+
+
+def configure_django():
+    """Configura o Django, caso ainda não esteja configurado."""
+    import django
+    from django.conf import settings as django_settings
+
+    import settings  # noqa: F401  configurações do projeto, carregadas junto com o Django
+
+    if not django_settings.configured:
+        logger.debug("Configuring Django settings...")
+        django_settings.configure(
+            TEMPLATES=[
+                {
+                    "BACKEND": "django.template.backends.django.DjangoTemplates",
+                    "DIRS": [PASTA_TEMPLATES],
+                    "APP_DIRS": True,
+                    "OPTIONS": {"context_processors": []},
+                }
+            ],
+            INSTALLED_APPS=[],
+        )
+        django.setup()
+        logger.debug("Django configured successfully.")
+
+
+class RenderizadorPainel:
+    """Mantém os templates compilados em memória, indexados pelo caminho do arquivo.
+    Um template só é lido e compilado de novo quando o mtime ou o tamanho do arquivo mudam.
+    Os templates são compilados por um engine próprio, que já carrega os filtros do painel."""
+
+    def __init__(self):
+        self._templates = {}
+        self._engine = None
+
+    def engine(self):
+        """Engine de templates do painel, criado (e o Django configurado) no primeiro uso."""
+        if self._engine is None:
+            from django.template import Engine
+
+            configure_django()
+            self._engine = Engine(dirs=[PASTA_TEMPLATES], builtins=FILTROS_PAINEL)
+        return self._engine
+
+    def template(self, caminho: str = TEMPLATE_PAINEL):
+        """Retorna o template compilado do arquivo, recompilando-o se o arquivo mudou."""
+        caminho = os.path.abspath(caminho)
+        estado = os.stat(caminho)
+        versao = (estado.st_mtime_ns, estado.st_size)
+        em_cache = self._templates.get(caminho)
+        if em_cache is not None and em_cache[0] == versao:
+            return em_cache[1]
+
+        engine = self.engine()
+        logger.info("Compiling template %s...", caminho)
+        with open(caminho, "r", encoding="utf-8") as f:
+            template = engine.from_string(f.read())
+        self._templates[caminho] = (versao, template)
+        return template
+
+    def renderizar(
+        self, contexto: dict, caminho: str = TEMPLATE_PAINEL, caminho_saida: str | None = None
+    ) -> str:
+        """Renderiza o template com o contexto. Com `caminho_saida`, grava também uma cópia do HTML."""
+        import django.template
+
+        html = self.template(caminho).render(django.template.Context(contexto))
+        if caminho_saida is not None:
+            with open(caminho_saida, "w", encoding="utf-8") as f:
+                f.write(html)
+        return html
+
+
+@lru_cache(maxsize=1)
+def renderizador_painel() -> RenderizadorPainel:
+    """Renderizador compartilhado pelo processo, para que cada template seja compilado uma única vez."""
+    return RenderizadorPainel()
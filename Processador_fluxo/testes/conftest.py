@@ -0,0 +1,76 @@
+"""Configuração dos testes do processador, da carga no PostgreSQL e do painel.
+
+Os testes usam as planilhas sintéticas de `gerador_planilhas.py`, sempre com a mesma semente. Os que gravam no
+banco usam o PostgreSQL de `--banco-testes` (ou `FLUXO_TESTE_DATABASE_URL`) e são pulados sem ele. Use um banco
+descartável: as tabelas do fluxo são recriadas nele.
+"""
+
+import os
+import sys
+
+import pytest
+
+PASTA_PROCESSADOR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, PASTA_PROCESSADOR)
+
+
+def pytest_addoption(parser):
+    grupo = parser.getgroup("fluxo_testes", "testes do fluxo de caixa")
+    grupo.addoption(
+        "--banco-testes",
+        default=os.environ.get("FLUXO_TESTE_DATABASE_URL"),
+        help="URL de um PostgreSQL descartável (as tabelas do fluxo são recriadas nele). "
+        "Sem ela, os testes que usam o banco são pulados.",
+    )
+
+
+@pytest.fixture(scope="session")
+def pasta_planilhas(tmp_path_factory) -> str:
+    """Pasta com as planilhas sintéticas de dois meses."""
+    from gerador_planilhas import gerar_planilhas
+
+    pasta = str(tmp_path_factory.mktemp("planilhas_fluxo"))
+    gerar_planilhas(pasta, "01-2024", 2)
+    return pasta
+
+
+@pytest.fixture(scope="session")
+def caminhos_planilhas(pasta_planilhas) -> list:
+    return sorted(
+        os.path.join(pasta_planilhas, arquivo)
+        for arquivo in os.listdir(pasta_planilhas)
+        if arquivo.endswith(".xlsx")
+    )
+
+
+@pytest.fixture(scope="session")
+def tabelas_fluxo(caminhos_planilhas) -> tuple:
+    """Lançamentos, saldos e investimentos das planilhas sintéticas, processados em série."""
+    pytest.importorskip("listas")
+    from processador_fluxo import (
+        TabelaBancoCompromissoLancamentos,
+        TabelaInvestimentos,
+        TabelaSaldoInicialFinal,
+        formata_tabelas,
+        processar_arquivos_fluxo,
+    )
+
+    dfs_tabelas = [[], [], []]
+    for resultado in processar_arquivos_fluxo(caminhos_planilhas):
+        for dfs, dfs_arquivo in zip(dfs_tabelas, resultado):
+            dfs.extend(dfs_arquivo)
+    classes = [TabelaBancoCompromissoLancamentos, TabelaSaldoInicialFinal, TabelaInvestimentos]
+    return tuple(formata_tabelas(classe().processar_dados(dfs)) for classe, dfs in zip(classes, dfs_tabelas))
+
+
+@pytest.fixture(scope="session")
+def engine_testes(request):
+    url = request.config.getoption("banco_testes")
+    if not url:
+        pytest.skip("Informe --banco-testes (ou FLUXO_TESTE_DATABASE_URL) para os testes com o PostgreSQL")
+    from sqlalchemy import create_engine
+
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
@@ -0,0 +1,128 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import carga_postgres
+import esquema
+from gerador_planilhas import gerar_planilha, nome_arquivo
+
+pytest.importorskip("listas")
+pytest.importorskip("dim")
+
+import processador_fluxo
+
+JANEIRO = pd.Timestamp("2024-01-01")
+FEVEREIRO = pd.Timestamp("2024-02-01")
+
+
+def _ler_tabelas(engine) -> dict:
+    with engine.connect() as conexao:
+        return {
+            nome: pd.read_sql(f'SELECT * FROM "{nome}" ORDER BY "index"', conexao)
+            for nome in esquema.metadata.tables
+        }
+
+
+def _do_mes(tabela: pd.DataFrame, mes: pd.Timestamp) -> pd.DataFrame:
+    datas = pd.to_datetime(tabela["data"])
+    return tabela[(datas >= mes) & (datas < mes + pd.offsets.MonthBegin())].reset_index(drop=True)
+
+
+def _sem_indice(tabela: pd.DataFrame) -> pd.DataFrame:
+    colunas = [coluna for coluna in tabela.columns if coluna != "index"]
+    return tabela[colunas].sort_values(colunas).reset_index(drop=True)
+
+
+@pytest.fixture
+def pasta_fluxo(tmp_path, caminhos_planilhas, monkeypatch) -> str:
+    """Cópia das planilhas de janeiro e fevereiro de 2024 usada como pasta do fluxo."""
+    pasta = tmp_path / "fluxo"
+    pasta.mkdir()
+    for caminho in caminhos_planilhas:
+        shutil.copy2(caminho, pasta)
+    monkeypatch.setattr(processador_fluxo, "caminho_pasta_fluxo", lambda: str(pasta))
+    return str(pasta)
+
+
+@pytest.fixture
+def carregar(engine_testes, tmp_path):
+    """Executa a carga do modo observação, com o manifesto e o cache de abas em uma pasta temporária."""
+    pasta_estado = str(tmp_path / "estado")
+
+    def carregar():
+        processador_fluxo._carregar_alteracoes(engine_testes, "copy", pasta_estado=pasta_estado)
+        return _ler_tabelas(engine_testes)
+
+    return carregar
+
+
+@pytest.fixture
+def carga_inicial(engine_testes, pasta_fluxo, carregar) -> dict:
+    """Tabelas da primeira carga, completa, dos dois meses."""
+    esquema.metadata.drop_all(engine_testes)
+    tabelas = carregar()
+    for nome, tabela in tabelas.items():
+        assert not _do_mes(tabela, JANEIRO).empty, nome
+        assert not _do_mes(tabela, FEVEREIRO).empty, nome
+    return tabelas
+
+
+def test_particao_regrava_apenas_o_mes_alterado(engine_testes, pasta_fluxo, carga_inicial, carregar, tmp_path):
+    gerar_planilha(os.path.join(pasta_fluxo, nome_arquivo(1, 2024)), 1, 2024, semente=1)
+    tabelas = carregar()
+
+    for nome, tabela in tabelas.items():
+        # Fevereiro não muda, nem os valores da coluna "index"
+        pd.testing.assert_frame_equal(
+            _do_mes(tabela, FEVEREIRO), _do_mes(carga_inicial[nome], FEVEREIRO), obj=nome
+        )
+        assert len(tabela) == len(carga_inicial[nome]), nome
+        # As linhas regravadas recebem índices após o maior que restou, sem recriar a tabela
+        maior_restante = _do_mes(carga_inicial[nome], FEVEREIRO)["index"].max()
+        assert _do_mes(tabela, JANEIRO)["index"].min() == maior_restante + 1, nome
+    assert not _sem_indice(_do_mes(tabelas["fluxo_lancamentos"], JANEIRO)).equals(
+        _sem_indice(_do_mes(carga_inicial["fluxo_lancamentos"], JANEIRO))
+    )
+
+    # As linhas são as mesmas de uma carga completa das planilhas atuais
+    esquema.metadata.drop_all(engine_testes)
+    processador_fluxo._carregar_alteracoes(engine_testes, "copy", pasta_estado=str(tmp_path / "estado_completo"))
+    completas = _ler_tabelas(engine_testes)
+    for nome, tabela in tabelas.items():
+        pd.testing.assert_frame_equal(_sem_indice(tabela), _sem_indice(completas[nome]), obj=nome)
+
+
+def test_particao_apaga_o_mes_da_planilha_removida(pasta_fluxo, carga_inicial, carregar):
+    os.remove(os.path.join(pasta_fluxo, nome_arquivo(2, 2024)))
+    tabelas = carregar()
+
+    for nome, tabela in tabelas.items():
+        assert _do_mes(tabela, FEVEREIRO).empty, nome
+        pd.testing.assert_frame_equal(tabela, _do_mes(carga_inicial[nome], JANEIRO), obj=nome)
+
+
+def test_falha_na_carga_desfaz_todas_as_tabelas(engine_testes, pasta_fluxo, carga_inicial, carregar, monkeypatch):
+    salvar_particoes = carga_postgres.salvar_particoes
+
+    def falhar_nos_investimentos(tabela, nome, conexao, meses, metodo="copy", chunksize=100_000):
+        if nome == "fluxo_investimentos":
+            raise RuntimeError("falha simulada na carga")
+        salvar_particoes(tabela, nome, conexao, meses, metodo, chunksize)
+
+    monkeypatch.setattr(carga_postgres, "salvar_particoes", falhar_nos_investimentos)
+    gerar_planilha(os.path.join(pasta_fluxo, nome_arquivo(1, 2024)), 1, 2024, semente=1)
+    with pytest.raises(RuntimeError, match="falha simulada"):
+        carregar()
+
+    # Lançamentos e saldos, regravados antes da falha, também voltam ao estado anterior
+    for nome, tabela in _ler_tabelas(engine_testes).items():
+        pd.testing.assert_frame_equal(tabela, carga_inicial[nome], obj=nome)
+
+    # O manifesto não foi salvo: a carga seguinte regrava janeiro
+    monkeypatch.setattr(carga_postgres, "salvar_particoes", salvar_particoes)
+    tabelas = carregar()
+    assert not _sem_indice(_do_mes(tabelas["fluxo_lancamentos"], JANEIRO)).equals(
+        _sem_indice(_do_mes(carga_inicial["fluxo_lancamentos"], JANEIRO))
+    )
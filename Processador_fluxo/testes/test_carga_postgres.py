@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+
+import esquema
+from carga_postgres import salvar_tabela
+
+pytest.importorskip("listas")
+
+from processador_fluxo import salvar_em_postgres
+
+# Valores que o COPY em CSV precisa escapar ou converter: acentos, vírgulas, aspas,
+# quebras de linha, NaN e None em colunas float, categóricas e Int16
+LANCAMENTOS_LIMITE = pd.DataFrame(
+    {
+        "tipos_de_compromisso": pd.array([1, pd.NA, 32767, -5], dtype="Int16"),
+        "data": pd.to_datetime(["2024-01-31", "2024-02-01", "2024-02-29", "2024-03-01"]),
+        "banco": pd.Categorical(["SÃO PAULO", None, 'BANCO "AÇÃO", S.A.', "LINHA\nDUPLA"]),
+        "valores": [1.5, np.nan, None, -0.0001],
+        "tipo": pd.Categorical(["Saída", "Entrada", None, "Desconhecido"], categories=esquema.TIPOS),
+    }
+)
+
+
+def _engine_driver(engine_testes, driver: str):
+    """Engine para o mesmo banco com outro driver (`psycopg2` ou `psycopg`, o psycopg 3)."""
+    pytest.importorskip(driver)
+    url = make_url(engine_testes.url).set(drivername=f"postgresql+{driver}")
+    return create_engine(url)
+
+
+def _ler(engine, nome: str) -> pd.DataFrame:
+    with engine.connect() as conexao:
+        return pd.read_sql(f'SELECT * FROM "{nome}" ORDER BY "index"', conexao)
+
+
+@pytest.fixture(params=["psycopg2", "psycopg"])
+def engine_driver(request, engine_testes):
+    engine = _engine_driver(engine_testes, request.param)
+    yield engine
+    engine.dispose()
+
+
+def test_copy_igual_a_insert(engine_driver, tabelas_fluxo):
+    lidas = {}
+    for metodo in ("copy", "insert"):
+        salvar_em_postgres(*tabelas_fluxo, None, None, None, engine_driver, metodo)
+        lidas[metodo] = {nome: _ler(engine_driver, nome) for nome in esquema.metadata.tables}
+
+    for nome in esquema.metadata.tables:
+        assert not lidas["insert"][nome].empty
+        pd.testing.assert_frame_equal(lidas["copy"][nome], lidas["insert"][nome], obj=nome)
+
+    lancamentos = lidas["copy"]["fluxo_lancamentos"]
+    assert lancamentos["valores"].isna().sum() == tabelas_fluxo[0]["valores"].isna().sum() > 0
+    assert "Saída" in set(lancamentos["tipo"])
+
+
+def test_copy_igual_a_insert_valores_limite(engine_driver):
+    lidas = {}
+    for metodo in ("copy", "insert"):
+        with engine_driver.begin() as conexao:
+            salvar_tabela(LANCAMENTOS_LIMITE, "fluxo_lancamentos", conexao, metodo)
+        lidas[metodo] = _ler(engine_driver, "fluxo_lancamentos")
+
+    pd.testing.assert_frame_equal(lidas["copy"], lidas["insert"])
+    lida = lidas["copy"]
+    assert lida["tipos_de_compromisso"].isna().tolist() == [False, True, False, False]
+    assert lida["banco"].tolist() == ["SÃO PAULO", None, 'BANCO "AÇÃO", S.A.', "LINHA\nDUPLA"]
+    assert lida["valores"].isna().tolist() == [False, True, True, False]
+    assert lida["tipo"].tolist() == ["Saída", "Entrada", None, "Desconhecido"]
@@ -0,0 +1,145 @@
+import smtplib
+import socket
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+pytest.importorskip("django")
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import SMTP
+
+import envio_emails
+
+
+class ServidorInstavel:
+    """Handler do aiosmtpd que se comporta conforme o destinatário e conta os DATA recebidos e aceitos."""
+
+    def __init__(self):
+        self.dados = {}
+        self.aceitos = {}
+        self.conexoes = 0
+        self.quedas_ao_conectar = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.conexoes += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("recusado"):
+            return "550 destinatario inexistente"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        destinatario = envelope.rcpt_tos[0]
+        vezes = self.dados.get(destinatario, 0)
+        self.dados[destinatario] = vezes + 1
+        if destinatario.startswith("rejeitado"):
+            return "554 mensagem rejeitada"
+        if destinatario.startswith("adiado") and vezes == 0:
+            return "451 tente mais tarde"
+        self.aceitos[destinatario] = self.aceitos.get(destinatario, 0) + 1
+        if destinatario.startswith("queda"):
+            # A mensagem foi aceita, mas a conexão cai antes da resposta chegar ao cliente
+            server.transport.close()
+        return "250 OK"
+
+
+class SMTPInstavel(SMTP):
+    """Servidor que derruba as primeiras `quedas_ao_conectar` conexões antes da saudação."""
+
+    def connection_made(self, transport):
+        super().connection_made(transport)
+        if self.event_handler.quedas_ao_conectar:
+            self.event_handler.quedas_ao_conectar -= 1
+            transport.close()
+
+
+class ControladorInstavel(Controller):
+    def factory(self):
+        return SMTPInstavel(self.handler, **self.SMTP_kwargs)
+
+
+def _porta_livre() -> int:
+    with socket.socket() as soquete:
+        soquete.bind(("127.0.0.1", 0))
+        return soquete.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def configuracoes_email():
+    from django.conf import settings
+
+    if not settings.configured:
+        settings.configure(EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend")
+    return settings
+
+
+@pytest.fixture
+def servidor(configuracoes_email, monkeypatch):
+    handler = ServidorInstavel()
+    porta = _porta_livre()
+    controlador = ControladorInstavel(handler, hostname="127.0.0.1", port=porta)
+    controlador.start()
+    monkeypatch.setattr(configuracoes_email, "EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
+    monkeypatch.setattr(configuracoes_email, "EMAIL_HOST", "127.0.0.1")
+    monkeypatch.setattr(configuracoes_email, "EMAIL_PORT", porta)
+    yield handler
+    controlador.stop()
+
+
+def _enviar(*destinatarios: str, tentativas: int = 3) -> dict:
+    from django.core.mail import EmailMessage
+
+    mensagens = [EmailMessage(destinatario, "painel", to=[destinatario]) for destinatario in destinatarios]
+    resultados = envio_emails.enviar_mensagens(mensagens, 1, tentativas=tentativas, espera_inicial=0.01)
+    return {resultado.assunto: resultado for resultado in resultados}
+
+
+def test_queda_durante_o_data_nao_repete(servidor):
+    resultados = _enviar("queda@x.com", "ok@x.com")
+
+    assert resultados["queda@x.com"].tentativas == 1
+    assert isinstance(resultados["queda@x.com"].erro, smtplib.SMTPServerDisconnected)
+    assert servidor.dados["queda@x.com"] == 1
+    # A mensagem seguinte vai por uma conexão reaberta
+    assert resultados["ok@x.com"].erro is None
+    assert servidor.conexoes == 2
+
+
+def test_resposta_4xx_repete_e_5xx_nao(servidor):
+    resultados = _enviar("adiado@x.com", "rejeitado@x.com", "recusado@x.com")
+
+    assert resultados["adiado@x.com"].tentativas == 2
+    assert resultados["adiado@x.com"].erro is None
+    assert resultados["rejeitado@x.com"].tentativas == 1
+    assert isinstance(resultados["rejeitado@x.com"].erro, smtplib.SMTPDataError)
+    assert resultados["recusado@x.com"].tentativas == 1
+    assert isinstance(resultados["recusado@x.com"].erro, smtplib.SMTPRecipientsRefused)
+    assert servidor.dados == {"adiado@x.com": 2, "rejeitado@x.com": 1}
+
+
+def test_nenhuma_mensagem_aceita_duas_vezes(servidor):
+    _enviar("queda@x.com", "adiado@x.com", "rejeitado@x.com", "recusado@x.com", "ok@x.com")
+
+    assert servidor.aceitos == {"queda@x.com": 1, "adiado@x.com": 1, "ok@x.com": 1}
+
+
+def test_queda_ao_conectar_repete(servidor):
+    servidor.quedas_ao_conectar = 1
+    resultados = _enviar("ok@x.com")
+
+    assert resultados["ok@x.com"].tentativas == 2
+    assert resultados["ok@x.com"].erro is None
+    assert servidor.aceitos == {"ok@x.com": 1}
+
+
+def test_falha_ao_conectar_repete(configuracoes_email, monkeypatch):
+    monkeypatch.setattr(configuracoes_email, "EMAIL_HOST", "127.0.0.1")
+    monkeypatch.setattr(configuracoes_email, "EMAIL_PORT", _porta_livre())
+    resultados = _enviar("fora@x.com")
+
+    assert resultados["fora@x.com"].tentativas == 3
+    assert isinstance(resultados["fora@x.com"].erro, OSError)
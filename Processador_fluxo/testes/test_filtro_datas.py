@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import Date, cast, inspect, select
+
+import esquema
+
+pytest.importorskip("listas")
+pytest.importorskip("passwd")
+
+from enviar_painel import _filtro_datas
+from processador_fluxo import salvar_em_postgres
+
+DATAS = [
+    [date(2024, 1, 1)],
+    [date(2024, 1, 31)],
+    [date(2024, 2, 1)],
+    [date(2024, 2, 29)],
+    # Sete dias passando pela virada do mês, fora de ordem
+    [date(2024, 2, 3) - timedelta(days=i) for i in range(7)],
+    # Datas não contíguas, com o fim de um mês e o início do outro
+    [date(2024, 1, 1), date(2024, 1, 31), date(2024, 2, 1), date(2024, 2, 29)],
+    [date(2024, 1, 30), date(2024, 2, 2)],
+    # Datas sem linhas, antes e depois das planilhas
+    [date(2023, 12, 31), date(2024, 3, 1)],
+]
+
+
+@pytest.fixture(scope="module")
+def engine_carregado(engine_testes, tabelas_fluxo):
+    salvar_em_postgres(*tabelas_fluxo, None, None, None, engine_testes)
+    return engine_testes
+
+
+def _linhas(conexao, tabela, filtro) -> list:
+    # Todas as colunas na ordenação: nos investimentos, a coluna "index" se repete entre os meses
+    return conexao.execute(select(tabela).where(filtro).order_by(*tabela.columns)).all()
+
+
+@pytest.mark.parametrize("nome", list(esquema.metadata.tables))
+@pytest.mark.parametrize("data_rel", DATAS, ids=lambda datas: ",".join(f"{data:%m%d}" for data in datas))
+def test_intervalo_igual_ao_cast(engine_carregado, nome, data_rel):
+    tabela = esquema.metadata.tables[nome]
+    with engine_carregado.connect() as conexao:
+        por_intervalo = _linhas(conexao, tabela, _filtro_datas(tabela.c.data, data_rel))
+        por_cast = _linhas(conexao, tabela, cast(tabela.c.data, Date).in_(data_rel))
+    assert por_intervalo == por_cast
+    datas_no_banco = [data for data in data_rel if date(2024, 1, 1) <= data <= date(2024, 2, 29)]
+    assert {linha.data for linha in por_intervalo} == set(datas_no_banco)
+
+
+def test_indices_do_esquema(engine_carregado):
+    inspetor = inspect(engine_carregado)
+    for nome, tabela in esquema.metadata.tables.items():
+        criados = {indice["name"]: indice["column_names"] for indice in inspetor.get_indexes(nome)}
+        assert criados == {indice.name: [coluna.name for coluna in indice.columns] for indice in tabela.indexes}
+    assert {indice["name"] for indice in inspetor.get_indexes("fluxo_lancamentos")} == {
+        "ix_fluxo_lancamentos_data_banco",
+        "ix_fluxo_lancamentos_data_compromisso",
+    }
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("listas")
+
+from processador_fluxo import (
+    TabelaBancoCompromissoLancamentos,
+    TabelaInvestimentos,
+    TabelaSaldoInicialFinal,
+    formata_tabelas,
+    processar_arquivos_fluxo,
+)
+
+CLASSES_TABELAS = [TabelaBancoCompromissoLancamentos, TabelaSaldoInicialFinal, TabelaInvestimentos]
+
+
+def _tabelas(caminhos: list, **opcoes) -> list:
+    dfs_tabelas = [[], [], []]
+    for resultado in processar_arquivos_fluxo(caminhos, **opcoes):
+        for dfs, dfs_arquivo in zip(dfs_tabelas, resultado):
+            dfs.extend(dfs_arquivo)
+    return [formata_tabelas(classe().processar_dados(dfs)) for classe, dfs in zip(CLASSES_TABELAS, dfs_tabelas)]
+
+
+@pytest.mark.parametrize("abas_por_tarefa", [1, 8])
+def test_paralelo_igual_ao_serial(caminhos_planilhas, tabelas_fluxo, abas_por_tarefa):
+    paralelo = _tabelas(caminhos_planilhas, trabalhadores=2, abas_por_tarefa=abas_por_tarefa)
+    for tabela_serial, tabela_paralela in zip(tabelas_fluxo, paralelo):
+        assert not tabela_serial.empty
+        pd.testing.assert_frame_equal(tabela_paralela, tabela_serial)
+
+
+def test_executor_reaproveitado_igual_ao_serial(caminhos_planilhas, tabelas_fluxo):
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        # Duas cargas seguidas no mesmo executor, como no modo observação; o executor continua aberto
+        for _ in range(2):
+            for tabela_serial, tabela_paralela in zip(tabelas_fluxo, _tabelas(caminhos_planilhas, executor=executor)):
+                pd.testing.assert_frame_equal(tabela_paralela, tabela_serial)
+        assert executor.submit(len, "").result() == 0